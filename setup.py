@@ -27,5 +27,5 @@ setup(
         "joblib",
     ],
     tests_require=TEST_DEPS,
-    extras_require={"test": TEST_DEPS},
+    extras_require={"test": TEST_DEPS, "parquet": ["pyarrow"]},
 )
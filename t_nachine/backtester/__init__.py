@@ -1,2 +1,3 @@
+from .core.indicator_cache import IndicatorCache
 from .core.strategy import Strategy, Trade
 from .wrapper.backtest import Backtest
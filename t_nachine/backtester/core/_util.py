@@ -1,9 +1,12 @@
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from numbers import Number
-from typing import Dict, List, Optional, Sequence, Union
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
 
 import numpy as np
 import pandas as pd
+from numpy.lib.mixins import NDArrayOperatorsMixin
 
 
 def try_(lazy_func, default=None, exception=Exception):
@@ -36,6 +39,35 @@ def _as_list(value) -> List:
     return [value]
 
 
+def _n_workers(workers: int) -> int:
+    """number of processes, all the cores if <workers> is negative"""
+    return (os.cpu_count() or 1) if workers < 0 else workers
+
+
+def _map_chunks(
+    function: Callable[[list], list],
+    items: list,
+    workers: int,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+) -> Iterator[list]:
+    """
+    spreads <items> over a pool of <workers> processes, in chunks of about a
+    quarter of their share so the workers stay busy, and yields the results
+    of <function> on each chunk in the order of <items>
+    """
+    chunk_size = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        futures = [
+            executor.submit(function, items[i : i + chunk_size])
+            for i in range(0, len(items), chunk_size)
+        ]
+        for future in futures:
+            yield future.result()
+
+
 def _data_period(index) -> Union[pd.Timedelta, Number]:
     """Return data index period as pd.Timedelta"""
     values = pd.Series(index[-100:])
@@ -95,6 +127,88 @@ class _Indicator(_Array):
     pass
 
 
+class _Cursor:
+    """Current length of `_Data`, shared with its `_ArrayView`s."""
+
+    __slots__ = ("i",)
+
+    def __init__(self, i: int):
+        self.i = i
+
+
+class _ArrayView(NDArrayOperatorsMixin):
+    """
+    View of the first `len(data)` values of an `_Array`.
+
+    The view is created once per backtest and follows the data `_Cursor`,
+    so that `Strategy.next` reading e.g. `data.Close[-1]` or `self.sma[-2]`
+    doesn't re-slice a new `_Array` on every bar. Integer indexing returns
+    scalars and any other indexing (e.g. `data.Close[-20:]`) plain numpy arrays
+    of the revealed values; numpy functions, operators and any other attribute
+    (e.g. `.s`) fall back to the revealed `_Array` slice.
+    """
+
+    __slots__ = ("_array", "_values", "_cursor")
+
+    def __init__(self, array: _Array, cursor: _Cursor):
+        self._array = array
+        self._values = array.view(np.ndarray)
+        self._cursor = cursor
+
+    def _revealed(self) -> _Array:
+        return self._array[: self._cursor.i]
+
+    def __len__(self):
+        return self._cursor.i
+
+    def __getitem__(self, item):
+        if type(item) is int:
+            n = self._cursor.i
+            i = item + n if item < 0 else item
+            if 0 <= i < n:
+                return self._values[i]
+            raise IndexError(f"index {item} is out of bounds for axis 0 with size {n}")
+        return self._values[: self._cursor.i][item]
+
+    def __getattr__(self, item):
+        if item in _ArrayView.__slots__:
+            # Not set yet, e.g. while unpickling
+            raise AttributeError(item)
+        return getattr(self._revealed(), item)
+
+    def __iter__(self):
+        return iter(self._revealed())
+
+    def __reversed__(self):
+        return reversed(self._revealed())
+
+    def __bool__(self):
+        return bool(self._revealed())
+
+    def __float__(self):
+        return float(self._revealed())
+
+    def __repr__(self):
+        return repr(self._revealed())
+
+    def __array__(self, dtype=None):
+        return np.asarray(self._revealed(), dtype=dtype)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        inputs = tuple(
+            x._revealed() if isinstance(x, _ArrayView) else x for x in inputs
+        )
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    # Make pickling work with our catch-all __getattr__
+    def __getstate__(self):
+        return self._array, self._cursor
+
+    def __setstate__(self, state):
+        self._array, self._cursor = state
+        self._values = self._array.view(np.ndarray)
+
+
 class _Data:
     """
     A data array accessor. Provides access to OHLCV "columns"
@@ -105,10 +219,11 @@ class _Data:
 
     def __init__(self, df: pd.DataFrame):
         self.__df = df
-        self.__i = len(df)
+        self.__cursor = _Cursor(len(df))
         self.__pip: Optional[float] = None
-        self.__cache: Dict[str, _Array] = {}
+        self.__cache: Dict[str, pd.DatetimeIndex] = {}
         self.__arrays: Dict[str, _Array] = {}
+        self.__views: Dict[str, _ArrayView] = {}
         self._update()
 
     def __getitem__(self, item):
@@ -121,26 +236,34 @@ class _Data:
             raise AttributeError(f"Column '{item}' not in data") from None
 
     def _set_length(self, i):
-        self.__i = i
+        self.__cursor.i = i
         self.__cache.clear()
 
     def _update(self):
         self.__arrays = {col: _Array(arr, data=self) for col, arr in self.__df.items()}
+        self.__views = {
+            col: _ArrayView(arr, self.__cursor) for col, arr in self.__arrays.items()
+        }
         # Leave index as Series because pd.Timestamp nicer API to work with
         self.__arrays["__index"] = self.__df.index.copy()
 
     def __repr__(self):
-        i = min(self.__i, len(self.__df) - 1)
+        i = min(self.__cursor.i, len(self.__df) - 1)
         index = self.__arrays["__index"][i]
         items = ", ".join(f"{k}={v}" for k, v in self.__df.iloc[i].items())
         return f"<Data i={i} ({index}) {items}>"
 
     def __len__(self):
-        return self.__i
+        return self.__cursor.i
+
+    @property
+    def _cursor(self) -> _Cursor:
+        return self.__cursor
 
     @property
     def df(self) -> pd.DataFrame:
-        return self.__df.iloc[: self.__i] if self.__i < len(self.__df) else self.__df
+        i = self.__cursor.i
+        return self.__df.iloc[:i] if i < len(self.__df) else self.__df
 
     @property
     def pip(self) -> float:
@@ -150,35 +273,35 @@ class _Data:
             )
         return self.__pip
 
-    def __get_array(self, key) -> _Array:
-        arr = self.__cache.get(key)
-        if arr is None:
-            arr = self.__cache[key] = self.__arrays[key][: self.__i]
-        return arr
+    def __get_array(self, key) -> _ArrayView:
+        return self.__views[key]
 
     @property
-    def Open(self) -> _Array:
-        return self.__get_array("Open")
+    def Open(self) -> _ArrayView:
+        return self.__views["Open"]
 
     @property
-    def High(self) -> _Array:
-        return self.__get_array("High")
+    def High(self) -> _ArrayView:
+        return self.__views["High"]
 
     @property
-    def Low(self) -> _Array:
-        return self.__get_array("Low")
+    def Low(self) -> _ArrayView:
+        return self.__views["Low"]
 
     @property
-    def Close(self) -> _Array:
-        return self.__get_array("Close")
+    def Close(self) -> _ArrayView:
+        return self.__views["Close"]
 
     @property
-    def Volume(self) -> _Array:
-        return self.__get_array("Volume")
+    def Volume(self) -> _ArrayView:
+        return self.__views["Volume"]
 
     @property
     def index(self) -> pd.DatetimeIndex:
-        return self.__get_array("__index")
+        index = self.__cache.get("__index")
+        if index is None:
+            index = self.__cache["__index"] = self.__arrays["__index"][: len(self)]
+        return index
 
     # Make pickling in Backtest.optimize() work with our catch-all __getattr__
     def __getstate__(self):
@@ -1,16 +1,85 @@
 from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, Type, Union
 
-import pandas as pd
 import numpy as np
-from typing import Union, Type
+import pandas as pd
 
+from t_nachine.backtester.core import optimize as _optimize
 from t_nachine.backtester.core._plotting import plot
-from t_nachine.backtester.core._util import try_, _Data, _Indicator
+from t_nachine.backtester.core._util import (
+    _ArrayView,
+    _Data,
+    _Indicator,
+    _map_chunks,
+    _n_workers,
+    try_,
+)
 from t_nachine.backtester.core.backtesting import _Broker, _OutOfMoneyError
+from t_nachine.backtester.core.indicator_cache import IndicatorCache
 from t_nachine.backtester.core.stats import Stats
 from t_nachine.backtester.core.strategy import Strategy
 from t_nachine.backtester.core.validate_data import validate_data
 
+# Backtest, data and strategy of an optimization worker, set once per process
+_worker = None
+
+
+def _init_worker(bt_kwargs: dict, data: pd.DataFrame, strategy: Type[Strategy]):
+    global _worker
+    _worker = (Backtest(**bt_kwargs), data, strategy)
+
+
+def _run_combinations(
+    combinations: List[dict], bars: Optional[slice] = None
+) -> List[pd.Series]:
+    """
+    worker entry point: backtests the data of the worker with each combination
+    of parameters, the strategy instance isn't sent back
+    """
+    bt, data, strategy = _worker
+    return [
+        bt._run(data, strategy, params, bars).drop("_strategy")
+        for params in combinations
+    ]
+
+
+def _reveal_indicators(
+    strategy: Strategy, data: _Data
+) -> Tuple[int, List[Tuple[str, _Indicator]]]:
+    """
+    Sets up the indicators of an initialized strategy to be revealed bar by
+    bar: 1d indicators through views that follow the data length, only 2d
+    indicators need to be sliced (on the last dimension) every bar
+
+    Returns:
+        int: first bar to trade at, once the indicators have warmed up
+        List[Tuple[str, _Indicator]]: attribute and indicator of the 2d ones
+    """
+    # Indicators used in Strategy.next()
+    indicator_attrs = {
+        attr: indicator
+        for attr, indicator in strategy.__dict__.items()
+        if isinstance(indicator, _Indicator)
+    }.items()
+
+    # Skip first few candles where indicators are still "warming up"
+    # +1 to have at least two entries available
+    start = 1 + max(
+        (
+            np.isnan(indicator.astype(float)).argmin(axis=-1).max()
+            for _, indicator in indicator_attrs
+        ),
+        default=0,
+    )
+
+    sliced_indicator_attrs = []
+    for attr, indicator in indicator_attrs:
+        if indicator.ndim == 1:
+            setattr(strategy, attr, _ArrayView(indicator, data._cursor))
+        else:
+            sliced_indicator_attrs.append((attr, indicator))
+    return int(start), sliced_indicator_attrs
+
 
 class Backtest:
     def __init__(
@@ -24,8 +93,20 @@ class Backtest:
         trade_on_close=False,
         hedging=False,
         exclusive_orders=False,
+        indicator_cache: Optional[IndicatorCache] = None,
     ):
         self._cash = cash
+        self._indicator_cache = indicator_cache
+        # to set up the same backtest in the optimization workers
+        self._kwargs = dict(
+            cash=cash,
+            commission=commission,
+            margin=margin,
+            trade_on_close=trade_on_close,
+            hedging=hedging,
+            exclusive_orders=exclusive_orders,
+            indicator_cache=indicator_cache,
+        )
         self._broker = partial(
             _Broker,
             cash=cash,
@@ -41,6 +122,38 @@ class Backtest:
         self._stats = Stats()
 
     def run(self, data: pd.DataFrame, strategy: Type[Strategy], **kwargs) -> pd.Series:
+        return self._run(data, strategy, kwargs)
+
+    def run_window(
+        self, data: pd.DataFrame, strategy: Type[Strategy], bars: slice, **kwargs
+    ) -> pd.Series:
+        """
+        Backtests the strategy trading over the <bars> of the data only.
+
+        The strategy is set up on the whole data, so its indicators are
+        those of the full history (and are found in the indicator cache
+        from one window to the next), and `Strategy.next` sees the bars
+        before the window. The trades still open at the end of the window
+        are closed there. The stats are those of the window, its trades'
+        bars counted from its first bar.
+
+        Args:
+            data (pd.DataFrame): stock data
+            strategy (Type[Strategy]): strategy
+            bars (slice): bars to trade over
+
+        Returns:
+            pd.Series: stats of the window
+        """
+        return self._run(data, strategy, kwargs, bars)
+
+    def _run(
+        self,
+        data: pd.DataFrame,
+        strategy: Type[Strategy],
+        params: dict,
+        bars: Optional[slice] = None,
+    ) -> pd.Series:
 
         data = validate_data(data, self._cash)
         self._data: pd.DataFrame = data
@@ -49,37 +162,46 @@ class Backtest:
 
         data = _Data(self._data.copy(deep=False))
         broker: _Broker = self._broker(data=data, index=data.index)
-        strategy: Strategy = self._strategy(broker, data, kwargs)
+        strategy: Strategy = self._strategy(
+            broker, data, params, indicator_cache=self._indicator_cache
+        )
 
         strategy.init()
         data._update()  # Strategy.init might have changed/added to data.df
+        start, sliced_indicator_attrs = _reveal_indicators(strategy, data)
 
-        # Indicators used in Strategy.next()
-        indicator_attrs = {
-            attr: indicator
-            for attr, indicator in strategy.__dict__.items()
-            if isinstance(indicator, _Indicator)
-        }.items()
-
-        # Skip first few candles where indicators are still "warming up"
-        # +1 to have at least two entries available
-        start = 1 + max(
-            (
-                np.isnan(indicator.astype(float)).argmin(axis=-1).max()
-                for _, indicator in indicator_attrs
-            ),
-            default=0,
-        )
+        # Bars to trade over
+        n = len(self._data)
+        first, stop, _ = (bars or slice(None)).indices(n)
+        if first >= stop:
+            raise ValueError(f"No bars to trade over in {bars}")
+        start = max(start, first)
+
+        # Bars the strategy asked to be woken up at, as the index of the next
+        # such bar for every bar
+        next_wake = None
+        if strategy._wake_mask is not None:
+            wake_bars = np.append(np.flatnonzero(strategy._wake_mask[:stop]), stop)
+            next_wake = wake_bars[np.searchsorted(wake_bars, np.arange(stop))]
 
         # Disable "invalid value encountered in ..." warnings. Comparison
         # np.nan >= 3 is not invalid; it's False.
         with np.errstate(invalid="ignore"):
 
-            for i in range(start, len(self._data)):
+            i = start
+            while i < stop:
+                # Nothing can happen until the strategy wakes up,
+                # jump there with the equity unchanged
+                if next_wake is not None and next_wake[i] > i:
+                    broker.expire_orders(i)
+                    if broker.is_idle:
+                        i = broker.skip(i, next_wake[i])
+                        data._set_length(i)
+                        continue
+
                 # Prepare data and indicators for `next` call
                 data._set_length(i + 1)
-                for attr, indicator in indicator_attrs:
-                    # Slice indicator on the last dimension (case of 2d indicator)
+                for attr, indicator in sliced_indicator_attrs:
                     setattr(strategy, attr, indicator[..., : i + 1])
 
                 # Handle orders processing and broker stuff
@@ -90,29 +212,144 @@ class Backtest:
 
                 # Next tick, a moment before bar close
                 strategy.next()
+                i += 1
             else:
                 # Close any remaining open trades so they produce some stats
+                broker._final = True
                 for trade in broker.trades:
                     trade.close()
 
                 # Re-run broker one last time to handle orders placed in the last strategy
                 # iteration. Use the same OHLC values as in the last broker iteration.
-                if start < len(self._data):
+                # It stands for the bar after the last one, orders expiring there are canceled.
+                if start < stop:
+                    broker.expire_orders(stop)
                     try_(broker.next, exception=_OutOfMoneyError)
 
             # Set data back to full length
             # for future `indicator._opts['data'].index` calls to work
             data._set_length(len(self._data))
 
+            trades = broker.closed_trades
+            if (first, stop) != (0, n):
+                trades = self._stats.trades_frame(trades, self._data)
+                trades["EntryBar"] -= first
+                trades["ExitBar"] -= first
             self._results = self._stats.compute_stats(
-                data=self._data,
+                data=self._data.iloc[first:stop],
                 equity=broker.equity,
-                trades=broker.closed_trades,
+                trades=trades,
                 strategy=strategy,
                 cash=broker._cash,
             )
         return self._results
 
+    def optimize(
+        self,
+        data: pd.DataFrame,
+        strategy: Type[Strategy],
+        *,
+        maximize: Union[str, Callable[[pd.Series], float]] = "SQN",
+        method: str = "grid",
+        max_tries: Optional[Union[int, float]] = None,
+        constraint: Optional[Callable[[dict], bool]] = None,
+        return_heatmap: bool = False,
+        random_state=None,
+        workers: int = 1,
+        bars: Optional[slice] = None,
+        **kwargs,
+    ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.Series]]:
+        """
+        Backtests the strategy with every combination of the parameters
+        given as keyword arguments, e.g.
+
+            bt.optimize(data, Bouncing, up_days=range(10, 40, 5),
+                        risk_to_reward=[2, 3], constraint=...)
+
+        Args:
+            data (pd.DataFrame): stock data
+            strategy (Type[Strategy]): strategy whose class variables are optimized
+            maximize (optional): key of the statistic to maximize, or a callable
+                                 of the stats returning the score.
+                                 Defaults to "SQN".
+            method (str, optional): "grid" or "random", see
+                                    `core.optimize.parameter_combinations`.
+                                    Defaults to "grid".
+            max_tries (optional): number of combinations to evaluate
+            constraint (optional): callable of a combination of parameters
+                                   (a dict), False for those not to evaluate
+            return_heatmap (bool, optional): also return the scores indexed by
+                                             parameters, for `lib.plot_heatmaps`
+            random_state (optional): seed of the random sampling
+            workers (int, optional): number of processes evaluating the
+                                     combinations, each one receives the data
+                                     once. -1 uses all the cores. Defaults to 1.
+            bars (Optional[slice], optional): bars to trade over, see
+                                              `run_window`. Defaults to all.
+
+        Returns:
+            pd.DataFrame: the parameters, score and statistics of each
+                          combination, best score first
+            pd.Series: the heatmap, if <return_heatmap>
+        """
+        combinations = _optimize.parameter_combinations(
+            strategy,
+            kwargs,
+            method=method,
+            max_tries=max_tries,
+            constraint=constraint,
+            random_state=random_state,
+        )
+        name = _optimize.score_name(maximize)
+
+        rows = []
+        for params, stats in zip(
+            combinations,
+            self._run_combinations(data, strategy, combinations, workers, bars),
+        ):
+            row = dict(params)
+            row[name] = _optimize.score(stats, maximize)
+            row.update(
+                (key, value) for key, value in stats.items() if not key.startswith("_")
+            )
+            rows.append(row)
+
+        ranked = _optimize.rank(rows, name)
+        if return_heatmap:
+            return ranked, _optimize.heatmap(ranked, list(kwargs), name)
+        return ranked
+
+    def _run_combinations(
+        self,
+        data: pd.DataFrame,
+        strategy: Type[Strategy],
+        combinations: List[Dict],
+        workers: int,
+        bars: Optional[slice] = None,
+    ) -> List[pd.Series]:
+        """
+        stats of each combination of parameters, in order, computed across
+        a process pool when there are <workers>
+        """
+        workers = _n_workers(workers)
+        if workers <= 1 or len(combinations) == 1:
+            return [
+                self._run(data, strategy, params, bars).drop("_strategy")
+                for params in combinations
+            ]
+
+        return [
+            stats
+            for chunk_stats in _map_chunks(
+                partial(_run_combinations, bars=bars),
+                combinations,
+                workers,
+                initializer=_init_worker,
+                initargs=(self._kwargs, data, strategy),
+            )
+            for stats in chunk_stats
+        ]
+
     def plot(
         self,
         *,
@@ -5,11 +5,15 @@ module directly, e.g.
 
     from core import Backtest, Strategy
 """
+import heapq
 import warnings
+from bisect import bisect_left, bisect_right, insort
 from copy import copy
+from datetime import datetime
 from functools import partial
+from itertools import chain
 from math import copysign
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
@@ -33,6 +37,11 @@ __pdoc__ = {
     "Trade.__init__": False,
 }
 
+# Open trades up to which equity and margin are summed trade by trade, as
+# `Trade.pl` and `Trade.value` are; above, the running aggregates of the
+# open trades are used, which can differ from those sums by rounding
+SMALL_BOOK = 64
+
 
 class _Orders(tuple):
     """
@@ -66,6 +75,121 @@ class _Orders(tuple):
         raise AttributeError(f"'tuple' object has no attribute {item!r}")
 
 
+class _OrderBook:
+    """
+    Queue of orders waiting for execution, used by `_Broker` in place of a list.
+
+    It keeps the order of a list where `insert(0, order)` (SL/TP and
+    trade-closing orders) puts orders in front and `append(order)` at the back,
+    but membership and removal are O(1), and orders are also indexed by
+    trigger price, per side: stop orders by their stop price, limit orders by
+    their limit price. `triggered` thus returns, in queue order, only the
+    orders a bar can fill, without looking at the orders resting out of range.
+    """
+
+    def __init__(self):
+        # Order -> sequence number, which sorts like the queue order:
+        # orders put in front get decreasing negative numbers, appended ones increasing
+        self.__front: Dict["Order", int] = {}
+        self.__back: Dict["Order", int] = {}
+        self.__n_front = 0
+        self.__n_back = 0
+        # Sorted (price, seq, order) entries
+        self.__long_stops: List[Tuple[float, int, "Order"]] = []
+        self.__short_stops: List[Tuple[float, int, "Order"]] = []
+        self.__long_limits: List[Tuple[float, int, "Order"]] = []
+        self.__short_limits: List[Tuple[float, int, "Order"]] = []
+        self.__market: Dict["Order", int] = {}
+        # Order -> (sorted side list or None for market orders, price) it is filed under
+        self.__filed: Dict["Order", Tuple[Optional[list], Optional[float]]] = {}
+
+    def __len__(self):
+        return len(self.__front) + len(self.__back)
+
+    def __iter__(self):
+        # Iterate over a snapshot, orders are often canceled while iterating
+        return iter(tuple(chain(reversed(self.__front), self.__back)))
+
+    def __contains__(self, order):
+        return order in self.__front or order in self.__back
+
+    def __repr__(self):
+        return f"<OrderBook {list(self)}>"
+
+    def insert(self, index: int, order: "Order"):
+        assert index == 0, "orders can only be inserted in front"
+        self.__n_front += 1
+        self.__front[order] = seq = -self.__n_front
+        self.__index(order, seq)
+
+    def append(self, order: "Order"):
+        self.__n_back += 1
+        self.__back[order] = seq = self.__n_back
+        self.__index(order, seq)
+
+    def remove(self, order: "Order"):
+        seq = self.__front.pop(order, None)
+        if seq is None:
+            seq = self.__back.pop(order, None)
+            if seq is None:
+                raise ValueError(f"{order} not in order book")
+        self.__unindex(order, seq)
+
+    def reindex(self, order: "Order"):
+        """Re-file `order` after its stop price was hit (and cleared)."""
+        seq = self.__front.get(order)
+        if seq is None:
+            seq = self.__back[order]
+        self.__unindex(order, seq)
+        self.__index(order, seq)
+
+    def triggered(self, high: float, low: float) -> List["Order"]:
+        """
+        Orders, in queue order, whose stop (or limit, if they have no stop) is
+        hit by a bar spanning [`low`, `high`], and market orders.
+        """
+        triggered = list(self.__market.items())
+        # Long stops hit if high > stop, short stops if low < stop
+        long_stops = self.__long_stops[: bisect_left(self.__long_stops, (high,))]
+        short_stops = self.__short_stops[
+            bisect_right(self.__short_stops, (low, np.inf)) :
+        ]
+        # Long limits hit if low < limit, short limits if high > limit
+        long_limits = self.__long_limits[
+            bisect_right(self.__long_limits, (low, np.inf)) :
+        ]
+        short_limits = self.__short_limits[: bisect_left(self.__short_limits, (high,))]
+        for _, seq, order in chain(long_stops, short_stops, long_limits, short_limits):
+            triggered.append((order, seq))
+        triggered.sort(key=lambda item: item[1])
+        return [order for order, _ in triggered]
+
+    def __index(self, order: "Order", seq: int):
+        if order.stop:
+            side = self.__long_stops if order.is_long else self.__short_stops
+            price = order.stop
+        elif order.limit:
+            side = self.__long_limits if order.is_long else self.__short_limits
+            price = order.limit
+        else:
+            side = price = None
+
+        if side is None:
+            self.__market[order] = seq
+        else:
+            insort(side, (price, seq, order))
+        self.__filed[order] = side, price
+
+    def __unindex(self, order: "Order", seq: int):
+        side, price = self.__filed.pop(order)
+        if side is None:
+            del self.__market[order]
+        else:
+            i = bisect_left(side, (price, seq))
+            assert side[i][2] is order
+            del side[i]
+
+
 class Position:
     """
     Currently held asset position, available as
@@ -86,12 +210,12 @@ class Position:
     @property
     def size(self) -> float:
         """Position size in units of asset. Negative if position is short."""
-        return sum(trade.size for trade in self.__broker.trades)
+        return self.__broker._open_size
 
     @property
     def pl(self) -> float:
         """Profit (positive) or loss (negative) of the current position in cash units."""
-        return sum(trade.pl for trade in self.__broker.trades)
+        return self.__broker.open_pl
 
     @property
     def pl_pct(self) -> float:
@@ -136,7 +260,9 @@ class Order:
     If you wish to modify aspects of a placed but not yet filled order,
     cancel it and place a new one instead.
 
-    All placed orders are [Good 'Til Canceled].
+    Placed orders are [Good 'Til Canceled], unless they are given an expiry,
+    in which case the broker cancels them if not filled by then
+    (see `Order.expiry_bar`).
 
     [filled]: https://www.investopedia.com/terms/f/fill.asp
     [Good 'Til Canceled]: https://www.investopedia.com/terms/g/gtc.asp
@@ -151,6 +277,9 @@ class Order:
         sl_price: float = None,
         tp_price: float = None,
         parent_trade: "Trade" = None,
+        placed_bar: int = None,
+        placed_time: pd.Timestamp = None,
+        expiry_bar: int = None,
     ):
         self.__broker = broker
         assert size != 0
@@ -160,6 +289,9 @@ class Order:
         self.__sl_price = sl_price
         self.__tp_price = tp_price
         self.__parent_trade = parent_trade
+        self.__placed_bar = placed_bar
+        self.__placed_time = placed_time
+        self.__expiry_bar = expiry_bar
 
     def _replace(self, **kwargs):
         for k, v in kwargs.items():
@@ -246,6 +378,28 @@ class Order:
         """
         return self.__tp_price
 
+    @property
+    def placed_bar(self) -> int:
+        """
+        Number of bars when the order was placed (`len(data)`), i.e.
+        the index of the first bar the order can be filled on.
+        """
+        return self.__placed_bar
+
+    @property
+    def placed_time(self) -> pd.Timestamp:
+        """Time of the bar the order was placed on."""
+        return self.__placed_time
+
+    @property
+    def expiry_bar(self) -> Optional[int]:
+        """
+        Index of the first bar the order can no longer be filled on,
+        it is canceled before that bar is processed.
+        None for orders good 'til canceled.
+        """
+        return self.__expiry_bar
+
     @property
     def parent_trade(self):
         return self.__parent_trade
@@ -294,6 +448,10 @@ class Trade:
         self.__exit_bar: Optional[int] = None
         self.__sl_order: Optional[Order] = None
         self.__tp_order: Optional[Order] = None
+        self.__entry_sl: Optional[float] = None
+        # bars `Strategy.next` saw the trade open at
+        self.__first_seen: int = entry_bar
+        self.__last_seen: Optional[int] = None
 
     def __repr__(self):
         return (
@@ -354,6 +512,18 @@ class Trade:
     def _tp_order(self):
         return self.__tp_order
 
+    @property
+    def _entry_sl(self) -> Optional[float]:
+        return self.__entry_sl
+
+    @property
+    def _first_seen(self) -> int:
+        return self.__first_seen
+
+    @property
+    def _last_seen(self) -> Optional[int]:
+        return self.__last_seen
+
     # Extra properties
 
     @property
@@ -441,7 +611,195 @@ class Trade:
             setattr(self, attr, order)
 
 
-class _Broker:
+class _OpenTrades:
+    """
+    Open trades of a broker, with running aggregates kept up to date as
+    trades are opened, reduced and closed, so that equity and margin of a
+    large book don't need a pass over all the open trades
+    """
+
+    def __init__(self):
+        self.trades: list = []
+        self._open_size = 0
+        self._open_abs_size = 0
+        self._open_cost = 0.0
+
+    def _pl_at(self, price):
+        """profit or loss of the open trades at <price>, a price or an array of prices"""
+        # a flat book gives zeros of the shape of <price>
+        if 0 < len(self.trades) <= SMALL_BOOK:
+            return sum(
+                trade.size * (price - trade.entry_price) for trade in self.trades
+            )
+        return self._open_size * price - self._open_cost
+
+    def _margin_at(self, price: float) -> float:
+        """margin held by the open trades at <price>"""
+        if len(self.trades) <= SMALL_BOOK:
+            return sum(
+                abs(trade.size) * price / self._leverage for trade in self.trades
+            )
+        return self._open_abs_size * price / self._leverage
+
+    def _add_open_trade(self, trade):
+        self.trades.append(trade)
+        self._open_size += trade.size
+        self._open_abs_size += abs(trade.size)
+        self._open_cost += trade.size * trade.entry_price
+
+    def _remove_open_trade(self, trade):
+        self.trades.remove(trade)
+        if not self.trades:
+            # Reset rather than subtract, so rounding errors don't pile up
+            self._open_size = self._open_abs_size = 0
+            self._open_cost = 0.0
+            return
+        self._open_size -= trade.size
+        self._open_abs_size -= abs(trade.size)
+        self._open_cost -= trade.size * trade.entry_price
+
+    def _reduce_open_trade(self, trade, size: float):
+        """accounts for <trade> being reduced by <size>, before its size is changed"""
+        self._open_size += size
+        self._open_abs_size -= abs(size)
+        self._open_cost += size * trade.entry_price
+
+    def _net(self, size: int, close_trade, reduce_trade) -> int:
+        """
+        Fills an order of <size> by FIFO closing/reducing the existing
+        opposite-facing trades, with <close_trade>(trade) and
+        <reduce_trade>(trade, size=size)
+
+        Returns:
+            int: the size left to open a new trade with
+        """
+        for trade in list(self.trades):
+            if (trade.size > 0) == (size > 0):
+                continue
+            assert trade.size * size < 0
+
+            # Order size greater than this opposite-directed existing trade,
+            # so it will be closed completely
+            if abs(size) >= abs(trade.size):
+                close_trade(trade)
+                size += trade.size
+            else:
+                # The existing trade is larger than the new order,
+                # so it will only be closed partially
+                reduce_trade(trade, size=size)
+                size = 0
+
+            if not size:
+                break
+        return size
+
+
+def _adjusted_price(price: float, size: float, commission: float) -> float:
+    """
+    Long/short <price>, adjusted for commisions.
+    In long positions, the adjusted price is a fraction higher, and vice versa.
+    """
+    return price * (1 + copysign(commission, size))
+
+
+def _check_bracket(size: float, limit, stop, sl, tp, adjusted_price: float):
+    """raises ValueError if SL/TP of a new order aren't on each side of its price"""
+    if size > 0:
+        if not (sl or -np.inf) < (limit or stop or adjusted_price) < (tp or np.inf):
+            raise ValueError(
+                "Long orders require: "
+                f"SL ({sl}) < LIMIT ({limit or stop or adjusted_price}) < TP ({tp})"
+            )
+    else:
+        if not (tp or -np.inf) < (limit or stop or adjusted_price) < (sl or np.inf):
+            raise ValueError(
+                "Short orders require: "
+                f"TP ({tp}) < LIMIT ({limit or stop or adjusted_price}) < SL ({sl})"
+            )
+
+
+def _is_stop_hit(is_long: bool, stop: float, high: float, low: float) -> bool:
+    return (high > stop) if is_long else (low < stop)
+
+
+def _fill_price(
+    is_long: bool,
+    limit: Optional[float],
+    stop: Optional[float],
+    open: float,
+    high: float,
+    low: float,
+    market_price: float,
+) -> Optional[float]:
+    """
+    Price an order fills at in a bar, given its <stop>, if any, was hit
+    in it, <market_price> being the price a market order fills at
+
+    Returns:
+        Optional[float]: None if the limit of the order isn't hit
+    """
+    # Check if limit order can be filled.
+    if limit:
+        is_limit_hit = low < limit if is_long else high > limit
+        # When stop and limit are hit within the same bar, we pessimistically
+        # assume limit was hit before the stop (i.e. "before it counts")
+        is_limit_hit_before_stop = is_limit_hit and (
+            limit < (stop or -np.inf) if is_long else limit > (stop or np.inf)
+        )
+        if not is_limit_hit or is_limit_hit_before_stop:
+            return None
+
+        # stop, if set, was hit within this bar
+        return min(stop or open, limit) if is_long else max(stop or open, limit)
+
+    # Market-if-touched / market order
+    return (
+        max(market_price, stop or -np.inf)
+        if is_long
+        else min(market_price, stop or np.inf)
+    )
+
+
+def _proportional_size(
+    size: float, margin_available: float, leverage: float, adjusted_price: float
+) -> float:
+    """
+    Units of an order of a <size> fraction of the available margin,
+    accounting for margin and spread/commissions, 0 if not even one
+    """
+    return copysign(
+        int((margin_available * leverage * abs(size)) // adjusted_price), size
+    )
+
+
+def _reprocess_brackets(
+    is_market_order: bool, sl, tp, high: float, low: float, time
+) -> bool:
+    """
+    Whether the SL/TP orders of a trade just opened by an order are to be
+    processed again in its bar, which they are if it was a market order.
+    This allows e.g. SL hitting in the same bar the order was open.
+    See https://github.com/kernc/backtesting.py/issues/119
+    """
+    if not (sl or tp):
+        return False
+    if is_market_order:
+        return True
+    if low <= (sl or -np.inf) <= high or low <= (tp or -np.inf) <= high:
+        warnings.warn(
+            f"({time}) A contingent SL/TP order would execute in the "
+            "same bar its parent stop/limit order was turned into a trade. "
+            "Since we can't assert the precise intra-candle "
+            "price movement, the affected SL/TP order will instead be executed on "
+            "the next (matching) price/bar, making the result (of this trade) "
+            "somewhat dubious. "
+            "See https://github.com/kernc/backtesting.py/issues/119",
+            UserWarning,
+        )
+    return False
+
+
+class _Broker(_OpenTrades):
     def __init__(
         self,
         *,
@@ -459,6 +817,7 @@ class _Broker:
             0 <= commission < 0.1
         ), f"commission should be between 0-10%, is {commission}"
         assert 0 < margin <= 1, f"margin should be between 0 and 1, is {margin}"
+        super().__init__()
         self._data: _Data = data
         self._cash = cash
         self._commission = commission
@@ -467,11 +826,17 @@ class _Broker:
         self._hedging = hedging
         self._exclusive_orders = exclusive_orders
 
+        self._index = index
         self._equity = np.tile(np.nan, len(index))
-        self.orders: List[Order] = []
-        self.trades: List[Trade] = []
+        self.orders = _OrderBook()
+        # Heap of (expiry bar, sequence number, order) of the orders with an expiry
+        self._expiries: List[Tuple[int, int, Order]] = []
+        self._n_expiries = 0
+        self.trades: List[Trade]
         self.position = Position(self)
         self.closed_trades: List[Trade] = []
+        # Set for the last run of the broker, after the last `Strategy.next`
+        self._final = False
 
     def __repr__(self):
         return f"<Broker: {self._cash:.0f}{self.position.pl:+.1f} ({len(self.trades)} trades)>"
@@ -485,9 +850,14 @@ class _Broker:
         tp: float = None,
         *,
         trade: Trade = None,
+        expiry: Union[int, pd.Timedelta, pd.Timestamp] = None,
     ):
         """
         Argument size indicates whether the order is long or short
+
+        Argument expiry is either a number of bars the order stays valid
+        for, a duration after the current bar or a time, after which
+        the order is canceled
         """
         size = float(size)
         stop = stop and float(stop)
@@ -495,23 +865,38 @@ class _Broker:
         sl = sl and float(sl)
         tp = tp and float(tp)
 
-        is_long = size > 0
-        adjusted_price = self._adjusted_price(size)
+        _check_bracket(size, limit, stop, sl, tp, self._adjusted_price(size))
 
-        if is_long:
-            if not (sl or -np.inf) < (limit or stop or adjusted_price) < (tp or np.inf):
-                raise ValueError(
-                    "Long orders require: "
-                    f"SL ({sl}) < LIMIT ({limit or stop or adjusted_price}) < TP ({tp})"
-                )
-        else:
-            if not (tp or -np.inf) < (limit or stop or adjusted_price) < (sl or np.inf):
-                raise ValueError(
-                    "Short orders require: "
-                    f"TP ({tp}) < LIMIT ({limit or stop or adjusted_price}) < SL ({sl})"
+        placed_bar = len(self._data)
+        placed_time = self._data.index[-1]
+        expiry_bar = None
+        if expiry is not None:
+            if isinstance(expiry, (int, np.integer)):
+                assert expiry >= 0, f"expiry should be >=0 bars, is {expiry}"
+                expiry_bar = placed_bar + int(expiry)
+            else:
+                if not isinstance(expiry, (datetime, np.datetime64)):
+                    expiry = placed_time + pd.Timedelta(expiry)
+                # First bar past the expiry time
+                expiry_bar = int(
+                    self._index.searchsorted(pd.Timestamp(expiry), side="right")
                 )
 
-        order = Order(self, size, limit, stop, sl, tp, trade)
+        order = Order(
+            self,
+            size,
+            limit,
+            stop,
+            sl,
+            tp,
+            trade,
+            placed_bar=placed_bar,
+            placed_time=placed_time,
+            expiry_bar=expiry_bar,
+        )
+        if expiry_bar is not None:
+            self._n_expiries += 1
+            heapq.heappush(self._expiries, (expiry_bar, self._n_expiries, order))
         # Put the new order in the order queue,
         # inserting SL/TP/trade-closing orders in-front
         if trade:
@@ -540,20 +925,55 @@ class _Broker:
         Long/short `price`, adjusted for commisions.
         In long positions, the adjusted price is a fraction higher, and vice versa.
         """
-        return (price or self.last_price) * (1 + copysign(self._commission, size))
+        return _adjusted_price(price or self.last_price, size, self._commission)
+
+    @property
+    def open_pl(self) -> float:
+        """Profit (positive) or loss (negative) of the open trades at the last price."""
+        return self._pl_at(self.last_price)
+
+    @property
+    def margin_used(self) -> float:
+        """Margin held by the open trades at the last price."""
+        return self._margin_at(self.last_price)
 
     @property
     def equity(self) -> float:
-        return self._cash + sum(trade.pl for trade in self.trades)
+        return self._cash + self.open_pl
 
     @property
     def margin_available(self) -> float:
         # From https://github.com/QuantConnect/Lean/pull/3768
-        margin_used = sum(trade.value / self._leverage for trade in self.trades)
-        return max(0, self.equity - margin_used)
+        return max(0, self.equity - self.margin_used)
+
+    @property
+    def is_idle(self) -> bool:
+        """True if there are no orders nor trades, so a bar can't change anything."""
+        return not self.orders and not self.trades and self._cash > 0
+
+    def skip(self, start: int, stop: int) -> int:
+        """
+        Skips the bars from <start> to <stop> (excluded) while idle,
+        their equity is the cash
+
+        Returns:
+            int: the next bar to process
+        """
+        self._equity[start:stop] = self._cash
+        return int(stop)
+
+    def expire_orders(self, bar: int):
+        """Cancels the pending orders expiring at or before <bar>"""
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= bar:
+            order = heapq.heappop(expiries)[-1]
+            # Filled and canceled orders are left in the heap until they expire
+            if order in self.orders:
+                order.cancel()
 
     def next(self):
         i = self._i = len(self._data) - 1
+        self.expire_orders(i)
         self._process_orders()
 
         # Log account equity for the equity curve
@@ -575,8 +995,8 @@ class _Broker:
         prev_close = data.Close[-2]
         reprocess_orders = False
 
-        # Process orders
-        for order in list(self.orders):  # type: Order
+        # Process orders which this bar can fill
+        for order in self.orders.triggered(high, low):  # type: Order
 
             # Related SL/TP order was already removed
             if order not in self.orders:
@@ -585,46 +1005,26 @@ class _Broker:
             # Check if stop condition was hit
             stop_price = order.stop
             if stop_price:
-                is_stop_hit = (
-                    (high > stop_price) if order.is_long else (low < stop_price)
-                )
-                if not is_stop_hit:
+                if not _is_stop_hit(order.is_long, stop_price, high, low):
                     continue
 
                 # > When the stop price is reached, a stop order becomes a market/limit order.
                 # https://www.sec.gov/fast-answers/answersstopordhtm.html
                 order._replace(stop_price=None)
-
-            # Determine purchase price.
-            # Check if limit order can be filled.
-            if order.limit:
-                is_limit_hit = (
-                    low < order.limit if order.is_long else high > order.limit
-                )
-                # When stop and limit are hit within the same bar, we pessimistically
-                # assume limit was hit before the stop (i.e. "before it counts")
-                is_limit_hit_before_stop = is_limit_hit and (
-                    order.limit < (stop_price or -np.inf)
-                    if order.is_long
-                    else order.limit > (stop_price or np.inf)
-                )
-                if not is_limit_hit or is_limit_hit_before_stop:
-                    continue
-
-                # stop_price, if set, was hit within this bar
-                price = (
-                    min(stop_price or open, order.limit)
-                    if order.is_long
-                    else max(stop_price or open, order.limit)
-                )
-            else:
-                # Market-if-touched / market order
-                price = prev_close if self._trade_on_close else open
-                price = (
-                    max(price, stop_price or -np.inf)
-                    if order.is_long
-                    else min(price, stop_price or np.inf)
-                )
+                self.orders.reindex(order)
+
+            # Determine purchase price
+            price = _fill_price(
+                order.is_long,
+                order.limit,
+                stop_price,
+                open,
+                high,
+                low,
+                prev_close if self._trade_on_close else open,
+            )
+            if price is None:
+                continue
 
             # Determine entry/exit bar index
             is_market_order = not order.limit and not stop_price
@@ -662,12 +1062,8 @@ class _Broker:
             # precompute true size in units, accounting for margin and spread/commissions
             size = order.size
             if -1 < size < 1:
-                size = copysign(
-                    int(
-                        (self.margin_available * self._leverage * abs(size))
-                        // adjusted_price
-                    ),
-                    size,
+                size = _proportional_size(
+                    size, self.margin_available, self._leverage, adjusted_price
                 )
                 # Not enough cash/margin even for a single unit
                 if not size:
@@ -680,24 +1076,11 @@ class _Broker:
                 # Fill position by FIFO closing/reducing existing opposite-facing trades.
                 # Existing trades are closed at unadjusted price, because the adjustment
                 # was already made when buying.
-                for trade in list(self.trades):
-                    if trade.is_long == order.is_long:
-                        continue
-                    assert trade.size * order.size < 0
-
-                    # Order size greater than this opposite-directed existing trade,
-                    # so it will be closed completely
-                    if abs(need_size) >= abs(trade.size):
-                        self._close_trade(trade, price, time_index)
-                        need_size += trade.size
-                    else:
-                        # The existing trade is larger than the new order,
-                        # so it will only be closed partially
-                        self._reduce_trade(trade, price, need_size, time_index)
-                        need_size = 0
-
-                    if not need_size:
-                        break
+                need_size = self._net(
+                    need_size,
+                    partial(self._close_trade, price=price, time_index=time_index),
+                    partial(self._reduce_trade, price=price, time_index=time_index),
+                )
 
             # If we don't have enough liquidity to cover for the order, cancel it
             if abs(need_size) * adjusted_price > self.margin_available * self._leverage:
@@ -710,26 +1093,10 @@ class _Broker:
                     adjusted_price, need_size, order.sl, order.tp, time_index
                 )
 
-                # We need to reprocess the SL/TP orders newly added to the queue.
-                # This allows e.g. SL hitting in the same bar the order was open.
-                # See https://github.com/kernc/backtesting.py/issues/119
-                if order.sl or order.tp:
-                    if is_market_order:
-                        reprocess_orders = True
-                    elif (
-                        low <= (order.sl or -np.inf) <= high
-                        or low <= (order.tp or -np.inf) <= high
-                    ):
-                        warnings.warn(
-                            f"({data.index[-1]}) A contingent SL/TP order would execute in the "
-                            "same bar its parent stop/limit order was turned into a trade. "
-                            "Since we can't assert the precise intra-candle "
-                            "price movement, the affected SL/TP order will instead be executed on "
-                            "the next (matching) price/bar, making the result (of this trade) "
-                            "somewhat dubious. "
-                            "See https://github.com/kernc/backtesting.py/issues/119",
-                            UserWarning,
-                        )
+                # We need to reprocess the SL/TP orders newly added to the queue
+                reprocess_orders |= _reprocess_brackets(
+                    is_market_order, order.sl, order.tp, high, low, data.index[-1]
+                )
 
             # Order processed
             self.orders.remove(order)
@@ -747,6 +1114,7 @@ class _Broker:
             close_trade = trade
         else:
             # Reduce existing trade ...
+            self._reduce_open_trade(trade, size)
             trade._replace(size=size_left)
             if trade._sl_order:
                 trade._sl_order._replace(size=-trade.size)
@@ -755,25 +1123,31 @@ class _Broker:
 
             # ... by closing a reduced copy of it
             close_trade = trade._copy(size=-size, sl_order=None, tp_order=None)
-            self.trades.append(close_trade)
+            self._add_open_trade(close_trade)
 
         self._close_trade(close_trade, price, time_index)
 
     def _close_trade(self, trade: Trade, price: float, time_index: int):
-        self.trades.remove(trade)
+        self._remove_open_trade(trade)
         if trade._sl_order:
             self.orders.remove(trade._sl_order)
         if trade._tp_order:
             self.orders.remove(trade._tp_order)
 
-        self.closed_trades.append(trade._replace(exit_price=price, exit_bar=time_index))
+        # `Strategy.next` saw the trade open up to the previous bar,
+        # or up to this one when it's closed at the end of the backtest
+        last_seen = self._i if self._final else self._i - 1
+        self.closed_trades.append(
+            trade._replace(exit_price=price, exit_bar=time_index, last_seen=last_seen)
+        )
         self._cash += trade.pl
 
     def _open_trade(
         self, price: float, size: int, sl: float, tp: float, time_index: int
     ):
         trade = Trade(self, size, price, time_index)
-        self.trades.append(trade)
+        trade._replace(entry_sl=sl, first_seen=self._i)
+        self._add_open_trade(trade)
         # Create SL/TP (bracket) orders.
         # Make sure SL order is created first so it gets adversarially processed before TP order
         # in case of an ambiguous tie (both hit within a single bar).
@@ -0,0 +1,285 @@
+"""
+Batched signal backtests of many symbols in one go.
+
+`BatchBacktest` packs the symbols into 2-D arrays (symbols x bars), each
+row aligned on the first bar of its symbol and padded with nan after its
+last one, initializes a `core.lib.BracketStrategy` once on the whole
+batch, so its indicators are computed across all the symbols at once,
+then simulates the orders of every symbol with the
+`core.vectorized._SignalBroker` and builds a single trades frame. The
+per-symbol validation, `_Data`, warm-up detection and stats of
+`core.backtest.Backtest.run` are not paid for each symbol.
+"""
+
+import warnings
+from typing import Dict, List, Type
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.core._util import _Indicator
+from t_nachine.backtester.core.lib import BracketStrategy, _BracketOrders
+from t_nachine.backtester.core.vectorized import SignalBacktest, _SignalBroker
+from t_nachine.constants import SYMBOL, TRADES_ATTRIBUTES
+
+OHLC = ["Open", "High", "Low", "Close"]
+
+
+class _BatchData:
+    """
+    The columns of a batch of symbols as 2-D arrays, one row per symbol,
+    read by `core.core.Strategy.init` as it reads `_Data`. Bars are along
+    the last axis, which the indicators and order arrays of the strategy
+    must follow, e.g. `values[..., 1:]` rather than `values[1:]`.
+    """
+
+    def __init__(self, frames: List[pd.DataFrame]):
+        self._lengths = np.array([len(frame) for frame in frames])
+        n_bars = int(self._lengths.max())
+        # row and bar of each bar of the symbols, concatenated
+        rows = np.repeat(np.arange(len(frames)), self._lengths)
+        bars = np.arange(len(rows)) - np.repeat(
+            np.cumsum(self._lengths) - self._lengths, self._lengths
+        )
+
+        # the numeric columns all the symbols have
+        common = set.intersection(*(set(frame.columns) for frame in frames))
+        columns = pd.Index(
+            [
+                column
+                for column, dtype in frames[0].dtypes.items()
+                if column in common and pd.api.types.is_numeric_dtype(dtype)
+            ]
+        )
+        values = np.concatenate(
+            [
+                (frame if frame.columns.equals(columns) else frame[columns]).to_numpy(
+                    dtype=float
+                )
+                for frame in frames
+            ]
+        )
+        self._arrays: Dict[str, np.ndarray] = {}
+        for k, column in enumerate(columns):
+            array = np.full((len(frames), n_bars), np.nan)
+            array[rows, bars] = values[:, k]
+            self._arrays[column] = array
+
+    def __getitem__(self, item) -> np.ndarray:
+        return self._arrays[item]
+
+    def __getattr__(self, item) -> np.ndarray:
+        if item == "_arrays":
+            # Not set yet, e.g. while unpickling
+            raise AttributeError(item)
+        try:
+            return self._arrays[item]
+        except KeyError:
+            raise AttributeError(f"Column '{item}' not in data") from None
+
+    def __contains__(self, item) -> bool:
+        return item in self._arrays
+
+    def __len__(self):
+        return self._arrays["Close"].shape[-1]
+
+    def __repr__(self):
+        return f"<BatchData {len(self._lengths)} symbols, {len(self)} bars>"
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """number of bars of each symbol"""
+        return self._lengths
+
+    @property
+    def padding(self) -> np.ndarray:
+        """True on the bars past the last one of each symbol"""
+        return np.arange(len(self)) >= self._lengths[:, None]
+
+
+class BatchBacktest:
+    """
+    Backtests a `core.lib.BracketStrategy` on a batch of symbols.
+
+    Takes the same arguments as `core.vectorized.SignalBacktest` and
+    fills, stops and expires the orders of each symbol the same way; the
+    strategy's `init` must be written for arrays of any number of
+    dimensions, with the bars along the last axis.
+    """
+
+    def __init__(
+        self,
+        *,
+        cash: float = 10_000,
+        commission: float = 0.0,
+        margin: float = 1.0,
+        trade_on_close=False,
+        hedging=False,
+        exclusive_orders=False,
+    ):
+        self._cash = cash
+        self._broker_kwargs = dict(
+            cash=cash,
+            commission=commission,
+            margin=margin,
+            trade_on_close=trade_on_close,
+            hedging=hedging,
+            exclusive_orders=exclusive_orders,
+        )
+
+    def run(
+        self,
+        data: Dict[str, pd.DataFrame],
+        strategy: Type[BracketStrategy],
+        **kwargs,
+    ) -> pd.DataFrame:
+        """
+        Args:
+            data (Dict[str, pd.DataFrame]): data of each symbol
+            strategy (Type[BracketStrategy]): strategy, initialized once
+                                              on the batch of symbols
+            **kwargs: strategy parameters
+
+        Returns:
+            pd.DataFrame: the trades of all the symbols, in the `_trades`
+                          schema of the backtests of each symbol, plus
+                          their symbol
+        """
+        if not issubclass(strategy, BracketStrategy):
+            raise TypeError("BatchBacktest only runs BracketStrategy strategies")
+        if not data:
+            raise ValueError("Need some symbols to backtest")
+
+        frames = self._validate(data)
+        batch = _BatchData(list(frames.values()))
+        self._check_prices(batch)
+
+        # The strategy only sets up its orders in init, it has no broker
+        instance: BracketStrategy = strategy(None, batch, kwargs)
+        instance.init()
+        orders = instance._bracket_orders
+        starts = self._warm_up(instance, batch)
+
+        trades, rows = [], []
+        with np.errstate(invalid="ignore"):
+            for row, frame in enumerate(frames.values()):
+                n, start = len(frame), starts[row]
+                signals = np.flatnonzero(orders.entry[row, start:n]) + start
+                if not signals.size:
+                    # no order is ever placed
+                    continue
+                broker = _SignalBroker(
+                    index=frame.index,
+                    **{column.lower(): batch[column][row, :n] for column in OHLC},
+                    **self._broker_kwargs,
+                )
+                row_orders = _BracketOrders(
+                    *(values[row, :n] for values in orders[:6]),
+                    orders.risk,
+                    orders.wait,
+                )
+                out_of_money = SignalBacktest._simulate(
+                    broker, row_orders, signals, start, n
+                )
+                if not out_of_money:
+                    broker.close_all(n - 1)
+                trades.extend(broker.closed_trades)
+                rows.extend([row] * len(broker.closed_trades))
+
+        return self._trades_frame(frames, trades, np.array(rows, dtype=int))
+
+    def _validate(self, data: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """`validate_data` checks which don't need the prices"""
+        frames = {}
+        for symbol, frame in data.items():
+            if not len(frame):
+                raise ValueError(f"OHLC `data` of {symbol} is empty")
+            if any(column not in frame for column in OHLC):
+                raise ValueError(
+                    f"`data` of {symbol} must be a pandas.DataFrame with columns "
+                    "'Open', 'High', 'Low', 'Close', and (optionally) 'Volume'"
+                )
+            if not frame.index.is_monotonic_increasing:
+                warnings.warn(
+                    f"Data index of {symbol} is not sorted in ascending order. Sorting.",
+                    stacklevel=3,
+                )
+                frame = frame.sort_index()
+            frames[symbol] = frame
+        return frames
+
+    def _check_prices(self, batch: _BatchData):
+        """`validate_data` checks of the prices, on all the symbols at once"""
+        padding = batch.padding
+        if any((np.isnan(batch[column]) & ~padding).any() for column in OHLC):
+            raise ValueError(
+                "Some OHLC values are missing (NaN). "
+                "Please strip those lines with `df.dropna()` or "
+                "fill them in with `df.interpolate()` or whatever."
+            )
+        if np.any(batch.Close > self._cash):
+            warnings.warn(
+                "Some prices are larger than initial cash value. Note that fractional "
+                "trading is not supported. If you want to trade Bitcoin, "
+                "increase initial cash, or trade μBTC or satoshis instead (GH-134).",
+                stacklevel=3,
+            )
+
+    @staticmethod
+    def _warm_up(strategy: BracketStrategy, batch: _BatchData) -> np.ndarray:
+        """first bar of each symbol, as the warm up of `Backtest.run`"""
+        n_symbols = len(batch.lengths)
+        padding = batch.padding
+        warm_up = np.zeros(n_symbols, dtype=int)
+        for value in strategy.__dict__.values():
+            if isinstance(value, _Indicator):
+                # the padding isn't looked at, the bars of a symbol
+                # which are all nan warm up at once as in `Backtest.run`
+                missing = np.isnan(value.astype(float)) | padding
+                first = missing.argmin(axis=-1).reshape(-1, n_symbols).max(axis=0)
+                warm_up = np.maximum(warm_up, first)
+        return 1 + warm_up
+
+    @staticmethod
+    def _trades_frame(
+        frames: Dict[str, pd.DataFrame], trades: list, rows: np.ndarray
+    ) -> pd.DataFrame:
+        """
+        trades frame of all the symbols at once, built on their data
+        concatenated, the bars of the trades counted from their symbol's first bar
+        """
+        lengths = np.array([len(frame) for frame in frames.values()])
+        offsets = (np.cumsum(lengths) - lengths)[rows]
+        for trade, offset in zip(trades, offsets.tolist()):
+            trade.entry_bar += offset
+            trade.exit_bar += offset
+            trade.first_seen += offset
+            trade.last_seen += offset
+
+        columns = ["High", "Low"] + [
+            feature
+            for feature in TRADES_ATTRIBUTES
+            if any(feature in frame for frame in frames.values())
+        ]
+        data = pd.DataFrame(
+            {
+                column: np.concatenate(
+                    [
+                        (
+                            frame[column].to_numpy()
+                            if column in frame
+                            else np.full(len(frame), np.nan)
+                        )
+                        for frame in frames.values()
+                    ]
+                )
+                for column in columns
+            },
+            index=np.concatenate([frame.index.to_numpy() for frame in frames.values()]),
+        )
+
+        trades_frame = SignalBacktest._trades_frame(data, trades)
+        trades_frame["EntryBar"] -= offsets
+        trades_frame["ExitBar"] -= offsets
+        trades_frame[SYMBOL] = np.array(list(frames), dtype=object)[rows]
+        return trades_frame
@@ -0,0 +1,256 @@
+import hashlib
+import os
+import tempfile
+import types
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.core._util import _ArrayView, _Data
+
+MAX_ENTRIES = 256
+# Fingerprints of the backtest data kept while its indicators are declared
+MAX_DATA_FINGERPRINTS = 8
+
+
+class _Unhashable(Exception):
+    pass
+
+
+class IndicatorCache:
+    """
+    Cache of the indicators declared with `Strategy.I`, kept in memory (least
+    recently used entries evicted past <max_entries>) and, with a
+    <cache_folder>, on disk as one .npy file per indicator.
+
+    An indicator is keyed by its function (module, name, `version` attribute
+    if any, and code), its arguments and a fingerprint of the input values,
+    so the same indicator of the same prices is computed once across runs,
+    parameter sweeps and sessions. Calls whose function or arguments can't be
+    fingerprinted (e.g. a bound method, an arbitrary object) are not cached.
+    """
+
+    def __init__(
+        self, cache_folder: Optional[str] = None, max_entries: int = MAX_ENTRIES
+    ):
+        self._cache_folder = None
+        if cache_folder is not None:
+            self._cache_folder = os.path.abspath(os.path.expanduser(cache_folder))
+            os.makedirs(self._cache_folder, exist_ok=True)
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._data_fingerprints: "OrderedDict[int, tuple]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def cache_folder(self) -> Optional[str]:
+        return self._cache_folder
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Sent to the workers of parallel runs without its entries
+    def __getstate__(self):
+        return {"cache_folder": self._cache_folder, "max_entries": self._max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def key(self, func: Callable, args: tuple, kwargs: dict) -> Optional[str]:
+        """
+        Args:
+            func (Callable): indicator function
+            args (tuple): its positional arguments
+            kwargs (dict): its keyword arguments
+
+        Returns:
+            Optional[str]: cache key of the call, None if it can't be cached
+        """
+        h = hashlib.sha1()
+        try:
+            self._update_function(h, func)
+            self._update(h, args)
+            self._update(h, kwargs)
+        except _Unhashable:
+            return None
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Args:
+            key (str): cache key
+
+        Returns:
+            Optional[np.ndarray]: copy of the cached indicator, None on a miss
+        """
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        elif self._cache_folder is not None:
+            try:
+                value = np.load(self._path(key), allow_pickle=False)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self._remember(key, value)
+
+        if value is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return value.copy()
+
+    def put(self, key: str, value: np.ndarray) -> None:
+        """
+        caches the indicator <value> under <key>, unless it holds objects
+
+        Args:
+            key (str): cache key
+            value (np.ndarray): indicator values
+        """
+        if value.dtype.hasobject:
+            return
+        value = value.copy()
+        self._remember(key, value)
+        if self._cache_folder is None:
+            return
+
+        # written in a temporary file first then renamed, so a concurrent worker
+        # never reads a half written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, value, allow_pickle=False)
+        os.replace(tmp_path, self._path(key))
+
+    def clear(self) -> None:
+        """empties both the memory and the disk layers"""
+        self._entries.clear()
+        self._data_fingerprints.clear()
+        if self._cache_folder is not None:
+            for file_name in os.listdir(self._cache_folder):
+                if file_name.endswith(".npy"):
+                    os.remove(os.path.join(self._cache_folder, file_name))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_folder, f"{key}.npy")
+
+    def _remember(self, key: str, value: np.ndarray) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _update_function(self, h, func) -> None:
+        if isinstance(func, partial):
+            self._update_function(h, func.func)
+            self._update(h, func.args)
+            self._update(h, func.keywords)
+            return
+        if isinstance(func, types.MethodType):
+            # bound to an object, e.g. the strategy, whose state can't be told
+            raise _Unhashable
+
+        name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None)
+        if name is None:
+            raise _Unhashable
+        h.update(f"f:{getattr(func, '__module__', None)}.{name};".encode())
+        self._update(h, getattr(func, "version", None))
+
+        code = getattr(func, "__code__", None)
+        if code is not None:
+            self._update_code(h, code)
+            self._update(h, func.__defaults__)
+            self._update(h, func.__kwdefaults__)
+            for cell in func.__closure__ or ():
+                try:
+                    contents = cell.cell_contents
+                except ValueError:
+                    raise _Unhashable from None
+                self._update(h, contents)
+
+    def _update_code(self, h, code: types.CodeType) -> None:
+        h.update(code.co_code)
+        h.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                self._update_code(h, const)
+            else:
+                h.update(repr(const).encode())
+
+    def _update(self, h, obj) -> None:
+        if obj is None or isinstance(
+            obj, (bool, int, float, complex, str, bytes, np.generic)
+        ):
+            h.update(f"{type(obj).__name__}:{obj!r};".encode())
+        elif isinstance(obj, (tuple, list)):
+            h.update(f"{type(obj).__name__}{len(obj)}(".encode())
+            for item in obj:
+                self._update(h, item)
+            h.update(b")")
+        elif isinstance(obj, dict):
+            h.update(f"dict{len(obj)}(".encode())
+            for k, v in sorted(obj.items(), key=lambda item: repr(item[0])):
+                self._update(h, k)
+                self._update(h, v)
+            h.update(b")")
+        elif isinstance(obj, (_Data, _ArrayView)):
+            h.update(self._data_fingerprint(obj).encode())
+        elif isinstance(obj, pd.DataFrame):
+            h.update(b"df")
+            self._update(h, list(obj.columns))
+            for _, column in obj.items():
+                self._update_array(h, column.to_numpy())
+            self._update_array(h, obj.index.to_numpy())
+        elif isinstance(obj, pd.Series):
+            h.update(b"s")
+            self._update(h, obj.name)
+            self._update_array(h, obj.to_numpy())
+            self._update_array(h, obj.index.to_numpy())
+        elif isinstance(obj, np.ndarray):
+            self._update_array(h, obj)
+        elif callable(obj):
+            self._update_function(h, obj)
+        else:
+            raise _Unhashable
+
+    def _update_array(self, h, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise _Unhashable
+        h.update(f"a:{array.dtype.str}{array.shape};".encode())
+        h.update(array.view(np.uint8).data if array.size else b"")
+
+    def _data_fingerprint(self, data) -> str:
+        """
+        fingerprint of the backtest data, or of one of its columns, worked
+        out once per object: the strategy declares its indicators on the
+        same data, which doesn't change meanwhile
+        """
+        entry = self._data_fingerprints.get(id(data))
+        if entry is not None and entry[0] is data and entry[2] == len(data):
+            return entry[1]
+
+        h = hashlib.sha1()
+        if isinstance(data, _Data):
+            self._update(h, data.df)
+        else:
+            self._update_array(h, np.asarray(data))
+        fingerprint = h.hexdigest()
+
+        # the data is kept along, so that its id isn't reused meanwhile
+        self._data_fingerprints[id(data)] = (data, fingerprint, len(data))
+        while len(self._data_fingerprints) > MAX_DATA_FINGERPRINTS:
+            self._data_fingerprints.popitem(last=False)
+        return fingerprint
@@ -11,17 +11,18 @@ Please raise ideas for additions to this collection on the [issue tracker].
 [issue tracker]: https://github.com/kernc/backtesting.py
 """
 
+import sys
 from collections import OrderedDict
 from inspect import currentframe
 from itertools import compress
 from numbers import Number
-from typing import Callable, Optional, Sequence, Union
+from typing import Callable, NamedTuple, Optional, Sequence, Union
 
 import numpy as np
 import pandas as pd
 
 from ._plotting import plot_heatmaps as _plot_heatmaps
-from ._util import _Array, _as_str
+from ._util import _Array, _ArrayView, _as_str
 from .strategy import Strategy
 
 __pdoc__ = {}
@@ -261,7 +262,7 @@ http://pandas.pydata.org/pandas-docs/stable/timeseries.html#offset-aliases
             return x
 
     if not isinstance(series, (pd.Series, pd.DataFrame)):
-        assert isinstance(series, _Array), (
+        assert isinstance(series, (_Array, _ArrayView)), (
             "resample_apply() takes either a `pd.Series`, `pd.DataFrame`, "
             "or a `Strategy.data.*` array"
         )
@@ -498,6 +499,128 @@ class TrailingStrategy(Strategy):
                 )
 
 
+class _BracketOrders(NamedTuple):
+    entry: np.ndarray
+    size: np.ndarray
+    stop: np.ndarray
+    limit: np.ndarray
+    sl: np.ndarray
+    tp: np.ndarray
+    risk: Optional[float]
+    wait: Optional[int]
+
+
+class BracketStrategy(Strategy):
+    """
+    A strategy whose entry orders are all known upfront: entry signals
+    and their stop/limit/SL/TP levels are set as arrays by calling
+    `core.lib.BracketStrategy.set_orders` from within
+    `core.core.Strategy.init`.
+
+    On `core.backtest.Backtest`, each signal bar places its order in
+    `core.core.Strategy.next`, and pending entry orders expire
+    after `wait` bars (see `core.core.Order.expiry_bar`). The signal bars are its wake mask (see
+    `core.core.Strategy.set_wake_mask`), so overridden `next` methods
+    should only act on trades and orders. The same strategy can be run on
+    `core.vectorized.SignalBacktest`, which simulates the orders
+    without calling `core.core.Strategy.next` on every bar.
+
+        class ExampleStrategy(BracketStrategy):
+            def init(self):
+                super().init()
+                entry = crossover(sma1, sma2)
+                self.set_orders(entry, stop=high * 1.01, sl=low * 0.97, wait=2)
+
+    Remember to call `super().init()` and `super().next()` in your
+    overridden methods.
+    """
+
+    __orders: Optional[_BracketOrders] = None
+
+    __pdoc__["BracketStrategy.__init__"] = False
+
+    def set_orders(
+        self,
+        entry: Sequence[float],
+        *,
+        size: Union[float, Sequence[float]] = 1 - sys.float_info.epsilon,
+        stop: Union[float, Sequence[float]] = np.nan,
+        limit: Union[float, Sequence[float]] = np.nan,
+        sl: Union[float, Sequence[float]] = np.nan,
+        tp: Union[float, Sequence[float]] = np.nan,
+        risk: Optional[float] = None,
+        wait: Optional[int] = None,
+    ):
+        """
+        Set the entry orders.
+
+        A long order is placed wherever `entry` is greater than zero,
+        and a short order wherever it is less than zero.
+
+        `size`, `stop`, `limit`, `sl` and `tp` are scalars or arrays of
+        the same length as data, following `core.core.Order` semantics,
+        NaN meaning not set.
+
+        If `risk` is given, the size is instead computed when the order is
+        placed, so as to lose `risk` of the equity if the SL is hit:
+        `ceil(risk * equity / abs(entry price - sl))`, the entry price being
+        the stop price, else the limit price, else the last close.
+
+        If `wait` is given, pending entry orders are canceled
+        after `wait` bars.
+        """
+        shape = np.shape(self.data.Close)
+
+        def as_array(values):
+            return np.broadcast_to(np.asarray(values, dtype=float), shape)
+
+        entry = np.nan_to_num(as_array(entry))
+        sl = as_array(sl)
+        if risk is not None:
+            assert 0 < risk < 1, "risk must be a fraction of equity"
+            assert not np.isnan(sl[entry != 0]).any(), "risk sizing requires a sl"
+        self.set_wake_mask(entry != 0)
+        self.__orders = _BracketOrders(
+            entry,
+            as_array(size),
+            as_array(stop),
+            as_array(limit),
+            sl,
+            as_array(tp),
+            risk,
+            wait,
+        )
+
+    @property
+    def _bracket_orders(self) -> _BracketOrders:
+        assert self.__orders is not None, "call `set_orders` in `init`"
+        return self.__orders
+
+    def next(self):
+        super().next()
+        orders = self._bracket_orders
+        i = len(self.data) - 1
+        entry = orders.entry[i]
+        if not entry:
+            return
+
+        def level(values):
+            value = values[i]
+            return None if np.isnan(value) else value
+
+        stop, limit, sl, tp = map(
+            level, (orders.stop, orders.limit, orders.sl, orders.tp)
+        )
+        if orders.risk is not None:
+            price = stop or limit or self.data.Close[-1]
+            size = np.ceil(orders.risk * self.equity / abs(price - sl))
+        else:
+            size = orders.size[i]
+
+        place = self.buy if entry > 0 else self.sell
+        place(size=size, stop=stop, limit=limit, sl=sl, tp=tp, expiry=orders.wait)
+
+
 # NOTE: Don't put anything below this __all__ list
 
 __all__ = [
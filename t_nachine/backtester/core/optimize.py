@@ -0,0 +1,303 @@
+"""
+Parameter search shared by `core.backtest.Backtest.optimize` and the
+multi-symbol `wrapper.backtest.Backtest.optimize`: the combinations of
+strategy parameters to evaluate, then the ranking of their scores.
+"""
+
+import itertools
+import math
+from collections import Counter
+from dataclasses import dataclass
+from numbers import Number
+from typing import Callable, Dict, List, Optional, Sequence, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.core.strategy import Strategy
+
+METHODS = ("grid", "random")
+# Random draws per requested combination before giving up on finding new ones
+MAX_DRAWS_PER_TRY = 100
+DEFAULT_RANDOM_TRIES = 100
+# Share of the best scores the proposal model considers good
+GOOD_QUANTILE = 0.25
+
+
+def _values(name: str, values) -> Union[list, object]:
+    """the values of a parameter: a list, or a distribution to sample from"""
+    if hasattr(values, "rvs"):
+        return values
+    if isinstance(values, (str, bytes)) or not np.iterable(values):
+        return [values]
+    values = [_python(value) for value in values]
+    if not values:
+        raise ValueError(f"Optimization variable '{name}' is passed no values.")
+    return values
+
+
+def _python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def parameter_combinations(
+    strategy: Type[Strategy],
+    space: Dict[str, object],
+    *,
+    method: str = "grid",
+    max_tries: Optional[Number] = None,
+    constraint: Optional[Callable[[dict], bool]] = None,
+    random_state=None,
+) -> List[dict]:
+    """
+    Args:
+        strategy (Type[Strategy]): strategy whose class variables are optimized
+        space (Dict[str, object]): values of each parameter, a sequence
+                                   or, for the random method, a scipy.stats
+                                   distribution to sample from
+        method (str, optional): "grid" for every combination, or "random"
+                                for <max_tries> combinations drawn at random.
+                                Defaults to "grid".
+        max_tries (Optional[Number], optional): number (or, for the grid,
+                                                fraction) of combinations to
+                                                evaluate. Defaults to all the
+                                                grid, 100 random ones.
+        constraint (Optional[Callable[[dict], bool]], optional): whether a
+                                                                 combination
+                                                                 is admissible
+        random_state (optional): seed or np.random.RandomState of the sampling
+
+    Returns:
+        List[dict]: the parameter combinations to evaluate
+    """
+    if not space:
+        raise ValueError("Need some strategy parameters to optimize.")
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, not '{method}'")
+    for name in space:
+        if not hasattr(strategy, name):
+            raise AttributeError(
+                f"Strategy '{strategy.__name__}' is missing parameter '{name}'."
+                "Strategy class should define parameters as class variables before they "
+                "can be optimized or run with."
+            )
+    space = {name: _values(name, values) for name, values in space.items()}
+    rng = (
+        random_state
+        if isinstance(random_state, np.random.RandomState)
+        else np.random.RandomState(random_state)
+    )
+    constraint = constraint or (lambda params: True)
+
+    if method == "grid":
+        if any(not isinstance(values, list) for values in space.values()):
+            raise ValueError("the grid method needs sequences of parameter values")
+        combinations = [
+            params
+            for params in (
+                dict(zip(space, values))
+                for values in itertools.product(*space.values())
+            )
+            if constraint(params)
+        ]
+        if max_tries is not None:
+            if isinstance(max_tries, float) and 0 < max_tries <= 1:
+                max_tries = max(1, int(round(max_tries * len(combinations))))
+            if max_tries < len(combinations):
+                # a random subset of the grid, still in the grid order
+                kept = np.sort(rng.choice(len(combinations), max_tries, replace=False))
+                combinations = [combinations[i] for i in kept]
+    else:
+        max_tries = DEFAULT_RANDOM_TRIES if max_tries is None else int(max_tries)
+        combinations, drawn = [], set()
+        for _ in range(max_tries * MAX_DRAWS_PER_TRY):
+            if len(combinations) == max_tries:
+                break
+            params = {
+                name: _python(
+                    values.rvs(random_state=rng)
+                    if hasattr(values, "rvs")
+                    else values[rng.randint(len(values))]
+                )
+                for name, values in space.items()
+            }
+            key = tuple(params.values())
+            if key not in drawn:
+                drawn.add(key)
+                if constraint(params):
+                    combinations.append(params)
+
+    if not combinations:
+        raise ValueError("No admissible parameter combinations to test")
+    return combinations
+
+
+def score_name(maximize: Union[str, Callable]) -> str:
+    """name of the score column, the statistic or the callable maximized"""
+    if isinstance(maximize, str):
+        return maximize
+    return getattr(maximize, "__name__", None) or "score"
+
+
+def score(results, maximize: Union[str, Callable]) -> float:
+    """
+    Args:
+        results: statistics (or trades) of a backtest
+        maximize (Union[str, Callable]): key of the statistic to maximize,
+                                         or a callable of the results
+
+    Returns:
+        float: the score, nan if there's none
+    """
+    value = results[maximize] if isinstance(maximize, str) else maximize(results)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def rank(rows: List[dict], name: str) -> pd.DataFrame:
+    """
+    Args:
+        rows (List[dict]): parameters and statistics of each combination
+        name (str): score column
+
+    Returns:
+        pd.DataFrame: the rows, best score first (nan scores last)
+    """
+    frame = pd.DataFrame(rows)
+    return frame.sort_values(
+        name, ascending=False, kind="mergesort", na_position="last"
+    ).reset_index(drop=True)
+
+
+def best_parameters(ranked: pd.DataFrame, params: Sequence[str]) -> dict:
+    """
+    Args:
+        ranked (pd.DataFrame): ranked combinations
+        params (Sequence[str]): parameter columns
+
+    Returns:
+        dict: the parameters of the best combination
+    """
+    return {name: _python(ranked[name].iloc[0]) for name in params}
+
+
+def heatmap(ranked: pd.DataFrame, params: Sequence[str], name: str) -> pd.Series:
+    """
+    Args:
+        ranked (pd.DataFrame): ranked combinations
+        params (Sequence[str]): parameter columns
+        name (str): score column
+
+    Returns:
+        pd.Series: the score of each combination indexed by its parameters,
+                   as `core.lib.plot_heatmaps` takes it
+    """
+    return ranked.set_index(list(params))[name].sort_index()
+
+
+def halving_rungs(
+    n_units: int, n_candidates: int, eta: int = 3, min_units: int = 1
+) -> List[int]:
+    """
+    budgets of successive halving: the candidates are evaluated on the
+    first units (e.g. stocks) of each rung, a 1 / <eta> of them being
+    promoted to the next rung, up to the last rung with all the units
+
+    Args:
+        n_units (int): number of units
+        n_candidates (int): number of candidates of the first rung
+        eta (int, optional): reduction factor. Defaults to 3.
+        min_units (int, optional): units of the first rung, at least
+
+    Returns:
+        List[int]: number of units of each rung
+    """
+    if eta < 2:
+        raise ValueError("eta must satisfy: eta >= 2")
+    rungs = [n_units]
+    while eta ** (len(rungs) - 1) < n_candidates:
+        units = math.ceil(n_units / eta ** len(rungs))
+        if units < min_units or units == rungs[0]:
+            break
+        rungs.insert(0, units)
+    return rungs
+
+
+def promoted(scores: Sequence[float], eta: int) -> List[int]:
+    """positions of the best 1 / <eta> of the <scores>, nan scores last"""
+    n = math.ceil(len(scores) / eta)
+    scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=-np.inf)
+    return sorted(np.argsort(-scores, kind="stable")[:n].tolist())
+
+
+def propose(
+    combinations: List[dict], scores: Dict[int, float], n: int, random_state=None
+) -> List[int]:
+    """
+    proposes the next combinations to evaluate, those the most likely to score
+    among the best according to the scores so far: each parameter value is
+    weighted by how much more often it is found in the best quarter of the
+    scores than in the rest (a tree-structured Parzen estimator, the values
+    being treated as categories)
+
+    Args:
+        combinations (List[dict]): all the combinations
+        scores (Dict[int, float]): score of the combinations evaluated so far,
+                                   by position
+        n (int): number of combinations to propose
+        random_state (optional): seed or np.random.RandomState breaking ties
+
+    Returns:
+        List[int]: positions of the proposed combinations
+    """
+    rng = (
+        random_state
+        if isinstance(random_state, np.random.RandomState)
+        else np.random.RandomState(random_state)
+    )
+    untried = np.array([i for i in range(len(combinations)) if i not in scores])
+    untried = untried[rng.permutation(len(untried))]
+    if not len(untried):
+        return []
+
+    finite = [i for i, score in scores.items() if np.isfinite(score)]
+    if len(finite) < 2:
+        return untried[:n].tolist()
+    finite.sort(key=lambda i: -scores[i])
+    n_good = math.ceil(GOOD_QUANTILE * len(finite))
+    good = finite[:n_good]
+    bad = finite[n_good:] + [i for i in scores if not np.isfinite(scores[i])]
+
+    log_ratio = np.zeros(len(untried))
+    for name in combinations[0]:
+        n_values = len({repr(params[name]) for params in combinations})
+        good_counts = Counter(repr(combinations[i][name]) for i in good)
+        bad_counts = Counter(repr(combinations[i][name]) for i in bad)
+        for k, i in enumerate(untried):
+            value = repr(combinations[i][name])
+            log_ratio[k] += math.log(
+                (good_counts[value] + 1) / (len(good) + n_values)
+            ) - math.log((bad_counts[value] + 1) / (len(bad) + n_values))
+    return untried[np.argsort(-log_ratio, kind="stable")[:n]].tolist()
+
+
+@dataclass
+class HalvingReport:
+    """backtests run by an adaptive search, against an exhaustive one"""
+
+    exhaustive: int
+    evaluations: int = 0
+    resumed: int = 0
+
+    @property
+    def saved(self) -> int:
+        return self.exhaustive - self.evaluations - self.resumed
+
+    def __str__(self):
+        return (
+            f"{self.evaluations} backtests run, {self.resumed} resumed from the "
+            f"journal, {self.saved} saved out of {self.exhaustive} "
+            f"({self.saved / (self.exhaustive or 1):.0%})"
+        )
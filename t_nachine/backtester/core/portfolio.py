@@ -0,0 +1,381 @@
+"""
+Multi-asset backtest: a strategy instance per symbol, all trading out of one
+shared cash account, bar by bar over the union of the symbols' calendars.
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.core._util import _Data, _Indicator
+from t_nachine.backtester.core.backtest import _reveal_indicators
+from t_nachine.backtester.core.backtesting import _Broker
+from t_nachine.backtester.core.indicator_cache import IndicatorCache
+from t_nachine.backtester.core.stats import Stats
+from t_nachine.backtester.core.strategy import Strategy
+from t_nachine.backtester.core.validate_data import validate_data
+from t_nachine.constants import SYMBOL
+
+# Ranks the strategies whose entry orders compete for the cash of a bar,
+# by symbol, and returns the symbols to fill first
+Rank = Callable[[Dict[str, Strategy]], Sequence[str]]
+
+
+class _Account:
+    """cash shared by the brokers of a portfolio, and the brokers holding trades"""
+
+    def __init__(self, cash: float):
+        self.cash = cash
+        # an ordered set, so that sums over the holdings are reproducible
+        self.holdings: Dict[_Broker, None] = {}
+
+    @property
+    def equity(self) -> float:
+        return self.cash + sum(broker.open_pl for broker in self.holdings)
+
+    @property
+    def margin_available(self) -> float:
+        margin_used = sum(broker.margin_used for broker in self.holdings)
+        return max(0, self.equity - margin_used)
+
+
+class _SymbolBroker(_Broker):
+    """
+    The broker of a symbol of a portfolio: its orders and trades are its
+    own, its cash, equity and margin those of the account
+    """
+
+    def __init__(self, *, account: _Account, **kwargs):
+        self._account = account
+        super().__init__(cash=account.cash, **kwargs)
+
+    @property
+    def _cash(self) -> float:
+        return self._account.cash
+
+    @_cash.setter
+    def _cash(self, cash: float):
+        self._account.cash = cash
+
+    @property
+    def equity(self) -> float:
+        return self._account.equity
+
+    @property
+    def margin_available(self) -> float:
+        return self._account.margin_available
+
+    def _add_open_trade(self, trade):
+        super()._add_open_trade(trade)
+        self._account.holdings[self] = None
+
+    def _remove_open_trade(self, trade):
+        super()._remove_open_trade(trade)
+        if not self.trades:
+            self._account.holdings.pop(self, None)
+
+    def next(self):
+        # The portfolio logs the equity and runs out of money, once per bar
+        i = self._i = len(self._data) - 1
+        self.expire_orders(i)
+        self._process_orders()
+
+    def cancel_entries(self):
+        """Cancels the pending orders which would open trades"""
+        for order in list(self.orders):
+            if order.parent_trade is None:
+                order.cancel()
+
+    @property
+    def has_entries(self) -> bool:
+        return any(order.parent_trade is None for order in self.orders)
+
+
+@dataclass
+class _Symbol:
+    """a symbol of the portfolio and the state of its backtest"""
+
+    name: str
+    frame: pd.DataFrame
+    data: _Data
+    broker: _SymbolBroker
+    strategy: Strategy
+    sliced_indicator_attrs: List[Tuple[str, _Indicator]]
+    # calendar step of each bar
+    steps: np.ndarray
+    # bars the strategy asked to be woken up at, None for all of them
+    wake_bars: Optional[np.ndarray]
+    # bar processed at the next step the symbol is scheduled for, if any
+    bar: Optional[int] = None
+
+    def next_bar(self, bar: int) -> Optional[int]:
+        """first bar from <bar> on to process, None if there's none left"""
+        if bar < len(self.steps) and self.wake_bars is not None:
+            # Nothing can happen until the strategy wakes up,
+            # unless it has orders or trades left
+            self.broker.expire_orders(bar)
+            if self.broker.is_idle:
+                i = np.searchsorted(self.wake_bars, bar)
+                bar = self.wake_bars[i] if i < len(self.wake_bars) else len(self.steps)
+        return int(bar) if bar < len(self.steps) else None
+
+
+class Portfolio:
+    def __init__(
+        self,
+        *,
+        cash: float = 10_000,
+        commission: float = 0.0,
+        margin: float = 1.0,
+        trade_on_close=False,
+        hedging=False,
+        exclusive_orders=False,
+        indicator_cache: Optional[IndicatorCache] = None,
+    ):
+        """
+        Backtests a strategy on many symbols at once, with a single account:
+        every symbol gets its own strategy instance and broker, trading out
+        of the cash of the account and sizing its orders on its equity.
+
+        The arguments are those of `core.backtest.Backtest`.
+        """
+        self._cash = cash
+        self._indicator_cache = indicator_cache
+        self._broker_kwargs = dict(
+            commission=commission,
+            margin=margin,
+            trade_on_close=trade_on_close,
+            hedging=hedging,
+            exclusive_orders=exclusive_orders,
+        )
+        self._stats = Stats()
+
+    def run(
+        self,
+        data: Dict[str, pd.DataFrame],
+        strategy: Type[Strategy],
+        *,
+        rank: Optional[Rank] = None,
+        **kwargs,
+    ) -> pd.Series:
+        """
+        Runs the strategies of all the symbols bar by bar over the union of
+        their calendars. On each bar only the active symbols are run: those
+        having a bar, and orders or trades or a bar their strategy asked to
+        be woken up at (see `core.strategy.Strategy.set_wake_mask`), so the
+        symbols waiting for a signal cost nothing.
+
+        The orders of a bar are processed symbol by symbol, those which
+        don't open trades first, so the cash they free is available to the
+        entries. The entry orders of several symbols compete for the cash:
+        the first filled are those of the first symbols, in the order of
+        <data> or as <rank> orders them. A symbol's trades still open at
+        its last bar are closed there.
+
+        Args:
+            data (Dict[str, pd.DataFrame]): data of each symbol
+            strategy (Type[Strategy]): strategy, run on each symbol
+            rank (Optional[Rank], optional): allocation hook, called on the
+                                             bars several symbols have
+                                             entry orders pending with their
+                                             strategies by symbol. It
+                                             returns the symbols to fill
+                                             first, the entry orders of the
+                                             symbols left out are canceled.
+                                             Defaults to the order of <data>.
+            **kwargs: strategy parameters
+
+        Returns:
+            pd.Series: stats of the portfolio, whose trades are identified
+                       by their symbol and whose bars are those of the
+                       calendar. `_strategies` holds the strategy of each
+                       symbol.
+        """
+        if not data:
+            raise ValueError("Need some symbols to backtest")
+        frames = {
+            symbol: validate_data(frame, self._cash) for symbol, frame in data.items()
+        }
+        calendar = pd.Index(
+            np.unique(
+                np.concatenate([frame.index.to_numpy() for frame in frames.values()])
+            )
+        )
+
+        account = _Account(self._cash)
+        symbols = [
+            self._symbol(account, name, frame, calendar, strategy, kwargs)
+            for name, frame in frames.items()
+        ]
+
+        # Step and position in <symbols> of the symbols to process next,
+        # each symbol being scheduled once at most
+        queue = [
+            (int(symbol.steps[symbol.bar]), k)
+            for k, symbol in enumerate(symbols)
+            if symbol.bar is not None
+        ]
+        heapq.heapify(queue)
+
+        equity = np.full(len(calendar), np.nan)
+        with np.errstate(invalid="ignore"):
+            while queue:
+                step = queue[0][0]
+                scheduled = []
+                while queue and queue[0][0] == step:
+                    scheduled.append(heapq.heappop(queue)[1])
+                active = [symbols[k] for k in scheduled]
+
+                # Prepare data and indicators for `next` call
+                for symbol in active:
+                    i = symbol.bar
+                    symbol.data._set_length(i + 1)
+                    for attr, indicator in symbol.sliced_indicator_attrs:
+                        setattr(symbol.strategy, attr, indicator[..., : i + 1])
+                    symbol.broker.expire_orders(i)
+
+                # Handle orders processing and broker stuff
+                for symbol in self._allocate(active, rank):
+                    symbol.broker.next()
+
+                # If equity is negative, set all to 0 and stop the simulation
+                if account.equity <= 0:
+                    for broker in list(account.holdings):
+                        for trade in list(broker.trades):
+                            broker._close_trade(trade, broker.last_price, broker._i)
+                    account.cash = 0
+                    equity[step:] = 0
+                    break
+
+                # Next tick, a moment before bar close
+                for symbol in active:
+                    symbol.strategy.next()
+                    if symbol.bar == len(symbol.steps) - 1:
+                        self._close(symbol)
+                equity[step] = account.equity
+
+                for k, symbol in zip(scheduled, active):
+                    symbol.bar = symbol.next_bar(symbol.bar + 1)
+                    if symbol.bar is not None:
+                        heapq.heappush(queue, (int(symbol.steps[symbol.bar]), k))
+
+        for symbol in symbols:
+            # Set data back to full length
+            symbol.data._set_length(len(symbol.frame))
+
+        results = self._stats.compute_stats(
+            data=pd.DataFrame({"Close": np.nan}, index=calendar),
+            equity=pd.Series(equity).ffill().fillna(self._cash).to_numpy(),
+            trades=self._trades(symbols),
+            strategy=None,
+            cash=account.cash,
+        )
+        # equally weighted buy & hold of the symbols
+        results["Buy & Hold Return [%]"] = np.mean(
+            [
+                (frame.Close.iloc[-1] - frame.Close.iloc[0]) / frame.Close.iloc[0] * 100
+                for frame in frames.values()
+            ]
+        )
+        results["_strategies"] = {symbol.name: symbol.strategy for symbol in symbols}
+        return results
+
+    def _symbol(
+        self,
+        account: _Account,
+        name: str,
+        frame: pd.DataFrame,
+        calendar: pd.Index,
+        strategy: Type[Strategy],
+        params: dict,
+    ) -> _Symbol:
+        """sets up the broker and strategy of a symbol"""
+        data = _Data(frame.copy(deep=False))
+        broker = _SymbolBroker(
+            account=account, data=data, index=data.index, **self._broker_kwargs
+        )
+        instance: Strategy = strategy(
+            broker, data, params, indicator_cache=self._indicator_cache
+        )
+        instance.init()
+        data._update()  # Strategy.init might have changed/added to data.df
+        start, sliced_indicator_attrs = _reveal_indicators(instance, data)
+
+        symbol = _Symbol(
+            name=name,
+            frame=frame,
+            data=data,
+            broker=broker,
+            strategy=instance,
+            sliced_indicator_attrs=sliced_indicator_attrs,
+            steps=calendar.searchsorted(frame.index),
+            wake_bars=(
+                None
+                if instance._wake_mask is None
+                else np.flatnonzero(instance._wake_mask)
+            ),
+        )
+        symbol.bar = symbol.next_bar(start)
+        return symbol
+
+    @staticmethod
+    def _allocate(active: List[_Symbol], rank: Optional[Rank]) -> List[_Symbol]:
+        """the symbols of a bar in the order their orders are processed"""
+        entering = [symbol for symbol in active if symbol.broker.has_entries]
+        if not entering:
+            return active
+        others = [symbol for symbol in active if not symbol.broker.has_entries]
+        if rank is not None and len(entering) > 1:
+            candidates = {symbol.name: symbol for symbol in entering}
+            ranked = list(
+                dict.fromkeys(
+                    rank({name: symbol.strategy for name, symbol in candidates.items()})
+                )
+            )
+            unknown = set(ranked) - set(candidates)
+            if unknown:
+                raise ValueError(f"rank returned symbols with no entries: {unknown}")
+            for name in set(candidates) - set(ranked):
+                candidates[name].broker.cancel_entries()
+                others.append(candidates[name])
+            entering = [candidates[name] for name in ranked]
+        return others + entering
+
+    @staticmethod
+    def _close(symbol: _Symbol):
+        """
+        Closes the trades still open at the last bar of a symbol, so they
+        produce some stats and the cash they hold goes back to the account
+        """
+        broker = symbol.broker
+        broker._final = True
+        # no more trades are opened
+        broker.cancel_entries()
+        for trade in broker.trades:
+            trade.close()
+
+        # Re-run broker one last time to handle orders placed in the last strategy
+        # iteration. Use the same OHLC values as in the last broker iteration.
+        # It stands for the bar after the last one, orders expiring there are canceled.
+        broker.expire_orders(len(symbol.steps))
+        broker.next()
+
+    def _trades(self, symbols: List[_Symbol]) -> pd.DataFrame:
+        """the trades of all the symbols, their bars those of the calendar"""
+        # the many symbols which never traded have nothing to add
+        traded = [symbol for symbol in symbols if symbol.broker.closed_trades]
+        frames = []
+        for symbol in traded or symbols[:1]:
+            trades = self._stats.trades_frame(symbol.broker.closed_trades, symbol.frame)
+            trades["EntryBar"] = symbol.steps[trades["EntryBar"].to_numpy(dtype=int)]
+            trades["ExitBar"] = symbol.steps[trades["ExitBar"].to_numpy(dtype=int)]
+            trades.insert(0, SYMBOL, symbol.name)
+            frames.append(trades)
+        return (
+            pd.concat(frames, ignore_index=True)
+            .sort_values(["EntryBar", "ExitBar"], kind="mergesort")
+            .reset_index(drop=True)
+        )
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Tuple, Union
 
 import pandas as pd
 import numpy as np
@@ -27,7 +27,11 @@ class Stats(pd.Series):
 
     @staticmethod
     def compute_stats(
-        data: pd.DataFrame, equity, trades: List[Trade], strategy: Strategy, cash: float
+        data: pd.DataFrame,
+        equity,
+        trades: Union[List[Trade], pd.DataFrame],
+        strategy: Strategy,
+        cash: float,
     ) -> Stats:
 
         index = data.index
@@ -38,50 +42,31 @@ class Stats(pd.Series):
             {"Equity": equity},
             index=index,
         )
-        trades_dict = {
-            "Size": [t.size for t in trades],
-            "EntryBar": [t.entry_bar for t in trades],
-            "ExitBar": [t.exit_bar for t in trades],
-            "OneR": [t.one_r for t in trades],
-            "SlPrice": [t.sl for t in trades],
-            "TpPrice": [t.tp for t in trades],
-            "EntryPrice": [t.entry_price for t in trades],
-            "ExitPrice": [t.exit_price for t in trades],
-            "MaxPnL": [t.max_pnl for t in trades],
-            "MaxNegativePnl": [t.max_negative_pnl for t in trades],
-            "PnL": [t.pl for t in trades],
-            "ReturnPct": [t.pl_pct for t in trades],
-            "EntryTime": [t.entry_time for t in trades],
-            "ExitTime": [t.exit_time for t in trades],
-        }
-        for feature in TRADES_ATTRIBUTES:
-            try:
-                trades_dict[feature] = [getattr(t, feature) for t in trades]
-            except AttributeError:
-                pass
-
-        trades_df = pd.DataFrame(trades_dict)
-
-        pl = trades_df["PnL"]
-        returns = trades_df["ReturnPct"]
+        # trades are either Trade objects or an already built trades frame
+        trades_df = (
+            trades
+            if isinstance(trades, pd.DataFrame)
+            else Stats.trades_frame(trades, data)
+        )
 
-        s = pd.Series(dtype=object)
-        s.loc["Start"] = index[0]
-        s.loc["End"] = index[-1]
-        s.loc["Duration"] = s.End - s.Start
+        # filled as a dict, growing a Series one label at a time is slow
+        s = {}
+        s["Start"] = index[0]
+        s["End"] = index[-1]
+        s["Duration"] = s["End"] - s["Start"]
 
         have_position = np.repeat(0, len(index))
-        for t in trades:
-            have_position[t.entry_bar : t.exit_bar + 1] = 1  # type: ignore
+        for entry_bar, exit_bar in zip(trades_df["EntryBar"], trades_df["ExitBar"]):
+            have_position[entry_bar : exit_bar + 1] = 1  # type: ignore
 
-        s.loc["Exposure Time [%]"] = (
+        s["Exposure Time [%]"] = (
             have_position.mean() * 100
         )  # In "n bars" time, not index time
-        s.loc["Equity Final [$]"] = equity[-1]
-        s.loc["Equity Peak [$]"] = equity.max()
-        s.loc["Return [%]"] = (equity[-1] - equity[0]) / equity[0] * 100
+        s["Equity Final [$]"] = equity[-1]
+        s["Equity Peak [$]"] = equity.max()
+        s["Return [%]"] = (equity[-1] - equity[0]) / equity[0] * 100
         c = data.Close.values
-        s.loc["Buy & Hold Return [%]"] = (c[-1] - c[0]) / c[0] * 100  # long-only return
+        s["Buy & Hold Return [%]"] = (c[-1] - c[0]) / c[0] * 100  # long-only return
 
         day_returns = gmean_day_return = annual_trading_days = np.array(np.nan)
         if index.is_all_dates:
@@ -94,8 +79,8 @@ class Stats(pd.Series):
             )
 
         annualized_return = (1 + gmean_day_return) ** annual_trading_days - 1
-        s.loc["Return (Ann.) [%]"] = annualized_return * 100
-        s.loc["Volatility (Ann.) [%]"] = (
+        s["Return (Ann.) [%]"] = annualized_return * 100
+        s["Volatility (Ann.) [%]"] = (
             np.sqrt(
                 (
                     day_returns.var(ddof=int(bool(day_returns.shape)))
@@ -111,13 +96,13 @@ class Stats(pd.Series):
 
         # Our Sharpe mismatches `empyrical.sharpe_ratio()` because they use arithmetic mean return
         # and simple standard deviation
-        s.loc["Sharpe Ratio"] = np.clip(
-            s.loc["Return (Ann.) [%]"] / (s.loc["Volatility (Ann.) [%]"] or np.nan),
+        s["Sharpe Ratio"] = np.clip(
+            s["Return (Ann.) [%]"] / (s["Volatility (Ann.) [%]"] or np.nan),
             0,
             np.inf,
         )  # noqa: E501
         # Our Sortino mismatches `empyrical.sortino_ratio()` because they use arithmetic mean return
-        s.loc["Sortino Ratio"] = np.clip(
+        s["Sortino Ratio"] = np.clip(
             annualized_return
             / (
                 np.sqrt(np.mean(day_returns.clip(-np.inf, 0) ** 2))
@@ -126,23 +111,132 @@ class Stats(pd.Series):
             0,
             np.inf,
         )  # noqa: E501
-        s.loc["# Trades"] = n_trades = len(trades)
-        s.loc["Win Rate [%]"] = win_rate = (
+        s.update(Stats.trades_stats(trades_df))
+        s["_strategy"] = strategy
+        s["_equity_curve"] = equity_df
+        s["_trades"] = trades_df
+
+        s = Stats(s, dtype=object)
+        return s
+
+    @staticmethod
+    def trades_stats(trades: pd.DataFrame) -> Dict[str, float]:
+        """
+        statistics of the trades alone, which can be computed on the trades
+        of many backtests pooled together
+
+        Args:
+            trades (pd.DataFrame): trades frame
+
+        Returns:
+            Dict[str, float]: "# Trades" to "SQN" statistics
+        """
+        pl = trades["PnL"]
+        returns = trades["ReturnPct"]
+
+        s = {}
+        s["# Trades"] = n_trades = len(trades)
+        s["Win Rate [%]"] = win_rate = (
             np.nan if not n_trades else (pl > 0).sum() / n_trades * 100
         )  # noqa: E501
-        s.loc["Best Trade [%]"] = returns.max() * 100
-        s.loc["Worst Trade [%]"] = returns.min() * 100
-        mean_return = geometric_mean(returns)
-        s.loc["Profit Factor"] = returns[returns > 0].sum() / (
+        s["Best Trade [%]"] = returns.max() * 100
+        s["Worst Trade [%]"] = returns.min() * 100
+        s["Profit Factor"] = returns[returns > 0].sum() / (
             abs(returns[returns < 0].sum()) or np.nan
         )  # noqa: E501
-        s.loc["Expectancy [%]"] = returns[returns > 0].mean() * win_rate + returns[
+        s["Expectancy [%]"] = returns[returns > 0].mean() * win_rate + returns[
             returns < 0
         ].mean() * (100 - win_rate)
-        s.loc["SQN"] = np.sqrt(n_trades) * pl.mean() / (pl.std() or np.nan)
-        s.loc["_strategy"] = strategy
-        s.loc["_equity_curve"] = equity_df
-        s.loc["_trades"] = trades_df
-
-        s = Stats(s)
+        s["SQN"] = np.sqrt(n_trades) * pl.mean() / (pl.std() or np.nan)
         return s
+
+    @staticmethod
+    def trade_excursions(
+        data: pd.DataFrame,
+        entry_price: np.ndarray,
+        first_seen: np.ndarray,
+        last_seen: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        best and worst price moves from the entry over the bars each trade
+        was seen open at, nan for the trades `Strategy.next` never saw
+
+        Args:
+            data (pd.DataFrame): stock data
+            entry_price (np.ndarray): entry price of each trade
+            first_seen (np.ndarray): first bar each trade was seen at
+            last_seen (np.ndarray): last bar each trade was seen at
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: MaxPnL and MaxNegativePnl
+        """
+        max_pnl = np.full(len(entry_price), np.nan)
+        max_negative_pnl = np.full(len(entry_price), np.nan)
+        seen = last_seen >= first_seen
+        if seen.any():
+            # one reduction per [first_seen, last_seen] range, the ranges
+            # ending on the last bar reduce up to the appended value
+            bounds = np.column_stack([first_seen[seen], last_seen[seen] + 1]).ravel()
+            high = np.append(data.High.to_numpy(dtype=float), np.nan)
+            low = np.append(data.Low.to_numpy(dtype=float), np.nan)
+            max_pnl[seen] = np.maximum.reduceat(high, bounds)[::2] - entry_price[seen]
+            max_negative_pnl[seen] = np.minimum(
+                np.minimum.reduceat(low, bounds)[::2] - entry_price[seen], 0
+            )
+        return max_pnl, max_negative_pnl
+
+    @staticmethod
+    def entry_features(
+        data: pd.DataFrame, first_seen: np.ndarray, last_seen: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        TRADES_ATTRIBUTES columns of the data, at the first bar each trade
+        was seen at, nan for the trades `Strategy.next` never saw
+
+        Args:
+            data (pd.DataFrame): stock data
+            first_seen (np.ndarray): first bar each trade was seen at
+            last_seen (np.ndarray): last bar each trade was seen at
+
+        Returns:
+            Dict[str, np.ndarray]: the features
+        """
+        seen = last_seen >= first_seen
+        features = {}
+        for feature in TRADES_ATTRIBUTES:
+            if feature in data:
+                values = data[feature].to_numpy()[first_seen]
+                features[feature] = (
+                    values if seen.all() else np.where(seen, values, np.nan)
+                )
+        return features
+
+    @staticmethod
+    def trades_frame(trades: List[Trade], data: pd.DataFrame) -> pd.DataFrame:
+        entry_price = np.array([t.entry_price for t in trades], dtype=float)
+        first_seen = np.array([t._first_seen for t in trades], dtype=int)
+        last_seen = np.array([t._last_seen for t in trades], dtype=int)
+        entry_sl = np.array([t._entry_sl or np.nan for t in trades], dtype=float)
+        max_pnl, max_negative_pnl = Stats.trade_excursions(
+            data, entry_price, first_seen, last_seen
+        )
+
+        trades_dict = {
+            "Size": [t.size for t in trades],
+            "EntryBar": [t.entry_bar for t in trades],
+            "ExitBar": [t.exit_bar for t in trades],
+            "OneR": np.where(last_seen >= first_seen, entry_price - entry_sl, np.nan),
+            "SlPrice": [t.sl for t in trades],
+            "TpPrice": [t.tp for t in trades],
+            "EntryPrice": [t.entry_price for t in trades],
+            "ExitPrice": [t.exit_price for t in trades],
+            "MaxPnL": max_pnl,
+            "MaxNegativePnl": max_negative_pnl,
+            "PnL": [t.pl for t in trades],
+            "ReturnPct": [t.pl_pct for t in trades],
+            "EntryTime": [t.entry_time for t in trades],
+            "ExitTime": [t.exit_time for t in trades],
+        }
+        trades_dict.update(Stats.entry_features(data, first_seen, last_seen))
+
+        return pd.DataFrame(trades_dict)
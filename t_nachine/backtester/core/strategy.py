@@ -1,9 +1,10 @@
 import sys
 from abc import ABCMeta, abstractmethod
 from itertools import chain
-from typing import Callable, Tuple
+from typing import Callable, Optional, Sequence, Tuple, Union
 import numpy as np
 from t_nachine.backtester.core._util import _Data, _as_str, try_, _Indicator
+from t_nachine.backtester.core.indicator_cache import IndicatorCache
 from t_nachine.backtester.core.backtesting import (
     _Broker,
     Trade,
@@ -23,8 +24,10 @@ class Strategy(metaclass=ABCMeta):
     your own strategy.
     """
 
-    def __init__(self, broker, data, params):
+    def __init__(self, broker, data, params, indicator_cache=None):
         self._indicators = []
+        self._indicator_cache: Optional[IndicatorCache] = indicator_cache
+        self._wake_mask = None
         self._broker: _Broker = broker
         self._data: _Data = data
         self._params = self._check_params(params)
@@ -98,6 +101,10 @@ class Strategy(metaclass=ABCMeta):
 
             def init():
                 self.sma = self.I(ta.SMA, self.data.Close, self.n_sma)
+
+        When the backtest is given an `IndicatorCache`, the indicator
+        is looked up there before calling `func`, see
+        `core.indicator_cache.IndicatorCache`.
         """
         if name is None:
             params = ",".join(filter(None, map(_as_str, chain(args, kwargs.values()))))
@@ -109,26 +116,35 @@ class Strategy(metaclass=ABCMeta):
                 **dict(zip(kwargs.keys(), map(_as_str, kwargs.values()))),
             )
 
-        try:
-            value = func(*args, **kwargs)
-        except Exception as e:
-            raise RuntimeError(f'Indicator "{name}" errored with exception: {e}')
+        cache = self._indicator_cache
+        key = cache.key(func, args, kwargs) if cache is not None else None
+        value = cache.get(key) if key is not None else None
+
+        if value is None:
+            try:
+                value = func(*args, **kwargs)
+            except Exception as e:
+                raise RuntimeError(f'Indicator "{name}" errored with exception: {e}')
 
-        if isinstance(value, pd.DataFrame):
-            value = value.values.T
+            if isinstance(value, pd.DataFrame):
+                value = value.values.T
 
-        if value is not None:
-            value = try_(lambda: np.asarray(value, order="C"), None)
+            if value is not None:
+                value = try_(lambda: np.asarray(value, order="C"), None)
+                if key is not None and value is not None:
+                    cache.put(key, value)
         is_arraylike = value is not None
 
+        # Bars along the last axis, the first one being the symbols of a batch
+        data_shape = np.shape(self._data.Close)
         # Optionally flip the array if the user returned e.g. `df.values`
-        if is_arraylike and np.argmax(value.shape) == 0:
+        if is_arraylike and len(data_shape) == 1 and np.argmax(value.shape) == 0:
             value = value.T
 
         if (
             not is_arraylike
-            or not 1 <= value.ndim <= 2
-            or value.shape[-1] != len(self._data.Close)
+            or not 1 <= value.ndim - len(data_shape) + 1 <= 2
+            or value.shape[-len(data_shape) :] != data_shape
         ):
             raise ValueError(
                 "Indicators must return (optionally a tuple of) numpy.arrays of same "
@@ -171,6 +187,24 @@ class Strategy(metaclass=ABCMeta):
             super().init()
         """
 
+    def set_wake_mask(self, mask: Sequence[bool]):
+        """
+        Declare, from within `core.core.Strategy.init`, the bars at which
+        `core.core.Strategy.next` can do something, e.g. where the
+        entry precondition of the strategy holds.
+
+        While there are no orders and no trades, the bars in between are
+        skipped: neither `core.core.Strategy.next` nor the broker are run
+        on them, and the equity stays the cash.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != np.shape(self._data.Close):
+            raise ValueError(
+                f"wake mask must be of the data shape {np.shape(self._data.Close)}, "
+                f"got shape {mask.shape}"
+            )
+        self._wake_mask = mask
+
     @abstractmethod
     def next(self):
         """
@@ -195,16 +229,20 @@ class Strategy(metaclass=ABCMeta):
         stop: float = None,
         sl: float = None,
         tp: float = None,
+        expiry: Union[int, pd.Timedelta, pd.Timestamp] = None,
     ):
         """
         Place a new long order. For explanation of parameters, see `Order` and its properties.
 
+        If not filled in time, the order is canceled by the broker after
+        `expiry`: a number of bars, a duration or a time (see `Order.expiry_bar`).
+
         See also `Strategy.sell()`.
         """
         assert (
             0 < size < 1 or round(size) == size
         ), "size must be a positive fraction of equity, or a positive whole number of units"
-        return self._broker.new_order(size, limit, stop, sl, tp)
+        return self._broker.new_order(size, limit, stop, sl, tp, expiry=expiry)
 
     def sell(
         self,
@@ -214,16 +252,20 @@ class Strategy(metaclass=ABCMeta):
         stop: float = None,
         sl: float = None,
         tp: float = None,
+        expiry: Union[int, pd.Timedelta, pd.Timestamp] = None,
     ):
         """
         Place a new short order. For explanation of parameters, see `Order` and its properties.
 
+        If not filled in time, the order is canceled by the broker after
+        `expiry`: a number of bars, a duration or a time (see `Order.expiry_bar`).
+
         See also `Strategy.buy()`.
         """
         assert (
             0 < size < 1 or round(size) == size
         ), "size must be a positive fraction of equity, or a positive whole number of units"
-        return self._broker.new_order(-size, limit, stop, sl, tp)
+        return self._broker.new_order(-size, limit, stop, sl, tp, expiry=expiry)
 
     @property
     def equity(self) -> float:
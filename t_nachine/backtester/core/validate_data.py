@@ -30,7 +30,12 @@ def validate_data(data: pd.DataFrame, cash: float):
             "`data` must be a pandas.DataFrame with columns "
             "'Open', 'High', 'Low', 'Close', and (optionally) 'Volume'"
         )
-    if data[["Open", "High", "Low", "Close"]].isnull().values.any():
+    # Checked column by column, selecting several columns at once consolidates
+    # the frame in place, which copies memory-mapped columns into memory
+    if any(
+        data[column].isnull().values.any()
+        for column in ("Open", "High", "Low", "Close")
+    ):
         raise ValueError(
             "Some OHLC values are missing (NaN). "
             "Please strip those lines with `df.dropna()` or "
@@ -0,0 +1,621 @@
+"""
+Signal-based backtest engine.
+
+`SignalBacktest` runs a `core.lib.BracketStrategy` without the per-bar
+`core.core.Strategy.next` loop: the entry orders are known upfront, so
+the bar at which each pending order can fill, or each SL/TP can hit, is
+searched for in the price arrays, and the broker rules of
+`core.backtesting._Broker` are only applied on those bars.
+"""
+
+import heapq
+import itertools
+from copy import copy
+from functools import partial
+from math import copysign
+from typing import List, Optional, Type
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.core._util import _Data, _Indicator
+from t_nachine.backtester.core.backtesting import (
+    _adjusted_price,
+    _Broker,
+    _check_bracket,
+    _fill_price,
+    _is_stop_hit,
+    _OpenTrades,
+    _proportional_size,
+    _reprocess_brackets,
+)
+from t_nachine.backtester.core.lib import BracketStrategy
+from t_nachine.backtester.core.stats import Stats
+from t_nachine.backtester.core.validate_data import validate_data
+
+# length of the first window searched for a price hit, grown 4 times each step
+SEARCH_WINDOW = 16
+
+
+def _first_hit(values: np.ndarray, price: float, above: bool, start: int, stop: int):
+    """
+    Returns:
+        Optional[int]: first bar in [start, stop] whose value is strictly
+                       above (or below) <price>, None if there is none
+    """
+    window = SEARCH_WINDOW
+    while start <= stop:
+        end = min(start + window, stop + 1)
+        chunk = values[start:end]
+        hits = np.flatnonzero(chunk > price if above else chunk < price)
+        if hits.size:
+            return start + int(hits[0])
+        start = end
+        window *= 4
+    return None
+
+
+def _level(values: np.ndarray, i: int) -> Optional[float]:
+    value = values[i]
+    # NaN means not set
+    return None if value != value else value
+
+
+class _Order:
+    __slots__ = ("seq", "size", "limit", "stop", "sl", "tp", "trade", "expiry", "bar")
+
+    def __init__(self, seq, size, limit, stop, sl, tp, trade, expiry):
+        self.seq = seq
+        self.size = size
+        self.limit = limit
+        self.stop = stop
+        self.sl = sl
+        self.tp = tp
+        self.trade: Optional[_Trade] = trade
+        # last bar the order is alive at
+        self.expiry = expiry
+        # bar the order is scheduled to be processed at
+        self.bar: Optional[int] = None
+
+    @property
+    def is_long(self):
+        return self.size > 0
+
+
+class _Trade:
+    __slots__ = (
+        "size",
+        "entry_price",
+        "entry_bar",
+        "exit_price",
+        "exit_bar",
+        "sl_order",
+        "tp_order",
+        "sl",
+        "first_seen",
+        "last_seen",
+    )
+
+    def __init__(self, size, entry_price, entry_bar, sl, first_seen):
+        self.size = size
+        self.entry_price = entry_price
+        self.entry_bar = entry_bar
+        self.exit_price = None
+        self.exit_bar = None
+        self.sl_order: Optional[_Order] = None
+        self.tp_order: Optional[_Order] = None
+        self.sl = sl
+        # bars the trade was open at when `Strategy.next` was called
+        self.first_seen = first_seen
+        self.last_seen = None
+
+    @property
+    def pl(self):
+        return self.size * (self.exit_price - self.entry_price)
+
+
+class _SignalBroker(_OpenTrades):
+    """
+    `core.backtesting._Broker` rules applied only on the bars something
+    can happen at. Orders are kept in a heap by the bar they are
+    next triggered at, then by their place in the order queue; fills,
+    sizing, netting and accounting are those of `_Broker`, through the
+    same helpers.
+    """
+
+    def __init__(
+        self,
+        *,
+        index: pd.Index,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        cash,
+        commission,
+        margin,
+        trade_on_close,
+        hedging,
+        exclusive_orders,
+    ):
+        super().__init__()
+        self._index = index
+        self._open = open
+        self._high = high
+        self._low = low
+        self._close = close
+        self._n = len(close)
+
+        self._cash = cash
+        self._commission = commission
+        self._leverage = 1 / margin
+        self._trade_on_close = trade_on_close
+        self._hedging = hedging
+        self._exclusive_orders = exclusive_orders
+
+        self._front_seq = 0
+        self._back_seq = 0
+        self._orders = set()
+        self._heap = []
+        # tie breaker of the heap entries of a rescheduled order
+        self._pushes = itertools.count()
+        self.trades: List[_Trade]
+        self.closed_trades: List[_Trade] = []
+        self._final = False
+
+    # Accounting, as `_Broker`
+
+    def open_pl(self, close):
+        """profit or loss of the open trades at <close>, a price or an array of prices"""
+        return self._pl_at(close)
+
+    def equity(self, i: int) -> float:
+        return self._cash + self.open_pl(self._close[i])
+
+    def margin_available(self, i: int) -> float:
+        return max(0, self.equity(i) - self._margin_at(self._close[i]))
+
+    # Order queue
+
+    def _add_order(self, order: _Order, first_bar: int):
+        self._orders.add(order)
+        self._schedule(order, first_bar)
+
+    def _remove_order(self, order: _Order):
+        self._orders.discard(order)
+        order.bar = None
+
+    def _schedule(self, order: _Order, first_bar: int):
+        """schedules <order> at the first bar from <first_bar> its price is hit at"""
+        last_bar = min(order.expiry, self._n - 1)
+        if first_bar > last_bar:
+            order.bar = None
+        elif order.stop:
+            order.bar = _first_hit(
+                self._high if order.is_long else self._low,
+                order.stop,
+                order.is_long,
+                first_bar,
+                last_bar,
+            )
+        elif order.limit:
+            order.bar = _first_hit(
+                self._low if order.is_long else self._high,
+                order.limit,
+                not order.is_long,
+                first_bar,
+                last_bar,
+            )
+        else:
+            order.bar = first_bar
+        if order.bar is not None:
+            heapq.heappush(
+                self._heap, (order.bar, order.seq, next(self._pushes), order)
+            )
+
+    def _is_triggered(self, order: _Order, i: int) -> bool:
+        if order.expiry < i:
+            return False
+        if order.stop:
+            return (
+                self._high[i] > order.stop
+                if order.is_long
+                else self._low[i] < order.stop
+            )
+        if order.limit:
+            return (
+                self._low[i] < order.limit
+                if order.is_long
+                else self._high[i] > order.limit
+            )
+        return True
+
+    def next_bar(self) -> Optional[int]:
+        heap = self._heap
+        while heap:
+            i, _, _, order = heap[0]
+            if order.bar == i and order in self._orders:
+                return i
+            heapq.heappop(heap)
+        return None
+
+    def _pop_triggered(self, i: int) -> List[_Order]:
+        triggered = []
+        heap = self._heap
+        while heap and heap[0][0] == i:
+            _, _, _, order = heapq.heappop(heap)
+            if order.bar == i and order in self._orders:
+                triggered.append(order)
+        return triggered
+
+    def new_order(self, i, size, limit=None, stop=None, sl=None, tp=None, wait=None):
+        """places an entry order at bar <i>, as `_Broker.new_order`"""
+        size = float(size)
+        stop = stop and float(stop)
+        limit = limit and float(limit)
+        sl = sl and float(sl)
+        tp = tp and float(tp)
+
+        adjusted_price = _adjusted_price(self._close[i], size, self._commission)
+        _check_bracket(size, limit, stop, sl, tp, adjusted_price)
+
+        if self._exclusive_orders:
+            for order in sorted(self._orders, key=lambda o: o.seq):
+                if order.trade is None:
+                    self._remove_order(order)
+            for trade in self.trades:
+                self._close_order(trade, i)
+
+        self._back_seq += 1
+        expiry = np.inf if wait is None else i + wait
+        order = _Order(self._back_seq, size, limit, stop, sl, tp, None, expiry)
+        self._add_order(order, i + 1)
+
+    def _contingent_order(self, trade, i, size, limit=None, stop=None) -> _Order:
+        self._front_seq -= 1
+        order = _Order(self._front_seq, size, limit, stop, None, None, trade, np.inf)
+        self._add_order(order, i)
+        return order
+
+    def _close_order(self, trade: _Trade, i: int):
+        """`Trade.close()`"""
+        size = copysign(max(1, round(abs(trade.size))), -trade.size)
+        self._contingent_order(trade, i + 1, size)
+
+    # Processing
+
+    def process(self, i: int):
+        """`_Broker._process_orders` on bar <i>"""
+        triggered = self._pop_triggered(i)
+        while triggered and self._process_orders(i, triggered):
+            # reprocess the SL/TP orders of trades opened by market orders
+            triggered = self._rescan(i)
+
+    def close_all(self, i: int):
+        """closes the open trades on the last bar, as at the end of `Backtest.run`"""
+        self._final = True
+        for trade in self.trades:
+            self._close_order(trade, i - 1)
+        triggered = self._rescan(i)
+        while triggered and self._process_orders(i, triggered):
+            triggered = self._rescan(i)
+
+    def out_of_money(self, i: int):
+        """as `_Broker.next` when equity is negative"""
+        for trade in self.trades:
+            self._close_trade(trade, self._close[i], i, i)
+        self._cash = 0
+
+    def _rescan(self, i: int) -> List[_Order]:
+        alive = self._orders
+        if self._final:
+            # entry orders that expired at the last bar were canceled
+            alive = [o for o in alive if o.trade is not None or o.expiry > i]
+        return sorted(
+            (o for o in alive if self._is_triggered(o, i)), key=lambda o: o.seq
+        )
+
+    def _process_orders(self, i: int, triggered: List[_Order]) -> bool:
+        open, high, low = self._open[i], self._high[i], self._low[i]
+        prev_close = self._close[i - 1]
+        reprocess_orders = False
+
+        for order in triggered:
+            if order not in self._orders:
+                continue
+
+            stop_price = order.stop
+            if stop_price:
+                if not _is_stop_hit(order.is_long, stop_price, high, low):
+                    continue
+                order.stop = None
+
+            price = _fill_price(
+                order.is_long,
+                order.limit,
+                stop_price,
+                open,
+                high,
+                low,
+                prev_close if self._trade_on_close else open,
+            )
+            if price is None:
+                self._schedule(order, i + 1)
+                continue
+
+            is_market_order = not order.limit and not stop_price
+            time_index = (i - 1) if is_market_order and self._trade_on_close else i
+
+            if order.trade:
+                trade = order.trade
+                size = copysign(min(abs(trade.size), abs(order.size)), order.size)
+                if trade in self.trades:
+                    self._reduce_trade(trade, price, size, time_index, i)
+                if order is not trade.sl_order and order is not trade.tp_order:
+                    self._remove_order(order)
+                continue
+
+            adjusted_price = _adjusted_price(price, order.size, self._commission)
+
+            size = order.size
+            if -1 < size < 1:
+                size = _proportional_size(
+                    size, self.margin_available(i), self._leverage, adjusted_price
+                )
+                if not size:
+                    self._remove_order(order)
+                    continue
+            assert size == round(size)
+            need_size = int(size)
+
+            if not self._hedging:
+                need_size = self._net(
+                    need_size,
+                    partial(self._close_trade, price=price, time_index=time_index, i=i),
+                    partial(
+                        self._reduce_trade, price=price, time_index=time_index, i=i
+                    ),
+                )
+
+            if (
+                abs(need_size) * adjusted_price
+                > self.margin_available(i) * self._leverage
+            ):
+                self._remove_order(order)
+                continue
+
+            if need_size:
+                self._open_trade(adjusted_price, need_size, order, time_index, i)
+                reprocess_orders |= _reprocess_brackets(
+                    is_market_order, order.sl, order.tp, high, low, self._index[i]
+                )
+
+            self._remove_order(order)
+
+        return reprocess_orders
+
+    def _open_trade(self, price, size, order: _Order, time_index: int, i: int):
+        trade = _Trade(size, price, time_index, order.sl, i)
+        self._add_open_trade(trade)
+        # TP first then SL in front of it, so the SL is processed first on a tie
+        if order.tp:
+            trade.tp_order = self._contingent_order(trade, i + 1, -size, limit=order.tp)
+        if order.sl:
+            trade.sl_order = self._contingent_order(trade, i + 1, -size, stop=order.sl)
+
+    def _reduce_trade(self, trade: _Trade, price, size, time_index: int, i: int):
+        size_left = trade.size + size
+        if not size_left:
+            close_trade = trade
+        else:
+            self._reduce_open_trade(trade, size)
+            trade.size = size_left
+            if trade.sl_order:
+                trade.sl_order.size = -trade.size
+            if trade.tp_order:
+                trade.tp_order.size = -trade.size
+
+            close_trade = copy(trade)
+            close_trade.size = -size
+            close_trade.sl_order = close_trade.tp_order = None
+            self._add_open_trade(close_trade)
+
+        self._close_trade(close_trade, price, time_index, i)
+
+    def _close_trade(self, trade: _Trade, price, time_index: int, i: int):
+        self._remove_open_trade(trade)
+        if trade.sl_order:
+            self._remove_order(trade.sl_order)
+        if trade.tp_order:
+            self._remove_order(trade.tp_order)
+
+        trade.exit_price = price
+        trade.exit_bar = time_index
+        # `Strategy.next` saw the trade open up to the previous bar,
+        # or up to this one when it's closed at the end of the backtest
+        trade.last_seen = i if self._final else i - 1
+        self.closed_trades.append(trade)
+        self._cash += trade.pl
+
+
+class SignalBacktest:
+    """
+    Backtests a `core.lib.BracketStrategy` from its order arrays.
+
+    Takes the same arguments as `core.backtest.Backtest` and returns the
+    same stats, trades being filled, stopped and expired by the same
+    broker rules; only `core.core.Strategy.next` is never called.
+    """
+
+    def __init__(
+        self,
+        *,
+        cash: float = 10_000,
+        commission: float = 0.0,
+        margin: float = 1.0,
+        trade_on_close=False,
+        hedging=False,
+        exclusive_orders=False,
+    ):
+        self._cash = cash
+        self._broker_kwargs = dict(
+            cash=cash,
+            commission=commission,
+            margin=margin,
+            trade_on_close=trade_on_close,
+            hedging=hedging,
+            exclusive_orders=exclusive_orders,
+        )
+        self._data = None
+        self._results = None
+        self._stats = Stats()
+
+    def run(
+        self, data: pd.DataFrame, strategy: Type[BracketStrategy], **kwargs
+    ) -> pd.Series:
+        if not issubclass(strategy, BracketStrategy):
+            raise TypeError("SignalBacktest only runs BracketStrategy strategies")
+
+        data = validate_data(data, self._cash)
+        self._data = data
+
+        strategy_data = _Data(data.copy(deep=False))
+        strategy: BracketStrategy = strategy(
+            _Broker(data=strategy_data, index=data.index, **self._broker_kwargs),
+            strategy_data,
+            kwargs,
+        )
+        strategy.init()
+        orders = strategy._bracket_orders
+
+        # Same warm up as `Backtest.run`
+        indicators = [
+            value
+            for value in strategy.__dict__.values()
+            if isinstance(value, _Indicator)
+        ]
+        start = 1 + max(
+            (
+                np.isnan(indicator.astype(float)).argmin(axis=-1).max()
+                for indicator in indicators
+            ),
+            default=0,
+        )
+
+        broker = _SignalBroker(
+            index=data.index,
+            open=data.Open.to_numpy(dtype=float),
+            high=data.High.to_numpy(dtype=float),
+            low=data.Low.to_numpy(dtype=float),
+            close=data.Close.to_numpy(dtype=float),
+            **self._broker_kwargs,
+        )
+        n = len(data)
+        signals = np.flatnonzero(orders.entry[start:]) + start
+        with np.errstate(invalid="ignore"):
+            out_of_money = self._simulate(broker, orders, signals, start, n)
+            if not out_of_money and start < n:
+                broker.close_all(n - 1)
+
+        self._results = self._stats.compute_stats(
+            data=data,
+            equity=broker.equity(n - 1),
+            trades=self._trades_frame(data, broker.closed_trades),
+            strategy=strategy,
+            cash=broker._cash,
+        )
+        return self._results
+
+    @staticmethod
+    def _simulate(broker: _SignalBroker, orders, signals, start: int, n: int) -> bool:
+        """
+        Returns:
+            bool: whether the simulation stopped because equity went negative
+        """
+        close = broker._close
+        signals = signals.tolist()
+        s = 0
+        last = start - 1
+        while True:
+            i = broker.next_bar()
+            signal = signals[s] if s < len(signals) else None
+            if signal is not None and (i is None or signal < i):
+                i = signal
+            if i is None:
+                i = n - 1
+                if last >= i:
+                    return False
+
+            # Equity doesn't change between events but with the close
+            if last + 1 < i and (broker.trades or broker._cash <= 0):
+                equity = broker._cash + broker.open_pl(close[last + 1 : i])
+                (broke,) = np.nonzero(equity <= 0)
+                if broke.size:
+                    broker.out_of_money(last + 1 + int(broke[0]))
+                    return True
+
+            if broker.next_bar() == i:
+                broker.process(i)
+            if broker.equity(i) <= 0:
+                broker.out_of_money(i)
+                return True
+            last = i
+
+            if i == signal:
+                s += 1
+                stop, lim, stop_loss, take_profit = (
+                    _level(values, i)
+                    for values in (orders.stop, orders.limit, orders.sl, orders.tp)
+                )
+                if orders.risk is not None:
+                    price = stop or lim or broker._close[i]
+                    units = np.ceil(
+                        orders.risk * broker.equity(i) / abs(price - stop_loss)
+                    )
+                else:
+                    units = orders.size[i]
+                assert (
+                    0 < units < 1 or round(units) == units
+                ), "size must be a positive fraction of equity, or a positive whole number of units"
+                broker.new_order(
+                    i,
+                    units if orders.entry[i] > 0 else -units,
+                    lim,
+                    stop,
+                    stop_loss,
+                    take_profit,
+                    orders.wait,
+                )
+            if i == n - 1:
+                return False
+
+    @staticmethod
+    def _trades_frame(data: pd.DataFrame, trades: List[_Trade]) -> pd.DataFrame:
+        entry_price = np.array([t.entry_price for t in trades], dtype=float)
+        first_seen = np.array([t.first_seen for t in trades], dtype=int)
+        last_seen = np.array([t.last_seen for t in trades], dtype=int)
+        entry_sl = np.array([t.sl or np.nan for t in trades], dtype=float)
+        max_pnl, max_negative_pnl = Stats.trade_excursions(
+            data, entry_price, first_seen, last_seen
+        )
+
+        trades_dict = {
+            "Size": [t.size for t in trades],
+            "EntryBar": [t.entry_bar for t in trades],
+            "ExitBar": [t.exit_bar for t in trades],
+            "OneR": np.where(last_seen >= first_seen, entry_price - entry_sl, np.nan),
+            "SlPrice": [t.sl_order.stop if t.sl_order else None for t in trades],
+            "TpPrice": [t.tp_order.limit if t.tp_order else None for t in trades],
+            "EntryPrice": [t.entry_price for t in trades],
+            "ExitPrice": [t.exit_price for t in trades],
+            "MaxPnL": max_pnl,
+            "MaxNegativePnl": max_negative_pnl,
+            "PnL": [t.pl for t in trades],
+            "ReturnPct": [
+                copysign(1, t.size) * (t.exit_price / t.entry_price - 1) for t in trades
+            ],
+            "EntryTime": [data.index[t.entry_bar] for t in trades],
+            "ExitTime": [data.index[t.exit_bar] for t in trades],
+        }
+        trades_dict.update(Stats.entry_features(data, first_seen, last_seen))
+        return pd.DataFrame(trades_dict)
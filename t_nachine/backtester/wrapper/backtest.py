@@ -1,23 +1,102 @@
 import os
 import warnings
-from typing import Type
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
+from t_nachine.backtester.core._util import _map_chunks, _n_workers
 from t_nachine.backtester.core.backtest import Backtest as BacktestCore
+from t_nachine.backtester.core.indicator_cache import IndicatorCache
+from t_nachine.backtester.core.optimize import (
+    HalvingReport,
+    halving_rungs,
+    heatmap,
+    parameter_combinations,
+    promoted,
+    propose,
+    rank,
+    score,
+    score_name,
+)
+from t_nachine.backtester.core.portfolio import Portfolio, Rank
+from t_nachine.backtester.core.stats import Stats
 from t_nachine.backtester.core.strategy import Strategy
+from t_nachine.backtester.wrapper.cache import StockCache
+from t_nachine.backtester.wrapper.journal import Journal
+from t_nachine.backtester.wrapper.sinks import MemorySink, ResultSink
 from t_nachine.backtester.wrapper.utils import (
     post_process_stats,
     pre_process_path,
-    pre_process_stock,
+    read_stock,
     set_log_folder,
 )
-from t_nachine.constants import TRADES
+from t_nachine.constants import PNL, TRADES
+from t_nachine.indicators.enrichment import FeatureStore
 
 warnings.filterwarnings("ignore")
 LOG_FOLDER = "logs"
 
 
+def _run_stock(
+    bt: BacktestCore,
+    strategy: Type[Strategy],
+    stock_path: str,
+    symbol: str,
+    cache: Optional[StockCache] = None,
+    feature_store: Optional[FeatureStore] = None,
+    combinations: Optional[List[dict]] = None,
+) -> Union[Optional[pd.DataFrame], List[Optional[pd.DataFrame]]]:
+    """
+    backtests a single stock, returns None if the stock is too short
+    to be backtested so that one symbol never stops the whole run.
+    With <combinations> of parameters, the stock is read once and backtested
+    with each of them, returning their results in order.
+    """
+    stock = read_stock(stock_path, cache)
+    if feature_store is not None:
+        stock = feature_store.join(symbol, stock)
+    if combinations is None:
+        return _backtest_stock(bt, strategy, stock, symbol)
+    return [
+        _backtest_stock(bt, strategy, stock, symbol, params) for params in combinations
+    ]
+
+
+def _backtest_stock(
+    bt: BacktestCore,
+    strategy: Type[Strategy],
+    stock: pd.DataFrame,
+    symbol: str,
+    params: Optional[dict] = None,
+) -> Optional[pd.DataFrame]:
+    try:
+        stats = bt.run(data=stock, strategy=strategy, **(params or {}))
+    except IndexError:
+        return None
+    return post_process_stats(stats[TRADES], symbol)
+
+
+def _run_stocks(
+    bt_kwargs: dict,
+    strategy: Type[Strategy],
+    jobs: List[Tuple[str, str]],
+    cache: Optional[StockCache] = None,
+    feature_store: Optional[FeatureStore] = None,
+    combinations: Optional[List[dict]] = None,
+) -> list:
+    """
+    worker entry point: backtests a chunk of stocks with a fresh core backtest
+    """
+    bt = BacktestCore(**bt_kwargs)
+    return [
+        _run_stock(bt, strategy, stock_path, symbol, cache, feature_store, combinations)
+        for stock_path, symbol in jobs
+    ]
+
+
 class Backtest:
     def __init__(
         self,
@@ -25,12 +104,36 @@ class Backtest:
         cash: int = 20_000,
         commission: int = 0.0,
         exclusive_orders: bool = False,
+        cache_folder: Optional[str] = None,
+        mmap: bool = False,
+        indicator_cache: Optional[IndicatorCache] = None,
+        feature_store: Optional[FeatureStore] = None,
     ):
-
-        self._bt = BacktestCore(
-            cash=cash, commission=commission, exclusive_orders=exclusive_orders
+        """
+        Args:
+            cache_folder: if given, the parsed stocks are cached in this folder
+                          and loaded from it on the next runs
+            mmap: memory-map the cached columns instead of loading them,
+                  so that workers share them (requires a cache_folder)
+            indicator_cache: if given, the strategies' indicators are looked up
+                             in it (workers get their own memory layer and share
+                             its folder, if any)
+            feature_store: if given, the trade features stored there
+                           (see `indicators.enrichment`) are added to the
+                           stocks
+        """
+        self._bt_kwargs = dict(
+            cash=cash,
+            commission=commission,
+            exclusive_orders=exclusive_orders,
+            indicator_cache=indicator_cache,
         )
+        self._bt = BacktestCore(**self._bt_kwargs)
         self._log_folder = log_folder
+        if mmap and not cache_folder:
+            raise ValueError("mmap requires a cache_folder to map the stocks from")
+        self._cache = StockCache(cache_folder, mmap=mmap) if cache_folder else None
+        self._feature_store = feature_store
 
     @property
     def bt(self):
@@ -40,41 +143,388 @@ class Backtest:
     def log_folder(self):
         return self._log_folder
 
-    def _run(
-        self, strategy: Type[Strategy], stock_path: str, symbol: str
-    ) -> pd.DataFrame:
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def indicator_cache(self) -> Optional[IndicatorCache]:
+        return self._bt_kwargs["indicator_cache"]
+
+    def _run_serial(
+        self,
+        strategy: Type[Strategy],
+        jobs: List[Tuple[str, str]],
+        combinations: Optional[List[dict]] = None,
+    ) -> Iterator:
+        for stock_path, symbol in tqdm(jobs):
+            yield _run_stock(
+                self.bt,
+                strategy,
+                stock_path,
+                symbol,
+                self._cache,
+                self._feature_store,
+                combinations,
+            )
 
-        stats = self.bt.run(
-            data=pre_process_stock(pd.read_csv(stock_path)), strategy=strategy
+    def _run_parallel(
+        self,
+        strategy: Type[Strategy],
+        jobs: List[Tuple[str, str]],
+        workers: int,
+        combinations: Optional[List[dict]] = None,
+    ) -> Iterator:
+        """
+        spreads the stocks over a process pool, chunks are submitted and collected
+        in the order of `jobs` so the results are the same as the serial run
+        """
+        run_stocks = partial(
+            _run_stocks,
+            self._bt_kwargs,
+            strategy,
+            cache=self._cache,
+            feature_store=self._feature_store,
+            combinations=combinations,
         )
-        return post_process_stats(stats[TRADES], symbol)
+        with tqdm(total=len(jobs)) as progress_bar:
+            for chunk_results in _map_chunks(run_stocks, jobs, workers):
+                progress_bar.update(len(chunk_results))
+                yield from chunk_results
+
+    @staticmethod
+    def _jobs(stock_path: str) -> List[Tuple[str, str]]:
+        """path and symbol of each stock"""
+        prefix_path, stock_names = pre_process_path(stock_path)
+        return [
+            (os.path.join(prefix_path, stock_name), stock_name.split(".")[0])
+            for stock_name in stock_names
+        ]
+
+    def _run_jobs(
+        self,
+        strategy: Type[Strategy],
+        jobs: List[Tuple[str, str]],
+        workers: int,
+        combinations: Optional[List[dict]] = None,
+    ) -> Iterator:
+        workers = _n_workers(workers)
+        if workers > 1 and len(jobs) > 1:
+            return self._run_parallel(strategy, jobs, workers, combinations)
+        return self._run_serial(strategy, jobs, combinations)
 
-    def run(self, strategy: Type[Strategy], stock_path: str) -> pd.DataFrame:
+    def run(
+        self,
+        strategy: Type[Strategy],
+        stock_path: str,
+        workers: int = 1,
+        sink: Optional[ResultSink] = None,
+    ) -> Union[pd.DataFrame, str]:
         """
         Args:
             strategy: strategy to backtest
             stock_path: path to a stock or a folder of stocks
+            workers: number of processes used to backtest the stocks,
+                     1 runs serially and -1 uses all the cores
+            sink: where the trades of each stock are collected,
+                  defaults to an in-memory sink
         Returns:
-            [pd.DataFrame]: the results of the backtest for each stock
+            [pd.DataFrame]: the results of the backtest for each stock,
+                            or the path of the file written by a file sink
+                            if there were any
         """
-        prefix_path, stock_names = pre_process_path(stock_path)
-        backtest_results = pd.DataFrame()
-
-        for stock_name in tqdm(stock_names):
-            try:
-                backtest_results = backtest_results.append(
-                    self._run(
-                        strategy,
-                        os.path.join(prefix_path, stock_name),
-                        stock_name.split(".")[0],
-                    )
-                )
-            except IndexError:
-                pass
-        backtest_results = backtest_results.reset_index(drop=True)
-        backtest_results.drop_duplicates(inplace=True)
+        results = self._run_jobs(strategy, self._jobs(stock_path), workers)
+
+        if sink is None:
+            sink = MemorySink()
+        for result in results:
+            if result is not None:
+                # duplicated trades come from a single stock, every sink
+                # is given the same rows
+                sink.add(result.drop_duplicates())
+
+        backtest_results = sink.finalize()
+        if isinstance(backtest_results, pd.DataFrame):
+            backtest_results = backtest_results.reset_index(drop=True)
         return backtest_results
 
+    def optimize(
+        self,
+        strategy: Type[Strategy],
+        stock_path: str,
+        *,
+        maximize: Union[str, Callable[[pd.DataFrame], float]] = "SQN",
+        method: str = "grid",
+        max_tries: Optional[Union[int, float]] = None,
+        constraint: Optional[Callable[[dict], bool]] = None,
+        return_heatmap: bool = False,
+        random_state=None,
+        workers: int = 1,
+        **kwargs,
+    ) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.Series]]:
+        """
+        `core.backtest.Backtest.optimize` over many stocks: each combination
+        of parameters is scored on the trades of all the stocks pooled
+        together. Every stock is read once, by one worker, which backtests
+        it with all the combinations.
+
+        Args:
+            strategy: strategy whose class variables are optimized
+            stock_path: path to a stock or a folder of stocks
+            maximize: key of the `Stats.trades_stats` statistic to maximize,
+                      or a callable of the pooled trades returning the score
+            method, max_tries, constraint, random_state: see
+                `core.optimize.parameter_combinations`
+            return_heatmap: also return the scores indexed by parameters,
+                            for `lib.plot_heatmaps`
+            workers: number of processes the stocks are spread over,
+                     1 runs serially and -1 uses all the cores
+            **kwargs: values of each parameter
+        Returns:
+            [pd.DataFrame]: the parameters, score and trades statistics of
+                            each combination, best score first
+            [pd.Series]: the heatmap, if <return_heatmap>
+        """
+        combinations = parameter_combinations(
+            strategy,
+            kwargs,
+            method=method,
+            max_tries=max_tries,
+            constraint=constraint,
+            random_state=random_state,
+        )
+        trades = [[] for _ in combinations]
+        jobs = self._jobs(stock_path)
+        for results in self._run_jobs(strategy, jobs, workers, combinations):
+            for combination_trades, result in zip(trades, results):
+                combination_trades.append(result)
+
+        name = score_name(maximize)
+        rows = [
+            self._score_row(params, frames, maximize)
+            for params, frames in zip(combinations, trades)
+        ]
+        ranked = rank(rows, name)
+        if return_heatmap:
+            return ranked, heatmap(ranked, list(kwargs), name)
+        return ranked
+
+    @staticmethod
+    def _score_row(
+        params: dict,
+        frames: List[Optional[pd.DataFrame]],
+        maximize: Union[str, Callable[[pd.DataFrame], float]],
+    ) -> dict:
+        """
+        parameters, score and trades statistics of a combination,
+        from its trades on each stock
+        """
+        frames = [frame for frame in frames if frame is not None]
+        pooled = (
+            pd.concat(frames, ignore_index=True)
+            if frames
+            else pd.DataFrame(columns=[PNL, "ReturnPct"], dtype=float)
+        )
+        stats = Stats.trades_stats(pooled)
+        row = dict(params)
+        row[score_name(maximize)] = score(
+            stats if isinstance(maximize, str) else pooled, maximize
+        )
+        row.update(stats)
+        return row
+
+    def optimize_halving(
+        self,
+        strategy: Type[Strategy],
+        stock_path: str,
+        *,
+        maximize: Union[str, Callable[[pd.DataFrame], float]] = "SQN",
+        method: str = "grid",
+        max_tries: Optional[Union[int, float]] = None,
+        constraint: Optional[Callable[[dict], bool]] = None,
+        random_state=None,
+        eta: int = 3,
+        min_stocks: int = 1,
+        candidates: Optional[int] = None,
+        journal: Optional[Union[str, Journal]] = None,
+        workers: int = 1,
+        **kwargs,
+    ) -> Tuple[pd.DataFrame, HalvingReport]:
+        """
+        Adaptive `optimize`, by successive halving: the combinations are
+        first scored on a few stocks drawn at random, the best 1 / <eta> of
+        them are then scored on <eta> times more stocks (their trades on the
+        first stocks being kept), and so on up to all the stocks.
+
+        Args:
+            strategy, stock_path, maximize, method, max_tries, constraint,
+            random_state, workers, **kwargs: see `optimize`
+            eta: reduction factor of the combinations, and growth factor of
+                 the stocks, from a rung to the next one
+            min_stocks: stocks of the first rung, at least
+            candidates: if given, only this many combinations are evaluated
+                        on the first rung: half of them at random, the others
+                        proposed a few at a time by a model of the scores
+                        so far (see `core.optimize.propose`)
+            journal: journal (or path of the journal file) the backtests are
+                     recorded in, and resumed from
+        Returns:
+            [pd.DataFrame]: the parameters, number of stocks, score and trades
+                            statistics of each evaluated combination, on the
+                            last rung it reached. Best combinations first.
+            [HalvingReport]: the number of backtests run, resumed and saved
+                             against the exhaustive `optimize`
+        """
+        rng = np.random.RandomState(random_state)
+        combinations = parameter_combinations(
+            strategy,
+            kwargs,
+            method=method,
+            max_tries=max_tries,
+            constraint=constraint,
+            random_state=rng,
+        )
+        jobs = self._jobs(stock_path)
+        jobs = [jobs[i] for i in rng.permutation(len(jobs))]
+        if isinstance(journal, str):
+            journal = Journal(journal)
+        report = HalvingReport(exhaustive=len(combinations) * len(jobs))
+        name = score_name(maximize)
+
+        # trades of the evaluated combinations on each of the first stocks
+        trades: Dict[int, List[Optional[pd.DataFrame]]] = {}
+        rows: Dict[int, dict] = {}
+
+        def evaluate(indices: List[int], n_stocks: int) -> List[float]:
+            self._run_candidates(
+                strategy,
+                combinations,
+                indices,
+                jobs[:n_stocks],
+                trades,
+                journal,
+                report,
+                workers,
+            )
+            for i in indices:
+                rows[i] = self._score_row(combinations[i], trades[i], maximize)
+                rows[i]["# Stocks"] = n_stocks
+            return [rows[i][name] for i in indices]
+
+        n_candidates = len(combinations)
+        if candidates is not None:
+            n_candidates = max(1, min(candidates, n_candidates))
+        rungs = halving_rungs(len(jobs), n_candidates, eta, min_stocks)
+
+        if n_candidates == len(combinations):
+            indices = list(range(n_candidates))
+        else:
+            # half of them at random, the others proposed by the model
+            indices = rng.permutation(len(combinations))[: -(-n_candidates // 2)]
+            indices = sorted(indices.tolist())
+        scores = dict(zip(indices, evaluate(indices, rungs[0])))
+        while len(scores) < n_candidates:
+            batch = max(1, len(indices) // 2)
+            proposed = propose(
+                combinations, scores, min(batch, n_candidates - len(scores)), rng
+            )
+            scores.update(zip(proposed, evaluate(proposed, rungs[0])))
+        indices = sorted(scores)
+
+        for n_stocks in rungs[1:]:
+            indices = [indices[k] for k in promoted([scores[i] for i in indices], eta)]
+            scores.update(zip(indices, evaluate(indices, n_stocks)))
+
+        ranked = pd.DataFrame(list(rows.values()))
+        columns = list(kwargs) + ["# Stocks", name]
+        ranked = ranked[columns + [c for c in ranked.columns if c not in columns]]
+        ranked = ranked.sort_values(
+            ["# Stocks", name], ascending=False, kind="mergesort", na_position="last"
+        ).reset_index(drop=True)
+        return ranked, report
+
+    def _run_candidates(
+        self,
+        strategy: Type[Strategy],
+        combinations: List[dict],
+        indices: List[int],
+        jobs: List[Tuple[str, str]],
+        trades: Dict[int, List[Optional[pd.DataFrame]]],
+        journal: Optional[Journal],
+        report: HalvingReport,
+        workers: int,
+    ) -> None:
+        """
+        backtests the combinations at <indices> on the stocks of <jobs> they
+        haven't been yet, adding their trades to <trades>: from the journal
+        if they're recorded there, else through the same run loop as `run`
+        """
+        done = min((len(trades.get(i, [])) for i in indices), default=0)
+        new_jobs = jobs[done:]
+        if not new_jobs:
+            return
+
+        def key(i, symbol):
+            return Journal.key(strategy.__name__, symbol, combinations[i])
+
+        to_run = [
+            i
+            for i in indices
+            if journal is None
+            or any(key(i, symbol) not in journal for _, symbol in new_jobs)
+        ]
+        results = {}
+        if to_run:
+            run = self._run_jobs(
+                strategy, new_jobs, workers, [combinations[i] for i in to_run]
+            )
+            for (_, symbol), stock_results in zip(new_jobs, run):
+                for i, result in zip(to_run, stock_results):
+                    results[i, symbol] = result
+                    if journal is not None:
+                        journal.add(key(i, symbol), result)
+            report.evaluations += len(to_run) * len(new_jobs)
+        report.resumed += (len(indices) - len(to_run)) * len(new_jobs)
+
+        for i in indices:
+            new_trades = [
+                (
+                    results[i, symbol]
+                    if (i, symbol) in results
+                    else journal.get(key(i, symbol))
+                )
+                for _, symbol in new_jobs
+            ]
+            trades[i] = trades.get(i, [])[:done] + new_trades
+
+    def run_portfolio(
+        self,
+        strategy: Type[Strategy],
+        stock_path: str,
+        rank: Optional[Rank] = None,
+        **kwargs,
+    ) -> pd.Series:
+        """
+        backtests the stocks together, as a portfolio sharing the cash
+        (see `core.portfolio.Portfolio.run`)
+
+        Args:
+            strategy: strategy to backtest, run on each stock
+            stock_path: path to a stock or a folder of stocks
+            rank: allocation hook, ordering the stocks whose entries
+                  compete for the cash
+            **kwargs: strategy parameters
+        Returns:
+            [pd.Series]: stats of the portfolio, its trades by symbol
+        """
+        stocks = {}
+        for path, symbol in self._jobs(stock_path):
+            stock = read_stock(path, self._cache)
+            if self._feature_store is not None:
+                stock = self._feature_store.join(symbol, stock)
+            stocks[symbol] = stock
+        return Portfolio(**self._bt_kwargs).run(stocks, strategy, rank=rank, **kwargs)
+
     def log_results(
         self,
         backtest_results: pd.DataFrame,
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.wrapper.utils import pre_process_stock
+
+CACHE_FOLDER = ".stock_cache"
+META_FILE = "meta.json"
+INDEX_FILE = "index.npy"
+
+
+class StockCache:
+    """
+    On-disk cache of pre-processed stocks.
+
+    Each stock is saved as one .npy file per column plus its Date index,
+    under a key built from the path, modification time and size of the csv file,
+    so an edited file is re-parsed and its stale entry is simply not used anymore.
+
+    With <mmap> the columns of a cached stock are memory-mapped read-only instead
+    of being read into memory, processes backtesting the same stock then share
+    the same pages.
+    """
+
+    def __init__(self, cache_folder: str = CACHE_FOLDER, mmap: bool = False):
+        self._cache_folder = os.path.abspath(os.path.expanduser(cache_folder))
+        os.makedirs(self._cache_folder, exist_ok=True)
+        self._mmap_mode = "r" if mmap else None
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def cache_folder(self) -> str:
+        return self._cache_folder
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def key(self, stock_path: str) -> str:
+        """
+        Args:
+            stock_path (str): path of the csv file
+
+        Returns:
+            str: cache key of the current version of the file
+        """
+        stat = os.stat(stock_path)
+        fingerprint = f"{os.path.abspath(stock_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        return hashlib.sha1(fingerprint.encode()).hexdigest()
+
+    def load(self, stock_path: str) -> pd.DataFrame:
+        """
+        loads the pre-processed stock from the cache,
+        parses the csv file and caches it on a miss
+
+        Args:
+            stock_path (str): path of the csv file
+
+        Returns:
+            pd.DataFrame: the stock indexed by date
+        """
+        entry = os.path.join(self._cache_folder, self.key(stock_path))
+        stock = self._read(entry, self._mmap_mode)
+        if stock is not None:
+            self._hits += 1
+            return stock
+
+        self._misses += 1
+        stock = pre_process_stock(pd.read_csv(stock_path))
+        if self._write(entry, stock) and self._mmap_mode:
+            stock = self._read(entry, self._mmap_mode)
+        return stock
+
+    def clear(self) -> None:
+        shutil.rmtree(self._cache_folder, ignore_errors=True)
+        os.makedirs(self._cache_folder, exist_ok=True)
+
+    @staticmethod
+    def _read(entry: str, mmap_mode: Optional[str] = None) -> Optional[pd.DataFrame]:
+        try:
+            with open(os.path.join(entry, META_FILE)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+
+        index = pd.DatetimeIndex(
+            np.load(os.path.join(entry, INDEX_FILE)), name=meta["index"]
+        )
+        columns = {
+            column: np.load(os.path.join(entry, file_name), mmap_mode=mmap_mode)
+            for column, file_name in meta["columns"]
+        }
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def _write(self, entry: str, stock: pd.DataFrame) -> bool:
+        # only plain numeric columns are cached, anything else is parsed again next time
+        if not all(np.issubdtype(dtype, np.number) for dtype in stock.dtypes):
+            return False
+        if not isinstance(stock.index, pd.DatetimeIndex):
+            return False
+
+        # written in a temporary folder first then renamed, so a concurrent worker
+        # never reads a half written entry
+        tmp_entry = tempfile.mkdtemp(dir=self._cache_folder)
+        columns = []
+        for i, (column, values) in enumerate(stock.items()):
+            file_name = f"{i}.npy"
+            np.save(
+                os.path.join(tmp_entry, file_name),
+                np.ascontiguousarray(values.to_numpy()),
+            )
+            columns.append((column, file_name))
+        np.save(os.path.join(tmp_entry, INDEX_FILE), stock.index.values)
+        with open(os.path.join(tmp_entry, META_FILE), "w") as f:
+            json.dump({"index": stock.index.name, "columns": columns}, f)
+
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # already written by another worker
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+        return True
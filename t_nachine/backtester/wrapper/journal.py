@@ -0,0 +1,65 @@
+import os
+import pickle
+from typing import Dict, Optional
+
+import pandas as pd
+
+JOURNAL_FILE = "optimization.journal"
+
+
+class Journal:
+    """
+    Append-only file of the backtests run by an optimization, one pickled
+    record per backtest of a combination of parameters on a stock, so an
+    interrupted optimization is resumed without running them again.
+
+    Records are keyed by the strategy name, the stock symbol and the
+    parameters: a journal should not be shared by different versions of a
+    strategy, or of the stocks. A record cut short by an interruption is
+    ignored.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE):
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._records: Dict[tuple, Optional[pd.DataFrame]] = {}
+        if os.path.exists(self._path):
+            self._load()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._records
+
+    @staticmethod
+    def key(strategy_name: str, symbol: str, params: dict) -> tuple:
+        return strategy_name, symbol, tuple(sorted(params.items()))
+
+    def get(self, key: tuple) -> Optional[pd.DataFrame]:
+        """trades of the backtest, None if the stock couldn't be backtested"""
+        return self._records[key]
+
+    def add(self, key: tuple, trades: Optional[pd.DataFrame]) -> None:
+        """
+        records the trades of a backtest
+
+        Args:
+            key (tuple): `Journal.key` of the backtest
+            trades (Optional[pd.DataFrame]): its trades
+        """
+        self._records[key] = trades
+        with open(self._path, "ab") as f:
+            pickle.dump((key, trades), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _load(self) -> None:
+        with open(self._path, "rb") as f:
+            while True:
+                try:
+                    key, trades = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError, ValueError):
+                    break
+                self._records[key] = trades
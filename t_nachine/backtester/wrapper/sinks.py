@@ -0,0 +1,156 @@
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Protocol, Union
+
+import pandas as pd
+
+CHUNK_SIZE = 100_000
+
+
+class ResultSink(Protocol):
+    def add(self, batch: pd.DataFrame) -> None:
+        ...
+
+    def finalize(self) -> Union[pd.DataFrame, str]:
+        ...
+
+
+class MemorySink:
+    """
+    Keeps the batches in a list and concatenates them once at the end,
+    instead of growing a DataFrame with an append per batch
+    """
+
+    def __init__(self):
+        self._batches: List[pd.DataFrame] = []
+        self._n_rows = 0
+
+    def __len__(self):
+        return self._n_rows
+
+    def add(self, batch: pd.DataFrame) -> None:
+        self._batches.append(batch)
+        self._n_rows += len(batch)
+
+    def finalize(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: all the batches concatenated in the order they were added
+        """
+        if not self._batches:
+            return pd.DataFrame()
+        results = pd.concat(self._batches)
+        self._batches = []
+        self._n_rows = 0
+        return results
+
+
+class _FileSink(ABC):
+    """
+    Buffers batches in memory and flushes them to a file every <chunk_size> rows.
+    The columns are fixed by the first flush, later batches are aligned to them.
+    No file is written when there are no results.
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, override: bool = False):
+        if os.path.exists(path) and not override:
+            raise ValueError(
+                "file already exist set override to true if you want to override!"
+            )
+        if os.path.exists(path):
+            # the results of a previous run mustn't be mistaken for these ones
+            os.remove(path)
+        self._path = path
+        self._chunk_size = chunk_size
+        self._buffer = MemorySink()
+        self._columns: Optional[pd.Index] = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def add(self, batch: pd.DataFrame) -> None:
+        self._buffer.add(batch)
+        if len(self._buffer) >= self._chunk_size:
+            self._flush()
+
+    def finalize(self) -> Union[pd.DataFrame, str]:
+        """
+        Returns:
+            Union[pd.DataFrame, str]: the path of the file the results were
+                                      written to, or an empty DataFrame as
+                                      `MemorySink` returns if there were none
+        """
+        self._flush()
+        self._close()
+        if self._columns is None:
+            return pd.DataFrame()
+        return self._path
+
+    def _flush(self) -> None:
+        chunk = self._buffer.finalize()
+        if chunk.empty:
+            return
+        if self._columns is None:
+            self._columns = chunk.columns
+        self._write(chunk.reindex(columns=self._columns))
+
+    @abstractmethod
+    def _write(self, chunk: pd.DataFrame) -> None:
+        """writes a chunk of results to the file"""
+
+    def _close(self) -> None:
+        pass
+
+
+class CsvSink(_FileSink):
+    """
+    Appends the results to a csv file chunk by chunk
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, override: bool = False):
+        super().__init__(path, chunk_size, override)
+        self._header = True
+
+    def _write(self, chunk: pd.DataFrame) -> None:
+        chunk.to_csv(
+            self._path,
+            mode="w" if self._header else "a",
+            header=self._header,
+            index=False,
+        )
+        self._header = False
+
+
+class ParquetSink(_FileSink):
+    """
+    Writes the results to a parquet file, one row group per chunk (requires pyarrow)
+    """
+
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, override: bool = False):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "ParquetSink requires pyarrow, install it with `pip install pyarrow`"
+            ) from None
+        super().__init__(path, chunk_size, override)
+        self._writer = None
+
+    def _write(self, chunk: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        else:
+            table = pa.Table.from_pandas(
+                chunk, schema=self._writer.schema, preserve_index=False
+            )
+        self._writer.write_table(table)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
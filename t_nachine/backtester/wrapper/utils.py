@@ -28,6 +28,16 @@ def pre_process_stock(stock: pd.DataFrame) -> pd.DataFrame:
     return stock_copy
 
 
+def read_stock(stock_path: str, cache=None) -> pd.DataFrame:
+    """
+    reads a stock csv file and indexes it by date,
+    through the StockCache <cache> when one is given
+    """
+    if cache is not None:
+        return cache.load(stock_path)
+    return pre_process_stock(pd.read_csv(stock_path))
+
+
 def pre_process_path(stock_path: str) -> Tuple[str, List[str]]:
     try:
         prefix_path = stock_path
@@ -1 +1,2 @@
 from .candle import Candle
+from .candle_array import CandleArray
@@ -1,10 +1,23 @@
 class Candle:
-    def __init__(self, open_, high, low, close):
+    __slots__ = ("_open", "_high", "_low", "_close")
+
+    def __init__(self, open_, high, low, close, validate: bool = True):
+        """
+
+        Args:
+            open_: open price
+            high: high price
+            low: low price
+            close: close price
+            validate (bool, optional): check the prices, can be skipped for
+                                       trusted data. Defaults to True.
+        """
         self._open = open_
         self._high = high
         self._low = low
         self._close = close
-        self.check_prices()
+        if validate:
+            self.check_prices()
 
     def check_prices(self):
         if (
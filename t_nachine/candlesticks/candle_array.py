@@ -0,0 +1,178 @@
+from typing import Optional, Sized
+
+import numpy as np
+
+from .candle import Candle
+
+
+class CandleArray:
+    """
+    Candles of a whole series, as one array per price rather than a Candle
+    per bar. The Candle methods are available as vector operations over all
+    the candles, and single candles as views into the arrays.
+    """
+
+    __slots__ = ("_open", "_high", "_low", "_close", "_valid", "_data", "_validate")
+
+    def __init__(
+        self,
+        open_,
+        high,
+        low,
+        close,
+        validate: bool = True,
+        data: Optional[Sized] = None,
+    ):
+        """
+
+        Args:
+            open_: open prices
+            high: high prices
+            low: low prices
+            close: close prices
+            validate (bool, optional): single candles with invalid prices
+                                       raise ValueError, as Candle.
+                                       Defaults to True.
+            data (Sized, optional): data the candles are read from, whose
+                                    length is the current bar for `ago`.
+                                    Defaults to all the candles.
+        """
+        self._open = np.asarray(open_, dtype=float)
+        self._high = np.asarray(high, dtype=float)
+        self._low = np.asarray(low, dtype=float)
+        self._close = np.asarray(close, dtype=float)
+        self._validate = validate
+        self._valid = self.is_valid() if validate else None
+        self._data = data
+
+    @classmethod
+    def from_data(cls, data, validate: bool = True) -> "CandleArray":
+        """
+        candles of the stock data, following its length as the
+        backtest goes
+
+        Args:
+            data: stock data with Open, High, Low and Close columns
+            validate (bool, optional): see `CandleArray`. Defaults to True.
+
+        Returns:
+            CandleArray: the candles
+        """
+        return cls(data.Open, data.High, data.Low, data.Close, validate, data)
+
+    def __len__(self):
+        return len(self._close)
+
+    def __repr__(self):
+        return f"<CandleArray {len(self)} candles>"
+
+    def __getitem__(self, i: int) -> Candle:
+        """
+        candle at index <i>
+
+        Args:
+            i (int): index, negative from the end
+
+        Returns:
+            Candle: read-only view of the candle
+        """
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(f"candle index {i} out of range")
+        i %= n
+        if self._validate and not self._valid[i]:
+            # same error as Candle
+            Candle(self._open[i], self._high[i], self._low[i], self._close[i])
+        return _CandleView(self, i)
+
+    def ago(self, k: int) -> Candle:
+        """
+        candle <k> bars before the current one: the last one of the data
+        (see `from_data`) or of the array
+
+        Args:
+            k (int): number of bars ago, 0 being the current bar
+
+        Returns:
+            Candle: read-only view of the candle
+        """
+        i = (len(self) if self._data is None else len(self._data)) - 1 - k
+        if i < 0:
+            raise IndexError(f"no candle {k} bars ago")
+        return self[i]
+
+    # Prices
+
+    @property
+    def open(self) -> np.ndarray:
+        return self._open
+
+    @property
+    def high(self) -> np.ndarray:
+        return self._high
+
+    @property
+    def low(self) -> np.ndarray:
+        return self._low
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._close
+
+    # Candle methods, on every candle
+
+    def is_valid(self) -> np.ndarray:
+        """same checks as Candle.check_prices"""
+        return ~(
+            (self._open > self._high)
+            | (self._open < self._low)
+            | (self._close > self._high)
+            | (self._close < self._low)
+            | (self._low > self._high)
+        )
+
+    def length(self) -> np.ndarray:
+        """Candle.__len__, high minus low"""
+        return self._high - self._low
+
+    def bull(self) -> np.ndarray:
+        return self._open < self._close
+
+    def bear(self) -> np.ndarray:
+        return self._open > self._close
+
+    def bull_pin(self, ratio=2 / 3) -> np.ndarray:
+        low_to_body = np.minimum(self._close, self._open) - self._low
+        return low_to_body >= ratio * self.length()
+
+    def bear_pin(self, ratio=2 / 3) -> np.ndarray:
+        high_to_body = self._high - np.maximum(self._open, self._close)
+        return high_to_body >= ratio * self.length()
+
+    def above_support(self, support_value) -> np.ndarray:
+        return np.minimum(self._open, self._close) > support_value
+
+
+def _price(name: str) -> property:
+    def get(self):
+        return getattr(self._candles, name)[self._i]
+
+    return property(get)
+
+
+class _CandleView(Candle):
+    """
+    Candle reading its prices from a CandleArray, without copying them.
+    Its prices can't be set.
+    """
+
+    __slots__ = ("_candles", "_i")
+
+    _open = _price("_open")
+    _high = _price("_high")
+    _low = _price("_low")
+    _close = _price("_close")
+
+    def __init__(self, candles: CandleArray, i: int):
+        self._candles = candles
+        self._i = i
@@ -1 +1,18 @@
-from .indicator import ema, macd, rsi, stochastics
+from .indicator import (
+    breakout,
+    donchian,
+    ema,
+    ewm_mean,
+    macd,
+    rsi,
+    stochastics,
+    williams_r,
+)
+from .rolling import rolling_max, rolling_mean, rolling_min, rolling_std
+from .streaming import (
+    StreamingEma,
+    StreamingMacd,
+    StreamingRsi,
+    StreamingStochastics,
+)
+from .enrichment import ENRICHED_FEATURES, FeatureStore, enrich, enrich_stocks
@@ -0,0 +1,349 @@
+import os
+import tempfile
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from tqdm import tqdm
+
+from t_nachine.constants import CLOSE, HIGH, LOW, TRADES_ATTRIBUTES, VOLUME
+
+from .indicator import williams_r
+from .rolling import rolling_mean, rolling_std
+
+# The trade features of TRADES_ATTRIBUTES, as the enrich_stocks notebook
+# computed them with finta: VWAP, Bollinger bands (20, 2 std), Fibonacci
+# pivots of the previous bar, ATR (14), RSI (14), ADX (14) and Williams %R
+# (14), RSI, ADX and WILLIAMS divided by 100 and the price levels by the High.
+# Volume is a column of the stocks already.
+ENRICHED_FEATURES = [f for f in TRADES_ATTRIBUTES if f != VOLUME]
+PRICE_LEVELS = ["VWAP", "BB_LOWER", "BB_MIDDLE", "BB_UPPER", "pivot"] + [
+    f"{level}{i}" for level in "sr" for i in range(1, 5)
+]
+FIBONACCI_RATIOS = [0.382, 0.618, 1, 1.382]
+PERIOD = 14
+BB_PERIOD = 20
+# ATR period of the directional indicators of the ADX
+DMI_ATR_PERIOD = 6 * PERIOD
+# Previous bars the rolling windows of a new bar reach back to
+WARMUP_BARS = DMI_ATR_PERIOD
+PRICES = [HIGH, LOW, CLOSE, VOLUME]
+# Exponential averages carried over from a bar to the next
+AVERAGES = ["rsi_gain", "rsi_loss", "di_plus", "di_minus", "adx"]
+
+FEATURES_FOLDER = ".features"
+
+
+def _ewm(values: np.ndarray, alpha: float, state: np.ndarray) -> np.ndarray:
+    """
+    pandas ewm(alpha=alpha, adjust=True).mean(), continuing from <state>,
+    the weighted sum of the previous values and the sum of their weights,
+    which is updated
+
+    Args:
+        values (np.ndarray): values
+        alpha (float): smoothing factor
+        state (np.ndarray): weighted sum and sum of weights, zeros at first
+
+    Returns:
+        np.ndarray: moving average
+    """
+    if not len(values):
+        return np.empty(0)
+    old_wt_factor = 1.0 - alpha
+    observed = ~np.isnan(values)
+    sums = [
+        lfilter([1.0], [1.0, -old_wt_factor], x, zi=[old_wt_factor * previous])[0]
+        for x, previous in zip((np.where(observed, values, 0.0), observed), state)
+    ]
+    state[:] = sums[0][-1], sums[1][-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sums[0] / sums[1]
+
+
+def _new_state() -> Dict[str, np.ndarray]:
+    state = {average: np.zeros(2) for average in AVERAGES}
+    # cumulated volume times typical price, and volume
+    state["vwap"] = np.zeros(2)
+    state["tail"] = np.empty((len(PRICES), 0))
+    return state
+
+
+def enrich(
+    stock: pd.DataFrame, state: Optional[Dict[str, np.ndarray]] = None
+) -> Tuple[pd.DataFrame, Dict[str, np.ndarray]]:
+    """
+    trade features (ENRICHED_FEATURES) of the bars of <stock>
+
+    Args:
+        stock (pd.DataFrame): stock data
+        state (Dict[str, np.ndarray], optional): state returned with the
+                                                 features of the previous
+                                                 bars, to compute the new
+                                                 bars only. Defaults to none.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, np.ndarray]]: the features, and the
+                                                    state after the last bar
+    """
+    state = _new_state() if state is None else {k: v.copy() for k, v in state.items()}
+    new_prices = np.array([stock[column].to_numpy(float) for column in PRICES])
+    n_tail = state["tail"].shape[-1]
+    prices = np.concatenate([state["tail"], new_prices], axis=1)
+    high, low, close, volume = prices
+    state["tail"] = prices[:, -WARMUP_BARS:]
+
+    def new(values: np.ndarray) -> np.ndarray:
+        return values[n_tail:]
+
+    previous_high, previous_low, previous_close = (
+        np.r_[np.nan, values][:-1] for values in (high, low, close)
+    )
+    features = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        typical_price = new(high + low + close) / 3
+        volume_price = np.cumsum(np.r_[state["vwap"][0], new(volume) * typical_price])
+        cum_volume = np.cumsum(np.r_[state["vwap"][1], new(volume)])
+        state["vwap"][:] = volume_price[-1], cum_volume[-1]
+        features["VWAP"] = volume_price[1:] / cum_volume[1:]
+
+        middle = rolling_mean(close, BB_PERIOD)
+        std = rolling_std(close, BB_PERIOD)
+        features["BB_UPPER"] = new(middle + 2 * std)
+        features["BB_MIDDLE"] = new(middle)
+        features["BB_LOWER"] = new(middle - 2 * std)
+
+        pivot = new(previous_high + previous_low + previous_close) / 3
+        previous_range = new(previous_high - previous_low)
+        features["pivot"] = pivot
+        for i, ratio in enumerate(FIBONACCI_RATIOS, 1):
+            features[f"r{i}"] = pivot + previous_range * ratio
+            features[f"s{i}"] = pivot - previous_range * ratio
+
+        true_range = np.fmax(
+            high - low,
+            np.fmax(np.abs(high - previous_close), np.abs(previous_close - low)),
+        )
+        features["ATR"] = new(rolling_mean(true_range, PERIOD))
+
+        delta = new(close - previous_close)
+        gain = _ewm(np.where(delta < 0, 0.0, delta), 1 / PERIOD, state["rsi_gain"])
+        loss = _ewm(np.where(delta > 0, 0.0, -delta), 1 / PERIOD, state["rsi_loss"])
+        features["RSI"] = (100 - 100 / (1 + gain / loss)) / 100
+
+        up_move = high - previous_high
+        down_move = previous_low - low
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+        dmi_atr = rolling_mean(true_range, DMI_ATR_PERIOD)
+        di_alpha = 2 / (PERIOD + 1)
+        di_plus = 100 * _ewm(new(plus_dm / dmi_atr), di_alpha, state["di_plus"])
+        di_minus = 100 * _ewm(new(minus_dm / dmi_atr), di_alpha, state["di_minus"])
+        dx = np.abs(di_plus - di_minus) / (di_plus + di_minus)
+        features["ADX"] = _ewm(dx, 1 / PERIOD, state["adx"])
+
+        williams = williams_r({HIGH: high, LOW: low, CLOSE: close}, PERIOD)
+        features["WILLIAMS"] = new(williams) / 100
+
+        for level in PRICE_LEVELS:
+            features[level] = features[level] / new(high)
+
+    return pd.DataFrame(features, index=stock.index)[ENRICHED_FEATURES], state
+
+
+class FeatureStore:
+    """
+    On-disk store of the trade features of each stock, kept aside of the
+    stock files as one .npz file per symbol with a column per feature.
+
+    `update` computes the features of the bars appended to a stock since its
+    last update only, from the state saved with its features; a stock whose
+    stored bars were edited is computed again.
+    """
+
+    def __init__(self, folder: str = FEATURES_FOLDER):
+        self._folder = os.path.abspath(os.path.expanduser(folder))
+        os.makedirs(self._folder, exist_ok=True)
+
+    @property
+    def folder(self) -> str:
+        return self._folder
+
+    def symbols(self) -> List[str]:
+        return sorted(
+            name[: -len(".npz")]
+            for name in os.listdir(self._folder)
+            if name.endswith(".npz")
+        )
+
+    def load(self, symbol: str, fill: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Args:
+            symbol (str): symbol of the stock
+            fill (bool, optional): fill the bars still warming up with the
+                                   first bar that has all the features, as
+                                   the enrich_stocks notebook did.
+                                   Defaults to True.
+
+        Returns:
+            Optional[pd.DataFrame]: the features indexed by date,
+                                    None if the stock was never stored
+        """
+        entry = self._read(symbol)
+        if entry is None:
+            return None
+        features = pd.DataFrame(
+            {column: entry[column] for column in ENRICHED_FEATURES},
+            index=pd.DatetimeIndex(entry["index"], name=entry["index_name"].item()),
+        )
+        if fill:
+            complete = features.dropna()
+            if len(complete):
+                features = features.fillna(complete.iloc[0])
+        return features
+
+    def join(self, symbol: str, stock: pd.DataFrame) -> pd.DataFrame:
+        """
+        Args:
+            symbol (str): symbol of the stock
+            stock (pd.DataFrame): stock data
+
+        Returns:
+            pd.DataFrame: the stock with its stored features, if any
+        """
+        features = self.load(symbol)
+        if features is None:
+            return stock
+        stock = stock.copy()
+        for column, values in features.reindex(stock.index).items():
+            stock[column] = values.to_numpy()
+        return stock
+
+    def update(self, symbol: str, stock: pd.DataFrame) -> int:
+        """
+        stores the features of the bars of <stock> not stored yet
+
+        Args:
+            symbol (str): symbol of the stock
+            stock (pd.DataFrame): stock data indexed by date
+
+        Returns:
+            int: number of bars computed
+        """
+        entry = self._read(symbol)
+        if entry is not None and not self._is_prefix(entry, stock):
+            entry = None
+
+        if entry is None:
+            stored, state = 0, None
+            columns = {column: np.empty(0) for column in ENRICHED_FEATURES}
+            index = np.empty(0, dtype="datetime64[ns]")
+        else:
+            stored = len(entry["index"])
+            state = {key: entry[f"state_{key}"] for key in AVERAGES + ["vwap", "tail"]}
+            columns = {column: entry[column] for column in ENRICHED_FEATURES}
+            index = entry["index"]
+
+        new_bars = stock.iloc[stored:]
+        if entry is not None and not len(new_bars):
+            return 0
+        features, state = enrich(new_bars, state)
+
+        arrays = {
+            column: np.concatenate([columns[column], features[column].to_numpy()])
+            for column in ENRICHED_FEATURES
+        }
+        arrays["index"] = np.concatenate([index, stock.index.to_numpy()[stored:]])
+        arrays["index_name"] = np.array(stock.index.name or "")
+        arrays.update({f"state_{key}": value for key, value in state.items()})
+        self._write(symbol, arrays)
+        return len(new_bars)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self._folder, f"{symbol}.npz")
+
+    def _read(self, symbol: str) -> Optional[Dict[str, np.ndarray]]:
+        try:
+            with np.load(self._path(symbol), allow_pickle=False) as entry:
+                return dict(entry)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, symbol: str, arrays: Dict[str, np.ndarray]) -> None:
+        # written in a temporary file first then renamed, so a concurrent
+        # reader never reads a half written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._folder, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self._path(symbol))
+
+    @staticmethod
+    def _is_prefix(entry: Dict[str, np.ndarray], stock: pd.DataFrame) -> bool:
+        """whether the stored bars are still the first bars of <stock>"""
+        stored = len(entry["index"])
+        if stored > len(stock) or not np.array_equal(
+            entry["index"], stock.index.to_numpy()[:stored]
+        ):
+            return False
+        tail = entry["state_tail"]
+        stock_tail = np.array(
+            [stock[column].to_numpy(float)[:stored] for column in PRICES]
+        )[:, stored - tail.shape[-1] :]
+        return np.array_equal(tail, stock_tail, equal_nan=True)
+
+
+def _update_stocks(
+    store: FeatureStore, jobs: List[Tuple[str, str]], cache=None
+) -> List[int]:
+    """worker entry point: updates the features of a chunk of stocks"""
+    from t_nachine.backtester.wrapper.utils import read_stock
+
+    return [
+        store.update(symbol, read_stock(stock_path, cache))
+        for stock_path, symbol in jobs
+    ]
+
+
+def enrich_stocks(
+    stock_path: str,
+    store: FeatureStore,
+    workers: int = 1,
+    cache=None,
+) -> Dict[str, int]:
+    """
+    updates the features of the stocks in <store>
+
+    Args:
+        stock_path (str): path to a stock or a folder of stocks
+        store (FeatureStore): where the features are stored
+        workers (int, optional): number of processes, 1 runs serially and
+                                 -1 uses all the cores. Defaults to 1.
+        cache (StockCache, optional): cache the stocks are read through
+
+    Returns:
+        Dict[str, int]: number of bars computed, per symbol
+    """
+    from t_nachine.backtester.core._util import _map_chunks, _n_workers
+    from t_nachine.backtester.wrapper.utils import pre_process_path
+
+    prefix_path, stock_names = pre_process_path(stock_path)
+    jobs = [
+        (os.path.join(prefix_path, stock_name), stock_name.split(".")[0])
+        for stock_name in stock_names
+    ]
+    workers = _n_workers(workers)
+    if workers <= 1 or len(jobs) <= 1:
+        counts = [
+            count for job in tqdm(jobs) for count in _update_stocks(store, [job], cache)
+        ]
+    else:
+        counts = []
+        with tqdm(total=len(jobs)) as progress_bar:
+            update_stocks = partial(_update_stocks, store, cache=cache)
+            for chunk_counts in _map_chunks(update_stocks, jobs, workers):
+                progress_bar.update(len(chunk_counts))
+                counts.extend(chunk_counts)
+
+    return {symbol: count for (_, symbol), count in zip(jobs, counts)}
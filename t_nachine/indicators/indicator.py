@@ -1,9 +1,138 @@
+from itertools import accumulate
+from typing import List, Sequence, Tuple, Union
+
 import numpy as np
 import pandas as pd
+from scipy.signal import lfilter
+
+from .rolling import rolling_max, rolling_mean, rolling_min
+
+# Fixes of a recursion computed by lfilter before falling back to the plain loop
+MAX_EWM_FIXES = 16
+# Rows from which rsi steps all the rows at once rather than row by row
+RSI_BATCH_ROWS = 16
+
+
+def _ewm_loop(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    pandas ewm(alpha=alpha, adjust=False).mean() of 1-D values,
+    one step at a time
+    """
+    old_wt_factor = 1.0 - alpha
+    output = np.empty(len(values))
+    weighted = values[0]
+    output[0] = weighted
+    old_wt = 1.0
+    for i in range(1, len(values)):
+        cur = values[i]
+        is_observation = cur == cur
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = ((old_wt * weighted) + (alpha * cur)) / (old_wt + alpha)
+                old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        output[i] = weighted
+    return output
+
+
+def _ewm(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    pandas ewm(alpha=alpha, adjust=False).mean() of 1-D values
+
+    Without missing values, each step of pandas is
+    weighted = ((1 - alpha) * weighted + alpha * cur) / ((1 - alpha) + alpha),
+    unless weighted == cur. That is the linear recursion of lfilter when the
+    denominator is 1, and the steps where it's skipped are fixed afterwards.
+    """
+    output = np.full(len(values), np.nan)
+    missing = np.isnan(values)
+    first = missing.argmin() if len(values) else 0
+    if first == len(values) or missing[first]:
+        return output
+    values = values[first:]
+    old_wt_factor = 1.0 - alpha
+    if missing[first:].any() or old_wt_factor + alpha != 1.0:
+        output[first:] = _ewm_loop(values, alpha)
+        return output
+
+    weighted = output[first:]
+    weighted[0] = values[0]
+    start = 1
+    for _ in range(MAX_EWM_FIXES):
+        if start == len(values):
+            break
+        weighted[start:] = lfilter(
+            [alpha],
+            [1.0, -old_wt_factor],
+            values[start:],
+            zi=[old_wt_factor * weighted[start - 1]],
+        )[0]
+        # the first step that pandas computes differently
+        previous, cur = weighted[start - 1 : -1], values[start:]
+        expected = np.where(
+            previous == cur, cur, (old_wt_factor * previous) + (alpha * cur)
+        )
+        wrong = np.flatnonzero(expected != weighted[start:])
+        if not len(wrong):
+            return output
+        start += wrong[0]
+        weighted[start] = expected[wrong[0]]
+        start += 1
+    else:
+        # e.g. flat prices, where the average sticks to the price
+        weighted[start - 1 :] = _ewm_loop(values[start - 1 :], alpha)
+    return output
+
+
+def ewm_mean(values: np.ndarray, span: Union[float, Sequence[float]]) -> np.ndarray:
+    """
+    exponential moving average along the last axis, identical to pandas
+    ewm(span=span, adjust=False).mean()
 
+    Args:
+        values (np.ndarray): values, 1-D or 2-D (one series per row)
+        span (Union[float, Sequence[float]]): span, or spans broadcast
+                                              against the rows, e.g. many
+                                              spans of 1-D values
 
-def ema(stock: pd.DataFrame, n: int) -> pd.Series:
-    return stock["Close"].s.ewm(span=n, adjust=False).mean()
+    Returns:
+        np.ndarray: moving averages, one row per series and span
+    """
+    values = np.asarray(values, dtype=float)
+    span = np.asarray(span, dtype=float)
+    if (span < 1).any():
+        raise ValueError("span must satisfy: span >= 1")
+    alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+    if values.ndim == 1 and alpha.ndim == 0:
+        return _ewm(values, float(alpha))
+
+    shape = np.broadcast_shapes(values.shape[:-1], alpha.shape) + values.shape[-1:]
+    rows = np.broadcast_to(values, shape).reshape(int(np.prod(shape[:-1])), shape[-1])
+    alphas = np.broadcast_to(alpha, shape[:-1]).ravel()
+    output = np.empty(rows.shape)
+    for i, (row, row_alpha) in enumerate(zip(rows, alphas)):
+        output[i] = _ewm(row, float(row_alpha))
+    return output.reshape(shape)
+
+
+def ema(stock: pd.DataFrame, n: Union[int, Sequence[int]]) -> np.ndarray:
+    """
+    exponential moving average of the close prices
+
+    Args:
+        stock (pd.DataFrame): stock data, or close prices as a series or an
+                              array (2-D for many stocks at once)
+        n (Union[int, Sequence[int]]): span, or spans (see `ewm_mean`)
+
+    Returns:
+        np.ndarray: moving average, an array rather than a series even for
+                    stock data
+    """
+    close = stock if isinstance(stock, (np.ndarray, pd.Series)) else stock["Close"]
+    return ewm_mean(close, n)
 
 
 def macd(stock: pd.DataFrame, n_fast=50, n_slow=100):
@@ -12,34 +141,167 @@ def macd(stock: pd.DataFrame, n_fast=50, n_slow=100):
     return fast - slow
 
 
-def stochastics(stock: pd.DataFrame, period: int, k: int):
-    close, low, high = stock.Close, stock.Low, stock.High
-    l_period = low.rolling(window=period).min()
-    h_period = high.rolling(window=period).max()
-    per_k = 100 * (close - l_period) / (h_period - l_period)
-    per_k = per_k.rolling(window=k).mean()
-    return per_k
+def _prices(stock, *columns: str) -> List[np.ndarray]:
+    return [np.asarray(stock[column], dtype=float) for column in columns]
+
+
+def stochastics(stock: pd.DataFrame, period: int, k: int) -> np.ndarray:
+    """
+    stochastic oscillator %K, smoothed over <k> bars
+
+    Args:
+        stock (pd.DataFrame): stock data, or a mapping of High, Low and
+                              Close arrays (2-D for many stocks at once)
+        period (int): period of the highest high and lowest low
+        k (int): smoothing period
+
+    Returns:
+        np.ndarray: smoothed %K
+    """
+    close, low, high = _prices(stock, "Close", "Low", "High")
+    l_period = rolling_min(low, period)
+    h_period = rolling_max(high, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_k = 100 * (close - l_period) / (h_period - l_period)
+    return rolling_mean(per_k, k)
+
 
+def williams_r(stock: pd.DataFrame, period: int = 14) -> np.ndarray:
+    """
+    Williams %R, from -100 at the lowest low to 0 at the highest high
 
-def rsi(stock: pd.DataFrame, n=14) -> pd.Series:
-    prices = stock["Close"]
+    Args:
+        stock (pd.DataFrame): stock data, or a mapping of High, Low and
+                              Close arrays (2-D for many stocks at once)
+        period (int, optional): period. Defaults to 14.
+
+    Returns:
+        np.ndarray: %R
+    """
+    close, low, high = _prices(stock, "Close", "Low", "High")
+    h_period = rolling_max(high, period)
+    l_period = rolling_min(low, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -100 * (h_period - close) / (h_period - l_period)
+
+
+def donchian(
+    stock: pd.DataFrame, period: int = 20
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Donchian channel: highest high, middle and lowest low
+
+    Args:
+        stock (pd.DataFrame): stock data, or a mapping of High and Low
+                              arrays (2-D for many stocks at once)
+        period (int, optional): period. Defaults to 20.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: upper, middle and lower bands
+    """
+    low, high = _prices(stock, "Low", "High")
+    upper = rolling_max(high, period)
+    lower = rolling_min(low, period)
+    return upper, (upper + lower) / 2, lower
+
+
+def breakout(stock: pd.DataFrame, period: int = 20) -> np.ndarray:
+    """
+    close breaking out of the Donchian channel of the previous <period> bars
+
+    Args:
+        stock (pd.DataFrame): stock data, or a mapping of High, Low and
+                              Close arrays (2-D for many stocks at once)
+        period (int, optional): period. Defaults to 20.
+
+    Returns:
+        np.ndarray: 1 above the highest high, -1 below the lowest low, else 0
+    """
+    close, low, high = _prices(stock, "Close", "Low", "High")
+    signal = np.zeros(close.shape, dtype=np.int8)
+    signal[..., 1:][close[..., 1:] > rolling_max(high, period)[..., :-1]] = 1
+    signal[..., 1:][close[..., 1:] < rolling_min(low, period)[..., :-1]] = -1
+    return signal
+
+
+def _rsi_averages(prices: np.ndarray, n: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Wilder's average up and down moves of each row of prices, per bar,
+    the first <n> bars having the average of the seed moves
+
+    Args:
+        prices (np.ndarray): prices, 2-D
+        n (np.ndarray): period of each row
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: average up and down moves
+    """
     deltas = np.diff(prices)
-    seed = deltas[: n + 1]
-    up = seed[seed >= 0].sum() / n
-    down = -seed[seed < 0].sum() / n
-    rs = up / down
-    rsi_values = np.zeros_like(prices)
-    rsi_values[:n] = 100.0 - 100.0 / (1.0 + rs)
-    for i in range(n, len(prices)):
-        delta = deltas[i - 1]  # The diff is 1 shorter
-        if delta > 0:
-            upval = delta
-            downval = 0.0
-        else:
-            upval = 0.0
-            downval = -delta
-        up = (up * (n - 1) + upval) / n
-        down = (down * (n - 1) + downval) / n
-        rs = up / down
-        rsi_values[i] = 100.0 - 100.0 / (1.0 + rs)
-    return pd.Series(rsi_values)
+    # delta > 0 is an up move, otherwise (nan included) a down move
+    is_up = deltas > 0
+    up_moves = np.where(is_up, deltas, 0.0)
+    down_moves = np.where(is_up, 0.0, -deltas)
+
+    ups = np.empty(prices.shape)
+    downs = np.empty(prices.shape)
+    for row, row_n in enumerate(n):
+        seed = deltas[row, : row_n + 1]
+        ups[row, :row_n] = seed[seed >= 0].sum() / row_n
+        downs[row, :row_n] = -seed[seed < 0].sum() / row_n
+
+    length = prices.shape[-1]
+    if len(n) >= RSI_BATCH_ROWS:
+        # one step of all the rows at a time
+        m = n - 1
+        for i in range(n.min(), length):
+            started = n <= i
+            up = (ups[:, i - 1] * m + up_moves[:, i - 1]) / n
+            down = (downs[:, i - 1] * m + down_moves[:, i - 1]) / n
+            ups[:, i] = np.where(started, up, ups[:, i - 1])
+            downs[:, i] = np.where(started, down, downs[:, i - 1])
+        return ups, downs
+
+    # one row at a time, stepping with plain floats
+    for row, row_n in enumerate(n):
+        row_n, m = int(row_n), int(row_n) - 1
+        if row_n >= length:
+            continue
+        for averages, moves in ((ups, up_moves), (downs, down_moves)):
+            averages[row, row_n:] = list(
+                accumulate(
+                    moves[row, row_n - 1 :].tolist(),
+                    lambda average, move: (average * m + move) / row_n,
+                    initial=float(averages[row, row_n - 1]),
+                )
+            )[1:]
+    return ups, downs
+
+
+def rsi(stock: pd.DataFrame, n: Union[int, Sequence[int]] = 14) -> np.ndarray:
+    """
+    relative strength index of the close prices, with Wilder's
+    smoothing seeded by the first moves
+
+    Args:
+        stock (pd.DataFrame): stock data, or close prices as an array
+                              (2-D for many stocks at once)
+        n (Union[int, Sequence[int]], optional): period, or periods
+                                                 broadcast against the rows.
+                                                 Defaults to 14.
+
+    Returns:
+        np.ndarray: rsi, aligned with the prices
+    """
+    prices = stock if isinstance(stock, np.ndarray) else stock["Close"]
+    prices = np.asarray(prices, dtype=float)
+    n = np.asarray(n, dtype=int)
+    if (n < 1).any():
+        raise ValueError("n must satisfy: n >= 1")
+
+    shape = np.broadcast_shapes(prices.shape[:-1], n.shape) + prices.shape[-1:]
+    rows = np.broadcast_to(prices, shape).reshape(int(np.prod(shape[:-1])), shape[-1])
+    ups, downs = _rsi_averages(rows, np.broadcast_to(n, shape[:-1]).ravel())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = ups / downs
+        rsi_values = 100.0 - 100.0 / (1.0 + rs)
+    return rsi_values.reshape(shape)
@@ -0,0 +1,107 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Rolling windows along the last axis, of 1-D values or 2-D batches (one
+# series per row). As pandas rolling(window), the first window - 1 values
+# are nan, as are the windows with a missing value.
+
+
+def _rolling_extremum(values, window: int, ufunc: np.ufunc, identity: float):
+    """
+    van Herk/Gil-Werman: with the values cut into blocks of <window>, each
+    window spans the end of a block and the start of the next one, so it's
+    the extremum of a suffix and a prefix, both accumulated in one pass
+    """
+    values = np.asarray(values, dtype=float)
+    if window < 1:
+        raise ValueError("window must satisfy: window >= 1")
+    length = values.shape[-1]
+    output = np.full(values.shape, np.nan)
+    if window > length:
+        return output
+
+    n_blocks = -(-length // window)
+    blocks = np.full(values.shape[:-1] + (n_blocks * window,), identity)
+    blocks[..., :length] = values
+    blocks = blocks.reshape(values.shape[:-1] + (n_blocks, window))
+
+    prefix = ufunc.accumulate(blocks, axis=-1).reshape(blocks.shape[:-2] + (-1,))
+    suffix = ufunc.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1]
+    suffix = suffix.reshape(prefix.shape)
+    ufunc(
+        suffix[..., : length - window + 1],
+        prefix[..., window - 1 : length],
+        out=output[..., window - 1 :],
+    )
+    return output
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    maximum over the last <window> values, in O(n)
+
+    Args:
+        values (np.ndarray): values, 1-D or 2-D (one series per row)
+        window (int): window
+
+    Returns:
+        np.ndarray: rolling maximum
+    """
+    return _rolling_extremum(values, window, np.maximum, -np.inf)
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    minimum over the last <window> values, in O(n)
+
+    Args:
+        values (np.ndarray): values, 1-D or 2-D (one series per row)
+        window (int): window
+
+    Returns:
+        np.ndarray: rolling minimum
+    """
+    return _rolling_extremum(values, window, np.minimum, np.inf)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    mean of the last <window> values, for short windows
+
+    Args:
+        values (np.ndarray): values, 1-D or 2-D (one series per row)
+        window (int): window
+
+    Returns:
+        np.ndarray: rolling mean
+    """
+    values = np.asarray(values, dtype=float)
+    if window < 1:
+        raise ValueError("window must satisfy: window >= 1")
+    output = np.full(values.shape, np.nan)
+    if window <= values.shape[-1]:
+        windows = sliding_window_view(values, window, axis=-1)
+        np.divide(windows.sum(axis=-1), window, out=output[..., window - 1 :])
+    return output
+
+
+def rolling_std(values: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """
+    standard deviation of the last <window> values, for short windows
+
+    Args:
+        values (np.ndarray): values, 1-D or 2-D (one series per row)
+        window (int): window
+        ddof (int, optional): delta degrees of freedom. Defaults to 1, as pandas.
+
+    Returns:
+        np.ndarray: rolling standard deviation
+    """
+    values = np.asarray(values, dtype=float)
+    if window < 1:
+        raise ValueError("window must satisfy: window >= 1")
+    output = np.full(values.shape, np.nan)
+    if ddof < window <= values.shape[-1]:
+        windows = sliding_window_view(values, window, axis=-1)
+        np.std(windows, axis=-1, ddof=ddof, out=output[..., window - 1 :])
+    return output
@@ -0,0 +1,299 @@
+from typing import List, Optional
+
+import numpy as np
+
+from .indicator import _prices, _rsi_averages, ewm_mean
+from .rolling import rolling_max, rolling_min
+
+# Indicators updated one bar at a time, each giving the same values as its
+# batch counterpart in `indicator`. A bar is a price, or an array of prices
+# of many stocks at once (one per row of the batch function), and the
+# values are returned the same way. The objects can be pickled, to carry
+# their state over to the next bars.
+
+
+def _value(values: np.ndarray):
+    return values[()] if values.ndim == 0 else values
+
+
+class StreamingEma:
+    """`ema`, one close price at a time, in O(1)"""
+
+    def __init__(self, span: float, value=np.nan):
+        """
+
+        Args:
+            span (float): span
+            value (optional): current average, e.g. the last value of `ema`
+                              to warm start from. Defaults to none yet.
+        """
+        if span < 1:
+            raise ValueError("span must satisfy: span >= 1")
+        self._alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+        self._weighted = np.asarray(value, dtype=float)
+        self._old_wt = np.ones(self._weighted.shape)
+
+    @classmethod
+    def from_history(cls, values: np.ndarray, span: float) -> "StreamingEma":
+        """
+        Args:
+            values (np.ndarray): close prices so far, 1-D or 2-D
+            span (float): span
+
+        Returns:
+            StreamingEma: the ema at the last price
+        """
+        values = np.asarray(values, dtype=float)
+        stream = cls(span, ewm_mean(values, span)[..., -1])
+
+        # the weight of the average decays over the last missing prices
+        observed = ~np.isnan(values[..., ::-1])
+        missing = np.where(observed.any(axis=-1), observed.argmax(axis=-1), 0)
+        old_wt_factor = 1.0 - stream._alpha
+        for i in range(int(missing.max(initial=0))):
+            stream._old_wt = np.where(
+                missing > i, stream._old_wt * old_wt_factor, stream._old_wt
+            )
+        return stream
+
+    @property
+    def value(self):
+        return _value(self._weighted)
+
+    def update(self, close):
+        """
+        Args:
+            close: close price of the new bar
+
+        Returns:
+            the ema at the new bar
+        """
+        cur = np.asarray(close, dtype=float)
+        alpha = self._alpha
+        weighted = np.broadcast_to(self._weighted, cur.shape)
+        is_observation = cur == cur
+        started = weighted == weighted
+
+        old_wt = np.where(started, self._old_wt * (1.0 - alpha), self._old_wt)
+        with np.errstate(invalid="ignore"):
+            average = np.where(
+                weighted != cur,
+                ((old_wt * weighted) + (alpha * cur)) / (old_wt + alpha),
+                weighted,
+            )
+        self._weighted = np.where(
+            is_observation, np.where(started, average, cur), weighted
+        )
+        self._old_wt = np.where(started & is_observation, 1.0, old_wt)
+        return self.value
+
+
+class StreamingMacd:
+    """`macd`, one close price at a time, in O(1)"""
+
+    def __init__(self, n_fast=50, n_slow=100, fast=np.nan, slow=np.nan):
+        """
+
+        Args:
+            n_fast (optional): span of the fast ema. Defaults to 50.
+            n_slow (optional): span of the slow ema. Defaults to 100.
+            fast (optional): current fast ema to warm start from
+            slow (optional): current slow ema to warm start from
+        """
+        self._fast = StreamingEma(n_fast, fast)
+        self._slow = StreamingEma(n_slow, slow)
+
+    @classmethod
+    def from_history(cls, values: np.ndarray, n_fast=50, n_slow=100) -> "StreamingMacd":
+        """
+        Args:
+            values (np.ndarray): close prices so far, 1-D or 2-D
+            n_fast (optional): span of the fast ema. Defaults to 50.
+            n_slow (optional): span of the slow ema. Defaults to 100.
+
+        Returns:
+            StreamingMacd: the macd at the last price
+        """
+        stream = cls.__new__(cls)
+        stream._fast = StreamingEma.from_history(values, n_fast)
+        stream._slow = StreamingEma.from_history(values, n_slow)
+        return stream
+
+    @property
+    def value(self):
+        return self._fast.value - self._slow.value
+
+    def update(self, close):
+        """
+        Args:
+            close: close price of the new bar
+
+        Returns:
+            the macd at the new bar
+        """
+        return self._fast.update(close) - self._slow.update(close)
+
+
+class StreamingRsi:
+    """
+    `rsi`, one close price at a time, in O(1).
+
+    `rsi` seeds the averages of its first <n> + 1 bars with the moves of
+    the first <n> + 2 prices, so their values are nan here, the following
+    ones are those of `rsi`.
+    """
+
+    def __init__(self, n: int = 14):
+        """
+
+        Args:
+            n (int, optional): period. Defaults to 14.
+        """
+        if n < 1:
+            raise ValueError("n must satisfy: n >= 1")
+        self._n = int(n)
+        self._seed: Optional[List[np.ndarray]] = []
+        self._previous = self._ups = self._downs = np.asarray(np.nan)
+
+    @classmethod
+    def from_history(cls, values: np.ndarray, n: int = 14) -> "StreamingRsi":
+        """
+        Args:
+            values (np.ndarray): close prices so far, 1-D or 2-D
+            n (int, optional): period. Defaults to 14.
+
+        Returns:
+            StreamingRsi: the rsi at the last price
+        """
+        stream = cls(n)
+        values = np.asarray(values, dtype=float)
+        if values.shape[-1] < stream._n + 2:
+            stream._seed = list(np.moveaxis(values, -1, 0))
+        else:
+            stream._start(values)
+        return stream
+
+    def _start(self, values: np.ndarray):
+        rows = values.reshape(int(np.prod(values.shape[:-1])), values.shape[-1])
+        ups, downs = _rsi_averages(rows, np.full(len(rows), self._n))
+        self._ups = ups[:, -1].reshape(values.shape[:-1])
+        self._downs = downs[:, -1].reshape(values.shape[:-1])
+        self._previous = values[..., -1]
+        self._seed = None
+
+    @property
+    def value(self):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = self._ups / self._downs
+            return _value(100.0 - 100.0 / (1.0 + rs))
+
+    def update(self, close):
+        """
+        Args:
+            close: close price of the new bar
+
+        Returns:
+            the rsi at the new bar
+        """
+        close = np.asarray(close, dtype=float)
+        if self._seed is not None:
+            self._seed.append(close)
+            if len(self._seed) < self._n + 2:
+                return _value(np.full(close.shape, np.nan))
+            self._start(np.stack(self._seed, axis=-1))
+            return self.value
+
+        n, m = self._n, self._n - 1
+        delta = close - self._previous
+        # delta > 0 is an up move, otherwise (nan included) a down move
+        is_up = delta > 0
+        self._ups = (self._ups * m + np.where(is_up, delta, 0.0)) / n
+        self._downs = (self._downs * m + np.where(is_up, 0.0, -delta)) / n
+        self._previous = close
+        return self.value
+
+
+class StreamingStochastics:
+    """`stochastics`, one bar at a time, in O(period + k)"""
+
+    def __init__(self, period: int, k: int):
+        """
+
+        Args:
+            period (int): period of the highest high and lowest low
+            k (int): smoothing period
+        """
+        if period < 1 or k < 1:
+            raise ValueError("period and k must satisfy: period, k >= 1")
+        self._period = period
+        self._k = k
+        # last prices and %K, oldest first
+        self._highs = np.full(period, np.nan)
+        self._lows = np.full(period, np.nan)
+        self._per_k = np.full(k, np.nan)
+
+    @classmethod
+    def from_history(cls, stock, period: int, k: int) -> "StreamingStochastics":
+        """
+        Args:
+            stock: stock data so far, or a mapping of High, Low and Close
+                   arrays (2-D for many stocks at once)
+            period (int): period of the highest high and lowest low
+            k (int): smoothing period
+
+        Returns:
+            StreamingStochastics: the stochastics at the last bar
+        """
+        stream = cls(period, k)
+        close, low, high = _prices(stock, "Close", "Low", "High")
+        tail = slice(-(period + k - 1), None)
+        close, low, high = close[..., tail], low[..., tail], high[..., tail]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_k = stream._per_k_of(
+                close, rolling_min(low, period), rolling_max(high, period)
+            )
+        stream._highs = stream._last(high, period)
+        stream._lows = stream._last(low, period)
+        stream._per_k = stream._last(per_k, k)
+        return stream
+
+    @staticmethod
+    def _last(values: np.ndarray, n: int) -> np.ndarray:
+        """last <n> values, nan first if there are fewer"""
+        last = np.full(values.shape[:-1] + (n,), np.nan)
+        values = values[..., -n:]
+        last[..., n - values.shape[-1] :] = values
+        return last
+
+    @staticmethod
+    def _per_k_of(close, l_period, h_period):
+        return 100 * (close - l_period) / (h_period - l_period)
+
+    @staticmethod
+    def _push(window: np.ndarray, value: np.ndarray) -> np.ndarray:
+        window = np.broadcast_to(window, value.shape + window.shape[-1:])
+        return np.concatenate([window[..., 1:], value[..., None]], axis=-1)
+
+    @property
+    def value(self):
+        return _value(self._per_k.sum(axis=-1) / self._k)
+
+    def update(self, high, low, close):
+        """
+        Args:
+            high: high price of the new bar
+            low: low price of the new bar
+            close: close price of the new bar
+
+        Returns:
+            the stochastics at the new bar
+        """
+        high, low, close = (np.asarray(v, dtype=float) for v in (high, low, close))
+        self._highs = self._push(self._highs, high)
+        self._lows = self._push(self._lows, low)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_k = self._per_k_of(
+                close, self._lows.min(axis=-1), self._highs.max(axis=-1)
+            )
+        self._per_k = self._push(self._per_k, per_k)
+        return self.value
@@ -1,3 +1,4 @@
 from .analysis import Analyzer
 from .datasets_utils import Dataset, DatasetBuilder
 from .ml import ML
+from .walk_forward import WalkForward, Window, rolling_windows
@@ -7,8 +7,15 @@ import pandas as pd
 from tqdm import tqdm
 
 from t_nachine.backtester import Trade
-from t_nachine.backtester.wrapper.utils import pre_process_path, pre_process_stock
+from t_nachine.backtester.wrapper.cache import StockCache
+from t_nachine.backtester.wrapper.sinks import MemorySink, ResultSink
+from t_nachine.backtester.wrapper.utils import (
+    pre_process_path,
+    pre_process_stock,
+    read_stock,
+)
 from t_nachine.constants import *
+from t_nachine.indicators import ema, ewm_mean, rsi, stochastics
 from t_nachine.optimization.datasets_utils.dataset import Dataset
 from t_nachine.optimization.datasets_utils.splitters import random_splitter
 
@@ -22,11 +29,13 @@ class DatasetBuilder:
         stock_path: str,
         indicators: Dict[str, Callable[..., pd.Series]],
         splitter: Callable[..., Dataset] = random_splitter,
+        cache: Optional[StockCache] = None,
     ):
         self._backtest_results = backtest_results.copy()
         self._stock_path = stock_path
         self._indicators = indicators
         self._splitter = splitter
+        self._cache = cache
         self._features = list(self._indicators.keys())
 
     @property
@@ -49,23 +58,21 @@ class DatasetBuilder:
     def features(self):
         return self._features
 
-    def add_indicators(self):
+    @staticmethod
+    def add_indicators(stock: pd.DataFrame) -> pd.DataFrame:
 
-        df_copy = self._backtest_results.copy()
+        df_copy = stock.copy()
 
         # set index from 0 to len(df)
         df_copy.index = range(len(df_copy))
 
         # supports
-        for i in [50, 100]:
-            df_copy["EMA" + str(i)] = df_copy["Close"].ewm(span=i, adjust=False).mean()
+        df_copy["EMA50"], df_copy["EMA100"] = ema(df_copy, [50, 100])
 
-        df_copy["stochs"] = STOCHASTICS(df_copy, 5, 3)
-        df_copy["rsi"] = RSI(df_copy["Close"], n=2)
+        df_copy["stochs"] = stochastics(df_copy, 5, 3)
+        df_copy["rsi"] = rsi(df_copy, n=2)
         df_copy["macd50_100"] = df_copy["EMA50"] - df_copy["EMA100"]
-        df_copy["macd50_100_signal"] = (
-            df_copy["macd50_100"].ewm(span=9, adjust=False).mean()
-        )
+        df_copy["macd50_100_signal"] = ewm_mean(df_copy["macd50_100"], 9)
         df_copy["bullish"] = df_copy["macd50_100"] > df_copy["macd50_100_signal"]
         return df_copy
 
@@ -117,8 +124,8 @@ class DatasetBuilder:
         if features is None:
             features = FEATURES
 
-        x = pd.DataFrame()
-        y = pd.DataFrame()
+        x_sink = MemorySink()
+        y_sink = MemorySink()
 
         trades = self[self._backtest_results[SYMBOL] == symbol]
         for i, t in trades.iterrows():
@@ -126,33 +133,42 @@ class DatasetBuilder:
                 df=df, trade=t, history=history, features=features
             )
 
-            x = x.append(x_trade)
-            y = y.append(y_trade)
+            x_sink.add(x_trade)
+            y_sink.add(y_trade)
 
+        x, y = x_sink.finalize(), y_sink.finalize()
         x["Symbol"] = [symbol for _ in range(len(x))]
         y["Symbol"] = [symbol for _ in range(len(x))]
 
         return x, y
 
-    def build(self, path: str, history: int = 10, features: List[str] = None):
-
-        x_features = pd.DataFrame()
-        y_features = pd.DataFrame()
+    def build(
+        self,
+        path: str,
+        history: int = 10,
+        features: List[str] = None,
+        x_sink: Optional[ResultSink] = None,
+        y_sink: Optional[ResultSink] = None,
+    ):
+        if x_sink is None:
+            x_sink = MemorySink()
+        if y_sink is None:
+            y_sink = MemorySink()
 
         symbols = self._backtest_results[SYMBOL].unique()
         for s in tqdm(symbols):
             # read and add indicators
-            df = pd.read_csv(os.path.join(path, s))
+            df = read_stock(os.path.join(path, s), self._cache).reset_index()
             df = self.add_indicators(df)
 
             x_stock, y_stock = self._build_features_of_trades_of_a_stock(
                 df=df, symbol=s, history=history, features=features
             )
 
-            x_features = x_features.append(x_stock)
-            y_features = y_features.append(y_stock)
+            x_sink.add(x_stock)
+            y_sink.add(y_stock)
 
-        return x_features, y_features
+        return x_sink.finalize(), y_sink.finalize()
 
     def _build_features(self, stock: pd.DataFrame) -> pd.DataFrame:
         transformed_stock = self._transform_stock(stock)
@@ -0,0 +1 @@
+from .walk_forward import WalkForward, Window, rolling_windows
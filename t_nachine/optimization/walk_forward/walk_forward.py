@@ -0,0 +1,248 @@
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, List, Optional, Type, Union
+
+import numpy as np
+import pandas as pd
+
+from t_nachine.backtester.core import backtest as core_backtest
+from t_nachine.backtester.core import optimize
+from t_nachine.backtester.core._util import _map_chunks, _n_workers
+from t_nachine.backtester.core.backtest import Backtest, _init_worker
+from t_nachine.backtester.core.indicator_cache import IndicatorCache
+from t_nachine.backtester.core.stats import Stats
+from t_nachine.backtester.core.strategy import Strategy
+
+
+@dataclass(frozen=True)
+class Window:
+    """a walk-forward step: optimized on the train bars, then traded on the test bars"""
+
+    train_start: int
+    test_start: int
+    test_stop: int
+
+    @property
+    def train(self) -> slice:
+        return slice(self.train_start, self.test_start)
+
+    @property
+    def test(self) -> slice:
+        return slice(self.test_start, self.test_stop)
+
+
+def rolling_windows(
+    n_bars: int, train: int, test: int, anchored: bool = False
+) -> List[Window]:
+    """
+    Args:
+        n_bars (int): number of bars of the data
+        train (int): bars each optimization is run on
+        test (int): bars each optimized strategy is traded on, the test
+                    windows follow each other up to the last bar
+        anchored (bool, optional): train from the first bar on, rather than
+                                   on the last <train> bars. Defaults to False.
+
+    Returns:
+        List[Window]: the windows
+    """
+    if train < 1 or test < 1:
+        raise ValueError("train and test must satisfy: train, test >= 1")
+    return [
+        Window(0 if anchored else test_start - train, test_start, test_start + test)
+        for test_start in range(train, n_bars - test + 1, test)
+    ]
+
+
+def _run_windows(windows: List[Window], space: dict, options: dict) -> List[dict]:
+    """
+    worker entry point: optimizes each window in-sample then trades it
+    out-of-sample
+    """
+    # set by the pool initializer, as for the workers of the core optimization
+    bt, data, strategy = core_backtest._worker
+    return [
+        _walk_window(bt, data, strategy, window, space, **options) for window in windows
+    ]
+
+
+def _walk_window(
+    bt: Backtest,
+    data: pd.DataFrame,
+    strategy: Type[Strategy],
+    window: Window,
+    space: dict,
+    maximize: Union[str, Callable[[pd.Series], float]],
+    **optimize_kwargs,
+) -> dict:
+    ranked = bt.optimize(
+        data, strategy, maximize=maximize, bars=window.train, **optimize_kwargs, **space
+    )
+    name = optimize.score_name(maximize)
+    params = optimize.best_parameters(ranked, list(space))
+
+    stats = bt.run_window(data, strategy, window.test, **params)
+    equity = stats._strategy._broker._equity[window.test]
+    return dict(
+        params=params,
+        in_sample=ranked[name].iloc[0],
+        out_of_sample=optimize.score(stats, maximize),
+        stats=stats.drop("_strategy"),
+        equity=equity,
+    )
+
+
+class WalkForward:
+    def __init__(
+        self,
+        *,
+        cash: float = 10_000,
+        commission: float = 0.0,
+        margin: float = 1.0,
+        trade_on_close=False,
+        hedging=False,
+        exclusive_orders=False,
+        indicator_cache: Optional[IndicatorCache] = None,
+    ):
+        """
+        Walk-forward optimization: the strategy is optimized on each train
+        window, traded with the best parameters on the following test
+        window, and the out-of-sample results of all the windows are
+        stitched together.
+
+        The arguments are those of `core.backtest.Backtest`. Every window
+        is backtested on the whole data with `Backtest.run_window`, so the
+        indicators are computed once on the full history and looked up in
+        <indicator_cache> (an in-memory one by default) by all the windows
+        and parameter combinations.
+        """
+        if indicator_cache is None:
+            indicator_cache = IndicatorCache()
+        self._cash = cash
+        self._bt_kwargs = dict(
+            cash=cash,
+            commission=commission,
+            margin=margin,
+            trade_on_close=trade_on_close,
+            hedging=hedging,
+            exclusive_orders=exclusive_orders,
+            indicator_cache=indicator_cache,
+        )
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        strategy: Type[Strategy],
+        windows: List[Window],
+        *,
+        maximize: Union[str, Callable[[pd.Series], float]] = "SQN",
+        method: str = "grid",
+        max_tries: Optional[Union[int, float]] = None,
+        constraint: Optional[Callable[[dict], bool]] = None,
+        random_state=None,
+        workers: int = 1,
+        **kwargs,
+    ) -> Stats:
+        """
+        Args:
+            data (pd.DataFrame): stock data
+            strategy (Type[Strategy]): strategy whose class variables are optimized
+            windows (List[Window]): train and test windows, whose test bars
+                                    follow each other (see `rolling_windows`)
+            maximize, method, max_tries, constraint, random_state: see
+                `core.backtest.Backtest.optimize`
+            workers (int, optional): number of processes the windows are spread
+                                     over, each one receives the data once.
+                                     -1 uses all the cores. Defaults to 1.
+            **kwargs: values of each parameter
+
+        With <workers>, <maximize> and <constraint> are sent to the workers,
+        they must be functions defined at the top level of a module.
+
+        Returns:
+            Stats: stats of the out-of-sample trades and equity of all the
+                   windows. Each window is traded with the initial cash, the
+                   stitched equity adds up their profits and losses.
+                   `_windows` holds the parameters and in-sample and
+                   out-of-sample scores of each window.
+        """
+        if not windows:
+            raise ValueError("Need some windows to walk forward over")
+        for previous, window in zip(windows, windows[1:]):
+            if window.test_start != previous.test_stop:
+                raise ValueError("The test windows must follow each other")
+
+        options = dict(
+            maximize=maximize,
+            method=method,
+            max_tries=max_tries,
+            constraint=constraint,
+            random_state=random_state,
+        )
+        workers = _n_workers(workers)
+        if workers <= 1 or len(windows) == 1:
+            bt = Backtest(**self._bt_kwargs)
+            results = [
+                _walk_window(bt, data, strategy, window, kwargs, **options)
+                for window in windows
+            ]
+        else:
+            results = [
+                result
+                for chunk_results in _map_chunks(
+                    partial(_run_windows, space=kwargs, options=options),
+                    windows,
+                    workers,
+                    initializer=_init_worker,
+                    initargs=(self._bt_kwargs, data, strategy),
+                )
+                for result in chunk_results
+            ]
+
+        return self._stitch(data, windows, results, optimize.score_name(maximize))
+
+    def _stitch(
+        self,
+        data: pd.DataFrame,
+        windows: List[Window],
+        results: List[dict],
+        name: str,
+    ) -> Stats:
+        equity, trades = [], []
+        offset, pnl = 0, 0.0
+        for result in results:
+            window_equity = pd.Series(result["equity"]).bfill().fillna(self._cash)
+            equity.append(window_equity.to_numpy() + pnl)
+            pnl += window_equity.iloc[-1] - self._cash
+
+            window_trades = result["stats"]._trades.copy()
+            window_trades["EntryBar"] += offset
+            window_trades["ExitBar"] += offset
+            trades.append(window_trades)
+            offset += len(window_equity)
+
+        stats = Stats.compute_stats(
+            data=data.iloc[windows[0].test_start : windows[-1].test_stop],
+            equity=np.concatenate(equity),
+            trades=pd.concat(trades, ignore_index=True).astype(
+                {"EntryBar": int, "ExitBar": int}
+            ),
+            strategy=None,
+            cash=self._cash,
+        )
+        stats["_windows"] = pd.DataFrame(
+            [
+                dict(
+                    TrainStart=data.index[window.train_start],
+                    TestStart=data.index[window.test_start],
+                    TestEnd=data.index[window.test_stop - 1],
+                    **result["params"],
+                    **{
+                        f"InSample {name}": result["in_sample"],
+                        f"OutOfSample {name}": result["out_of_sample"],
+                    },
+                )
+                for window, result in zip(windows, results)
+            ]
+        )
+        return stats
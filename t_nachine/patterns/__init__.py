@@ -1,3 +1,4 @@
 from .pattern import Pattern
 from .reversal_patterns import *
 from .bull_bear_pattern import *
+from .array_patterns import *
@@ -0,0 +1,249 @@
+from typing import List, Optional
+
+import numpy as np
+
+# Array versions of the patterns, evaluated on every bar at once: the value
+# at bar i is the pattern with candle the bar i and pre_candle the bar i - 1,
+# support[0] is support[i] and support[1] pre_support[i] (support[i - 1]
+# by default). There is no pre_candle on the first bar, patterns that need
+# one are False there. Unlike Candle, the prices aren't validated.
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """
+    values shifted by one bar, the first one being nan
+
+    Args:
+        values (np.ndarray): values per bar (along the last axis)
+
+    Returns:
+        np.ndarray: values of the previous bar
+    """
+    previous = np.empty(np.shape(values))
+    previous[..., 0] = np.nan
+    previous[..., 1:] = values[..., :-1]
+    return previous
+
+
+def _prices(*prices) -> List[np.ndarray]:
+    return [np.asarray(price, dtype=float) for price in prices]
+
+
+def _supports(support: np.ndarray, pre_support: Optional[np.ndarray]):
+    support = np.asarray(support, dtype=float)
+    if pre_support is None:
+        return support, _previous(support)
+    return support, np.asarray(pre_support, dtype=float)
+
+
+def _above_support(open_, close, support) -> np.ndarray:
+    return np.minimum(open_, close) > support
+
+
+def org_reversal_pattern(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    support: np.ndarray,
+    pre_support: np.ndarray = None,
+) -> np.ndarray:
+    """
+    `OrgReversalPattern` on every bar
+
+    Args:
+        open_ (np.ndarray): open prices
+        high (np.ndarray): high prices
+        low (np.ndarray): low prices
+        close (np.ndarray): close prices
+        support (np.ndarray): support of the candle
+        pre_support (np.ndarray, optional): support of the pre_candle.
+                                            Defaults to the previous support.
+
+    Returns:
+        np.ndarray: is pattern, per bar
+    """
+    open_, high, low, close = _prices(open_, high, low, close)
+    support, pre_support = _supports(support, pre_support)
+    pre_open, pre_high, pre_low, pre_close = map(_previous, (open_, high, low, close))
+
+    cond1 = _above_support(open_, close, support) & _above_support(
+        pre_open, pre_close, pre_support
+    )
+    # cut the support
+    cond2 = low < support
+    # lower highs and lower lows
+    cond3 = (high < pre_high) & (low < pre_low)
+    return cond1 & cond2 & cond3
+
+
+def inside_bar_reversal_pattern(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    support: np.ndarray,
+    pre_support: np.ndarray = None,
+) -> np.ndarray:
+    """
+    `InsideBarReversalPattern` on every bar
+
+    Args:
+        open_ (np.ndarray): open prices
+        high (np.ndarray): high prices
+        low (np.ndarray): low prices
+        close (np.ndarray): close prices
+        support (np.ndarray): support of the candle
+        pre_support (np.ndarray, optional): support of the pre_candle.
+                                            Defaults to the previous support.
+
+    Returns:
+        np.ndarray: is pattern, per bar
+    """
+    open_, high, low, close = _prices(open_, high, low, close)
+    support, pre_support = _supports(support, pre_support)
+    pre_open, pre_high, pre_low, pre_close = map(_previous, (open_, high, low, close))
+
+    cond1 = _above_support(open_, close, support) & _above_support(
+        pre_open, pre_close, pre_support
+    )
+    # cut support
+    cond2 = low < support
+    # lower highs and higher lows
+    cond3 = (high < pre_high) & (low > pre_low)
+    return cond1 & cond2 & cond3
+
+
+def trade_through_reversal_pattern(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    support: np.ndarray,
+    pre_support: np.ndarray = None,
+) -> np.ndarray:
+    """
+    `TradeThroughReversalPattern` on every bar
+
+    Args:
+        open_ (np.ndarray): open prices
+        high (np.ndarray): high prices
+        low (np.ndarray): low prices
+        close (np.ndarray): close prices
+        support (np.ndarray): support of the candle
+        pre_support (np.ndarray, optional): support of the pre_candle.
+                                            Defaults to the previous support.
+
+    Returns:
+        np.ndarray: is pattern, per bar
+    """
+    open_, high, low, close = _prices(open_, high, low, close)
+    support, pre_support = _supports(support, pre_support)
+    pre_open, pre_high, pre_low, pre_close = map(_previous, (open_, high, low, close))
+
+    cond1 = (
+        (pre_open > pre_close) & (pre_open > pre_support) & (pre_support > pre_close)
+    )
+    cond2 = (open_ < close) & (open_ < support) & (support < close)
+    # lower highs and lower lows
+    cond3 = (high < pre_high) & (low < pre_low)
+    return cond1 & cond2 & cond3
+
+
+def pin_reversal_pattern(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    support: np.ndarray,
+) -> np.ndarray:
+    """
+    `PinReversalPattern` on every bar
+
+    Args:
+        open_ (np.ndarray): open prices
+        high (np.ndarray): high prices
+        low (np.ndarray): low prices
+        close (np.ndarray): close prices
+        support (np.ndarray): support of the candle
+
+    Returns:
+        np.ndarray: is pattern, per bar
+    """
+    open_, high, low, close = _prices(open_, high, low, close)
+    support = np.asarray(support, dtype=float)
+
+    cond1 = _above_support(open_, close, support)
+    cond2 = low < support
+    # bull pin
+    cond3 = np.minimum(close, open_) - low >= 2 / 3 * (high - low)
+    return cond1 & cond2 & cond3
+
+
+def any_reversal_pattern(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    support: np.ndarray,
+    pre_support: np.ndarray = None,
+) -> np.ndarray:
+    """
+    `AnyReversalPattern` on every bar
+
+    Args:
+        open_ (np.ndarray): open prices
+        high (np.ndarray): high prices
+        low (np.ndarray): low prices
+        close (np.ndarray): close prices
+        support (np.ndarray): support of the candle
+        pre_support (np.ndarray, optional): support of the pre_candle.
+                                            Defaults to the previous support.
+
+    Returns:
+        np.ndarray: is pattern, per bar
+    """
+    open_, high, low, close = _prices(open_, high, low, close)
+    support, pre_support = _supports(support, pre_support)
+    ohlc = (open_, high, low, close)
+    return (
+        org_reversal_pattern(*ohlc, support, pre_support)
+        | inside_bar_reversal_pattern(*ohlc, support, pre_support)
+        | trade_through_reversal_pattern(*ohlc, support, pre_support)
+        | pin_reversal_pattern(*ohlc, support)
+    )
+
+
+def bull_bear_pattern(
+    open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray
+) -> np.ndarray:
+    """
+    `BullBearPattern` on every bar
+
+    Args:
+        open_ (np.ndarray): open prices
+        high (np.ndarray): high prices
+        low (np.ndarray): low prices
+        close (np.ndarray): close prices
+
+    Returns:
+        np.ndarray: is pattern, per bar
+    """
+    open_, high, low, close = _prices(open_, high, low, close)
+    pre_open, pre_high, pre_close = map(_previous, (open_, high, close))
+
+    cond1 = open_ < close
+    cond2 = pre_open > pre_close
+    # closing above high of previous candle
+    cond3 = close > pre_high
+    return cond1 & cond2 & cond3
+
+
+__all__ = [
+    "org_reversal_pattern",
+    "inside_bar_reversal_pattern",
+    "trade_through_reversal_pattern",
+    "pin_reversal_pattern",
+    "any_reversal_pattern",
+    "bull_bear_pattern",
+]
@@ -1,3 +1,3 @@
 from .bouncing import Bouncing
-from .extreme_rsi import ExtremeRSI
+from .extreme_rsi import ExtremeRSI, ExtremeRSISignal
 from .random import Random
\ No newline at end of file
@@ -1,14 +1,14 @@
 from collections import OrderedDict
-from typing import List
+from typing import Dict
 
 import numpy as np
+import pandas as pd
 
 from t_nachine.backtester import Strategy
-from t_nachine.candlesticks import Candle
+from t_nachine.candlesticks import Candle, CandleArray
 from t_nachine.indicators import ema
-from t_nachine.patterns import AnyReversalPattern
+from t_nachine.patterns import any_reversal_pattern
 from t_nachine.risk import RiskManger
-from t_nachine.strategies.utils import add_attrs, get_candles, build_attr_dict
 
 UP_DAYS = 20
 WAIT = 1
@@ -17,6 +17,11 @@ RISK_TO_REWARD = 3.0
 
 
 class Bouncing(Strategy):
+    up_days = UP_DAYS
+    wait = WAIT
+    risk_to_reward = RISK_TO_REWARD
+    risk_per_trade = RISK_PER_TRADE
+
     def init(self):
         # data and indicators
         self.ema18 = self.I(ema, self.data, 18)
@@ -24,26 +29,88 @@ class Bouncing(Strategy):
         self.ema100 = self.I(ema, self.data, 100)
         self.ema150 = self.I(ema, self.data, 150)
         self.ema200 = self.I(ema, self.data, 200, color="red")
-        self.up_days = UP_DAYS
-        self.wait = WAIT
-        self.risk_to_reward = RISK_TO_REWARD
-        self.risk_per_trade = RISK_PER_TRADE
         self.risk_manager = RiskManger(
             risk_to_reward=self.risk_to_reward, risk_per_trade=self.risk_per_trade
         )
 
-    def cancel(
-        self,
-    ) -> None:
+        # candles of the data, read in place every bar
+        self.candles = CandleArray.from_data(self.data)
+
+        # the trend of every bar, computed at once
+        self.is_uptrend = self.uptrend_mask()
+        self.set_wake_mask(self.is_uptrend)
+
+        # reversal of yesterday's candle on each support, for every bar
+        self.is_reversal = self.reversal_masks()
+
+    def reversal_masks(self) -> Dict[int, np.ndarray]:
         """
-        wait until <self.wait> days then cancel order if not executed
+        checks for every bar if yesterday's candle is a reversal on the
+        supports of today and yesterday, for each of the ema supports
+
+        Returns:
+            Dict[int, np.ndarray]: if is reversal per bar, per ema
+        """
+        previous = [
+            pd.Series(np.asarray(price)).shift(1).values
+            for price in (
+                self.data.Open,
+                self.data.High,
+                self.data.Low,
+                self.data.Close,
+            )
+        ]
+        supports = OrderedDict(
+            [
+                (200, self.ema200),
+                (150, self.ema150),
+                (100, self.ema100),
+                (50, self.ema50),
+                (18, self.ema18),
+            ]
+        )
+        return OrderedDict(
+            (
+                days,
+                any_reversal_pattern(
+                    *previous,
+                    support=np.asarray(support),
+                    pre_support=pd.Series(np.asarray(support)).shift(1).values,
+                ),
+            )
+            for days, support in supports.items()
+        )
+
+    def uptrend_mask(self) -> np.ndarray:
         """
-        for order in self.orders:
-            if (
-                not order.is_contingent
-                and len(self.data) - order.placed_bar >= self.wait
-            ):
-                order.cancel()
+        checks for every bar if the trend is bullish: over the last <up_days>
+        bars, ema50 above ema100 above ema200 until the previous bar, ema18
+        above ema50 90% of the time until 3 bars ago and the last 3 bars
+
+        Returns:
+            np.ndarray: if is uptrend, per bar
+        """
+        ema18, ema50, ema100, ema200 = (
+            pd.Series(np.asarray(indicator))
+            for indicator in (self.ema18, self.ema50, self.ema100, self.ema200)
+        )
+        up_days, half_days = self.up_days, int(self.up_days / 2)
+        if half_days - 3 < 1:
+            # no bars to check ema18 above ema50 on, never an uptrend
+            return np.zeros(len(self.data), dtype=bool)
+
+        ema50_above_ema100_above_ema200 = (
+            (ema50 >= ema100) & (ema100 >= ema200)
+        ).rolling(up_days - 1).min().shift(1) == 1
+        ema18_above_ema50 = (ema18 >= ema50).rolling(half_days - 3).mean().shift(
+            3
+        ) >= 0.9
+        ema18_above_ema50 &= (ema18 > ema50).rolling(3).min() == 1
+
+        is_uptrend = (ema18_above_ema50 & ema50_above_ema100_above_ema200).values
+        # needs <up_days> bars
+        is_uptrend[: up_days - 1] = False
+        return is_uptrend
 
     def uptrend(self) -> bool:
         """
@@ -52,17 +119,7 @@ class Bouncing(Strategy):
         Returns:
             bool: if is uptrend
         """
-        ema50_above_ema100_above_ema200: bool = all(
-            [
-                self.ema50[i] >= self.ema100[i] >= self.ema200[i]
-                for i in range(-self.up_days, -1)
-            ]
-        )
-        ema18_above_ema50 = np.mean(
-            [self.ema18[i] >= self.ema50[i] for i in range(-int(self.up_days / 2), -3)]
-        ) >= 0.9 and all([self.ema18[i] > self.ema50[i] for i in range(-3, 0)])
-
-        return ema18_above_ema50 and ema50_above_ema100_above_ema200
+        return bool(self.is_uptrend[len(self.data) - 1])
 
     @staticmethod
     def confirmed(candle0: Candle, candle1: Candle) -> bool:
@@ -82,25 +139,19 @@ class Bouncing(Strategy):
             and candle0.bull()
         )
 
-    def buy_signal(
-        self, candle0: Candle, candle1: Candle, candle2: Candle, support: List[float]
-    ) -> bool:
+    def buy_signal(self, candle0: Candle, candle1: Candle, is_reversal: bool) -> bool:
         """
         buy signal
 
         Args:
             candle0 (Candle): [description]
             candle1 ([type]): [description]
-            candle2 (Candle): [description]
-            support (List[float]): [description]
+            is_reversal (bool): if candle1 is a reversal on the support
 
         Returns:
             bool: is buy signal triggered
         """
 
-        is_reversal = AnyReversalPattern(
-            candle=candle1, pre_candle=candle2, support=support
-        )
         is_uptrend = self.uptrend()
         is_confirmed = Bouncing.confirmed(candle0, candle1)
 
@@ -108,38 +159,14 @@ class Bouncing(Strategy):
 
     def next(self):
 
-        # cancel pending orders
-        self.cancel()
-
-        # add attributes
-        for trade in self.trades:
-            add_attrs(
-                trade=trade,
-                high=self.data.High[-1],
-                low=self.data.Low[-1],
-                **build_attr_dict(self.data),
-            )
-
         try:
-            supports = OrderedDict(
-                [
-                    (200, [self.ema200[-1], self.ema200[-2], self.ema200[-3]]),
-                    (150, [self.ema150[-1], self.ema150[-2], self.ema150[-3]]),
-                    (100, [self.ema100[-1], self.ema100[-2], self.ema100[-3]]),
-                    (50, [self.ema50[-1], self.ema50[-2], self.ema50[-3]]),
-                    (18, [self.ema18[-1], self.ema18[-2], self.ema18[-3]])
-                ]
-            )
+            # the candle before yesterday only has to be valid
+            candle0, candle1, _ = (self.candles.ago(k) for k in range(3))
 
-            (
-                candle0,
-                candle1,
-                candle2,
-            ) = get_candles(self.data, days=3)
-
-            for support in supports.values():
+            i = len(self.data) - 1
+            for is_reversal in self.is_reversal.values():
 
-                if self.buy_signal(candle0, candle1, candle2, support):
+                if self.buy_signal(candle0, candle1, is_reversal[i]):
                     # entries and exits and number of shares
                     stop, limit, sl, tp = self.risk_manager.compute_entry_exit(
                         above_price=candle0.high, below_price=candle1.low
@@ -147,8 +174,14 @@ class Bouncing(Strategy):
                     sl = limit - 1.3 * (limit - sl)
                     size = self.risk_manager.shares(self.equity, stop, sl)
                     sl = 0.5 * sl
-                    order = self.buy(stop=stop, limit=limit, sl=sl, tp=tp, size=size)
-                    setattr(order, "placed_time", self.data.index[-1])
-                    setattr(order, "placed_bar", len(self.data))
+                    # pending orders are canceled after <self.wait> days
+                    self.buy(
+                        stop=stop,
+                        limit=limit,
+                        sl=sl,
+                        tp=tp,
+                        size=size,
+                        expiry=self.wait,
+                    )
         except IndexError:
             pass
@@ -1,9 +1,11 @@
+import numpy as np
+
 from t_nachine.backtester import Strategy
-from t_nachine.candlesticks import Candle
+from t_nachine.backtester.core.lib import BracketStrategy
+from t_nachine.candlesticks import Candle, CandleArray
 from t_nachine.indicators import rsi
-from t_nachine.patterns import BullBearPattern
+from t_nachine.patterns import BullBearPattern, bull_bear_pattern
 from t_nachine.risk import RiskManger
-from t_nachine.strategies.utils import add_attrs, get_candles, build_attr_dict
 
 WAIT = 1
 RISK_PER_TRADE = 0.01
@@ -12,28 +14,23 @@ RSI_THRESH = 10
 
 
 class ExtremeRSI(Strategy):
+    rsi_thresh = RSI_THRESH
+    wait = WAIT
+    risk_to_reward = RISK_TO_REWARD
+    risk_per_trade = RISK_PER_TRADE
+
     def init(self):
         self.rsi = self.I(rsi, self.data, n=2)
-        self.rsi_thresh = RSI_THRESH
-        self.wait = WAIT
-        self.risk_to_reward = RISK_TO_REWARD
-        self.risk_per_trade = RISK_PER_TRADE
+        # buy_signal can only trigger after a low rsi
+        wake_mask = np.zeros(len(self.data), dtype=bool)
+        wake_mask[1:] = np.asarray(self.rsi)[:-1] < self.rsi_thresh
+        self.set_wake_mask(wake_mask)
         self.risk_manager = RiskManger(
             risk_to_reward=self.risk_to_reward, risk_per_trade=self.risk_per_trade
         )
 
-    def cancel(
-        self,
-    ) -> None:
-        """
-        wait until <self.wait> days then cancel order if not executed
-        """
-        for order in self.orders:
-            if (
-                not order.is_contingent
-                and len(self.data) - order.placed_bar >= self.wait
-            ):
-                order.cancel()
+        # candles of the data, read in place every bar
+        self.candles = CandleArray.from_data(self.data)
 
     def buy_signal(self, candle0: Candle, candle1: Candle) -> bool:
         """
@@ -53,20 +50,8 @@ class ExtremeRSI(Strategy):
         return all([rsi_below_10, is_bull_bear])
 
     def next(self):
-        # cancel pending orders
-        self.cancel()
-
-        # add attributes
-        for trade in self.trades:
-            add_attrs(
-                trade=trade,
-                high=self.data.High[-1],
-                low=self.data.Low[-1],
-                **build_attr_dict(self.data),
-            )
-
         try:
-            candle0, candle1 = get_candles(self.data, days=2)
+            candle0, candle1 = self.candles.ago(0), self.candles.ago(1)
             if self.buy_signal(candle0, candle1):
                 # entries and exits and number of shares
                 stop, limit, sl, tp = self.risk_manager.compute_entry_exit(
@@ -74,9 +59,68 @@ class ExtremeRSI(Strategy):
                 )
                 size = self.risk_manager.shares(self.equity, stop, sl)
 
-                order = self.buy(stop=stop, limit=limit, sl=sl, tp=tp, size=size)
-                setattr(order, "placed_time", self.data.index[-1])
-                setattr(order, "placed_bar", len(self.data))
+                # pending orders are canceled after <self.wait> days
+                self.buy(
+                    stop=stop, limit=limit, sl=sl, tp=tp, size=size, expiry=self.wait
+                )
 
         except:
             pass
+
+
+class ExtremeRSISignal(BracketStrategy):
+    """
+    ExtremeRSI with its entry orders precomputed in init,
+    it can be run on both Backtest and SignalBacktest
+    """
+
+    rsi_thresh = RSI_THRESH
+    wait = WAIT
+    risk_to_reward = RISK_TO_REWARD
+    risk_per_trade = RISK_PER_TRADE
+
+    def init(self):
+        super().init()
+        self.rsi = self.I(rsi, self.data, n=2)
+        self.risk_manager = RiskManger(
+            risk_to_reward=self.risk_to_reward, risk_per_trade=self.risk_per_trade
+        )
+
+        # prices per bar along the last axis, also run on a batch of
+        # stocks at once (see `core.batch.BatchBacktest`)
+        candles = CandleArray.from_data(self.data)
+        open_, high, low, close = candles.open, candles.high, candles.low, candles.close
+        valid = candles.is_valid()
+
+        # buy_signal with candle0 the current candle and candle1 the previous one
+        entry = np.zeros(close.shape, dtype=bool)
+        entry[..., 1:] = (
+            valid[..., 1:]
+            & valid[..., :-1]
+            & (np.asarray(self.rsi)[..., :-1] < self.rsi_thresh)
+            & bull_bear_pattern(open_, high, low, close)[..., 1:]
+            # compute_entry_exit requirement
+            & (high[..., 1:] > low[..., :-1])
+        )
+
+        stop, limit, sl, tp = (np.full(close.shape, np.nan) for _ in range(4))
+        for i in zip(*np.nonzero(entry)):
+            previous = i[:-1] + (i[-1] - 1,)
+            levels = self.risk_manager.compute_entry_exit(
+                above_price=high[i], below_price=low[previous]
+            )
+            if None in levels or not levels[2] < levels[1] < levels[3]:
+                # the order would be rejected
+                entry[i] = False
+                continue
+            stop[i], limit[i], sl[i], tp[i] = levels
+
+        self.set_orders(
+            entry,
+            stop=stop,
+            limit=limit,
+            sl=sl,
+            tp=tp,
+            risk=self.risk_per_trade,
+            wait=self.wait,
+        )
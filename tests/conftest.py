@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.wrapper.utils import pre_process_stock
+
+STOCKS = os.path.join(
+    os.path.dirname(__file__), "t_nachine", "backtester", "wrapper", "stocks"
+)
+STOCK_NAMES = ["a.us.txt", "anh_b.us.txt"]
+
+
+@pytest.fixture(scope="session")
+def read_stock():
+    """reads a test stock by file name, pre-processed as the wrapper does"""
+    stocks = {}
+
+    def read(name: str) -> pd.DataFrame:
+        if name not in stocks:
+            stocks[name] = pre_process_stock(pd.read_csv(os.path.join(STOCKS, name)))
+        return stocks[name].copy()
+
+    return read
+
+
+@pytest.fixture
+def stock(read_stock):
+    return read_stock("a.us.txt")
+
+
+@pytest.fixture(params=STOCK_NAMES)
+def each_stock(request, read_stock):
+    return read_stock(request.param)
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.strategies import Bouncing, ExtremeRSI
+
+
+@pytest.mark.parametrize("strategy", [Bouncing, ExtremeRSI])
+def test_wake_mask_skips_nothing_relevant(stock, strategy, monkeypatch):
+    results = Backtest(cash=20_000).run(stock, strategy)
+    assert results._strategy._wake_mask is not None
+
+    monkeypatch.setattr(strategy, "set_wake_mask", lambda self, mask: None)
+    expected = Backtest(cash=20_000).run(stock, strategy)
+
+    assert len(results._trades)
+    pd.testing.assert_frame_equal(expected._trades, results._trades)
+    pd.testing.assert_series_equal(
+        expected.drop(["_strategy", "_trades", "_equity_curve"]),
+        results.drop(["_strategy", "_trades", "_equity_curve"]),
+    )
+    np.testing.assert_array_equal(
+        expected._strategy._broker._equity, results._strategy._broker._equity
+    )
+
+
+def test_skipped_bars_keep_equity(read_stock):
+    results = Backtest(cash=20_000).run(read_stock("anh_b.us.txt"), ExtremeRSI)
+    wake_mask = results._strategy._wake_mask
+    equity = results._strategy._broker._equity
+
+    # only the first bar, before any broker update, has no equity
+    assert not wake_mask[1:].all()
+    assert not np.isnan(equity[1:]).any()
+
+
+def test_wake_mask_shape(read_stock):
+    class Masked(ExtremeRSI):
+        def init(self):
+            super().init()
+            self.set_wake_mask(np.ones(3, dtype=bool))
+
+    with pytest.raises(ValueError):
+        Backtest().run(read_stock("anh_b.us.txt"), Masked)
+
+
+def test_trade_excursions(stock):
+    trades = Backtest(cash=20_000).run(stock, ExtremeRSI)._trades
+    assert len(trades)
+    for trade in trades.itertuples():
+        # `Strategy.next` saw the trade open from its entry to the bar before its exit
+        seen = stock.iloc[trade.EntryBar : trade.ExitBar]
+        if not len(seen):
+            assert np.isnan(trade.MaxPnL) and np.isnan(trade.OneR)
+            continue
+        assert trade.MaxPnL == seen.High.max() - trade.EntryPrice
+        assert trade.MaxNegativePnl == min(seen.Low.min() - trade.EntryPrice, 0)
+        assert trade.OneR > 0
+
+
+def test_run_window(stock):
+    bt = Backtest(cash=20_000)
+    expected = bt.run(stock, Bouncing)
+    pd.testing.assert_frame_equal(
+        expected._trades, bt.run_window(stock, Bouncing, slice(None))._trades
+    )
+
+    results = bt.run_window(stock, Bouncing, slice(1000, 2500))
+    assert results.Start == stock.index[1000] and results.End == stock.index[2499]
+    trades = results._trades
+    assert len(trades) and trades.EntryBar.min() >= 0 and trades.ExitBar.max() < 1500
+    # the indicators are those of the full history, so the trades of the
+    # full run that fit in the window are taken too
+    inside = expected._trades[
+        (expected._trades.EntryBar >= 1000) & (expected._trades.ExitBar < 2499)
+    ]
+    assert set(inside.EntryTime) <= set(trades.EntryTime)
+
+    with pytest.raises(ValueError):
+        bt.run_window(stock, Bouncing, slice(100, 100))
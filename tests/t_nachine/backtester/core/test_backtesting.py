@@ -0,0 +1,181 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core import backtesting
+from t_nachine.backtester.core._util import _Data
+from t_nachine.backtester.core.backtesting import Order, _Broker, _OrderBook
+
+
+@pytest.fixture
+def orders():
+    return {
+        "market": Order(None, 1),
+        "long_stop": Order(None, 1, stop_price=105),
+        "short_stop": Order(None, -1, stop_price=95),
+        "long_limit": Order(None, 1, limit_price=97),
+        "short_limit": Order(None, -1, limit_price=103),
+        "far_long_stop": Order(None, 1, stop_price=150),
+        "far_long_limit": Order(None, 1, limit_price=50),
+    }
+
+
+class TestOrderBook:
+    def test_queue_order(self, orders):
+        book = _OrderBook()
+        book.append(orders["long_stop"])
+        book.append(orders["market"])
+        book.insert(0, orders["short_stop"])
+        book.insert(0, orders["short_limit"])
+        assert list(book) == [
+            orders["short_limit"],
+            orders["short_stop"],
+            orders["long_stop"],
+            orders["market"],
+        ]
+        book.remove(orders["short_stop"])
+        assert orders["short_stop"] not in book and len(book) == 3
+        with pytest.raises(ValueError):
+            book.remove(orders["short_stop"])
+
+    def test_triggered(self, orders):
+        book = _OrderBook()
+        for order in orders.values():
+            book.append(order)
+
+        assert book.triggered(high=101, low=99) == [orders["market"]]
+        assert book.triggered(high=106, low=94) == [
+            orders["market"],
+            orders["long_stop"],
+            orders["short_stop"],
+            orders["long_limit"],
+            orders["short_limit"],
+        ]
+
+    def test_reindex(self, orders):
+        book = _OrderBook()
+        order = Order(None, 1, limit_price=104, stop_price=102)
+        book.append(order)
+        assert book.triggered(high=101, low=99) == []
+
+        # Stop hit, the order becomes a limit order
+        order._replace(stop_price=None)
+        book.reindex(order)
+        assert book.triggered(high=101, low=99) == [order]
+
+
+@pytest.fixture
+def broker():
+    close = 100 + 10 * np.sin(np.arange(40.0) / 3)
+    df = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close},
+        index=pd.date_range("2020-01-01", periods=len(close)),
+    )
+    data = _Data(df)
+    data._set_length(1)
+    return _Broker(
+        data=data,
+        cash=10_000,
+        commission=0.001,
+        margin=0.5,
+        trade_on_close=False,
+        hedging=True,
+        exclusive_orders=False,
+        index=df.index,
+    )
+
+
+def trade_orders(broker):
+    """runs <broker> over its data with trades opened, reduced and closed, yielding each bar"""
+    data = broker._data
+    for i in range(2, 40):
+        data._set_length(i)
+        if i % 3 == 0:
+            broker.new_order(size=i % 7 + 1)
+        if i % 5 == 0:
+            broker.new_order(size=-(i % 4 + 1))
+        if i % 4 == 0 and broker.trades:
+            broker.trades[0].close(0.5)
+        broker.next()
+        yield i
+
+
+class TestBrokerAccounting:
+    def test_matches_open_trades(self, broker):
+        for _ in trade_orders(broker):
+            # Summed trade by trade, as `Trade.pl` and `Trade.value`: the same floats
+            trades = broker.trades
+            assert broker.position.size == sum(trade.size for trade in trades)
+            assert broker.position.pl == sum(trade.pl for trade in trades)
+            assert broker.equity == broker._cash + sum(trade.pl for trade in trades)
+            margin_used = sum(trade.value / broker._leverage for trade in trades)
+            assert broker.margin_available == max(0, broker.equity - margin_used)
+        assert broker.closed_trades
+
+    def test_large_book(self, broker, monkeypatch):
+        monkeypatch.setattr(backtesting, "SMALL_BOOK", 2)
+        large = False
+        for _ in trade_orders(broker):
+            trades = broker.trades
+            large |= len(trades) > 2
+            assert broker.position.size == sum(trade.size for trade in trades)
+            assert broker.equity == pytest.approx(
+                broker._cash + sum(trade.pl for trade in trades)
+            )
+            margin_used = sum(trade.value / broker._leverage for trade in trades)
+            assert broker.margin_available == pytest.approx(
+                max(0, broker.equity - margin_used)
+            )
+        assert large
+
+    def test_reset_when_flat(self, broker):
+        data = broker._data
+        data._set_length(2)
+        broker.new_order(size=3)
+        broker.next()
+        assert broker.position.size == 3
+
+        data._set_length(3)
+        broker.trades[0].close()
+        broker.next()
+        assert not broker.trades
+        assert broker.position.size == 0 and broker.position.pl == 0
+        assert broker.equity == broker._cash
+
+
+class TestOrderExpiry:
+    def test_expires_after_bars(self, broker):
+        data = broker._data
+        data._set_length(5)
+        order = broker.new_order(size=1, limit=1, expiry=3)
+        assert order.placed_bar == 5
+        assert order.placed_time == data.index[-1]
+        assert order.expiry_bar == 8
+
+        for i in range(5, 9):
+            data._set_length(i + 1)
+            broker.next()
+            assert (order in broker.orders) == (i < 8)
+
+    def test_expires_after_time(self, broker):
+        data = broker._data
+        data._set_length(5)
+        index = broker._index
+        by_duration = broker.new_order(size=1, limit=1, expiry=pd.Timedelta(days=2))
+        by_time = broker.new_order(size=1, limit=1, expiry=index[10])
+        assert by_duration.expiry_bar == 7
+        assert by_time.expiry_bar == 11
+
+    def test_filled_orders_dont_expire(self, broker):
+        data = broker._data
+        data._set_length(5)
+        order = broker.new_order(size=1, expiry=1)
+        never = broker.new_order(size=1, limit=1)
+        data._set_length(6)
+        broker.next()
+        assert order not in broker.orders and len(broker.trades) == 1
+
+        data._set_length(7)
+        broker.next()
+        assert len(broker.trades) == 1
+        assert never in broker.orders and never.expiry_bar is None
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core.batch import BatchBacktest
+from t_nachine.backtester.core.lib import BracketStrategy
+from t_nachine.backtester.core.vectorized import SignalBacktest
+from t_nachine.strategies import ExtremeRSI, ExtremeRSISignal
+
+
+class Brackets(BracketStrategy):
+    def init(self):
+        super().init()
+        close = np.asarray(self.data.Close)
+        entry = np.zeros(close.shape)
+        entry[..., 5::7] = 1
+        entry[..., 9::11] = -1
+        self.set_orders(
+            entry,
+            size=10,
+            stop=close * (1 + 0.01 * np.sign(entry)),
+            sl=close * (1 - 0.05 * np.sign(entry)),
+            tp=close * (1 + 0.08 * np.sign(entry)),
+            wait=3,
+        )
+
+
+@pytest.fixture
+def data(read_stock):
+    a, anh_b = read_stock("a.us.txt"), read_stock("anh_b.us.txt")
+    return {
+        "a": a,
+        "a_start": a.iloc[:700],
+        "a_end": a.iloc[-300:],
+        "anh_b": anh_b,
+        "short": anh_b.iloc[100:130],
+    }
+
+
+@pytest.mark.parametrize("strategy", [Brackets, ExtremeRSISignal])
+def test_matches_signal_backtest(data, strategy):
+    trades = BatchBacktest(cash=20_000).run(data, strategy)
+    assert len(trades)
+    for symbol, frame in data.items():
+        expected = SignalBacktest(cash=20_000).run(frame, strategy)._trades
+        symbol_trades = trades[trades.Symbol == symbol].drop(columns="Symbol")
+        if not len(expected):
+            assert not len(symbol_trades)
+            continue
+        pd.testing.assert_frame_equal(
+            symbol_trades.reset_index(drop=True), expected, check_dtype=False
+        )
+
+
+def test_no_trades(data):
+    trades = BatchBacktest().run({"short": data["short"]}, ExtremeRSISignal)
+    assert not len(trades) and "Symbol" in trades
+
+
+def test_checks(data):
+    with pytest.raises(TypeError):
+        BatchBacktest().run(data, ExtremeRSI)
+    with pytest.raises(ValueError):
+        BatchBacktest().run({}, Brackets)
+
+    missing = data["a"].copy()
+    missing.iloc[10, missing.columns.get_loc("Close")] = np.nan
+    with pytest.raises(ValueError, match="missing"):
+        BatchBacktest().run({"a": missing, "short": data["short"]}, Brackets)
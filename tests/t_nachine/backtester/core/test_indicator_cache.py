@@ -0,0 +1,84 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.backtester.core.indicator_cache import IndicatorCache
+from t_nachine.indicators import ema, rsi
+from t_nachine.strategies import Bouncing
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return IndicatorCache(str(tmp_path / "cache"))
+
+
+def cached(cache, func, *args, **kwargs):
+    key = cache.key(func, args, kwargs)
+    value = cache.get(key)
+    if value is None:
+        value = np.asarray(func(*args, **kwargs))
+        cache.put(key, value)
+    return value
+
+
+class TestIndicatorCache:
+    def test_hits(self, cache, stock):
+        expected = ema(stock, 50)
+        for _ in range(3):
+            np.testing.assert_array_equal(cached(cache, ema, stock, 50), expected)
+        assert (cache.hits, cache.misses) == (2, 1)
+
+    def test_disk(self, cache, stock):
+        cached(cache, ema, stock, 50)
+        other = IndicatorCache(cache.cache_folder)
+        np.testing.assert_array_equal(cached(other, ema, stock, 50), ema(stock, 50))
+        assert (other.hits, other.misses) == (1, 0)
+
+        cache.clear()
+        assert not len(cache)
+        assert cached(cache, ema, stock, 50) is not None
+        assert cache.misses == 2
+
+    def test_key(self, cache, stock):
+        key = cache.key(ema, (stock, 50), {})
+        assert key == cache.key(ema, (stock.copy(), 50), {})
+        assert key != cache.key(ema, (stock, 51), {})
+        assert key != cache.key(rsi, (stock, 50), {})
+
+        changed = stock.copy()
+        changed.iloc[-1, 0] += 1
+        assert key != cache.key(ema, (changed, 50), {})
+
+    def test_closures(self, cache, stock):
+        def scaled(factor):
+            return lambda stock: stock["Close"] * factor
+
+        assert cache.key(scaled(1), (stock,), {}) != cache.key(scaled(2), (stock,), {})
+        # state of the object a method is bound to isn't known
+        assert cache.key(cache.key, (stock,), {}) is None
+        assert cache.key(ema, (object(), 50), {}) is None
+
+    def test_lru(self, stock):
+        cache = IndicatorCache(max_entries=2)
+        for n in [10, 20, 30, 10]:
+            cached(cache, ema, stock, n)
+        assert len(cache) == 2
+        assert (cache.hits, cache.misses) == (0, 4)
+
+    def test_pickle(self, cache, stock):
+        cached(cache, ema, stock, 50)
+        copy = pickle.loads(pickle.dumps(cache))
+        assert copy.cache_folder == cache.cache_folder
+        assert not len(copy) and not copy.hits
+
+
+def test_backtest(cache, stock):
+    expected = Backtest(cash=20_000).run(stock, Bouncing)
+    bt = Backtest(cash=20_000, indicator_cache=cache)
+    for i in range(2):
+        results = bt.run(stock, Bouncing)
+        pd.testing.assert_frame_equal(expected._trades, results._trades)
+        assert cache.misses == 5 and cache.hits == 5 * i
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.stats
+
+from t_nachine.backtester.core import optimize
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.strategies import ExtremeRSI
+
+
+class TestParameterCombinations:
+    def test_grid(self):
+        combinations = optimize.parameter_combinations(
+            ExtremeRSI,
+            {"rsi_thresh": np.arange(5, 20, 5), "wait": 2},
+            constraint=lambda params: params["rsi_thresh"] > 5,
+        )
+        assert combinations == [
+            {"rsi_thresh": 10, "wait": 2},
+            {"rsi_thresh": 15, "wait": 2},
+        ]
+        assert type(combinations[0]["rsi_thresh"]) is int
+
+    def test_grid_max_tries(self):
+        space = {"rsi_thresh": range(10), "wait": range(10)}
+        assert len(optimize.parameter_combinations(ExtremeRSI, space, max_tries=7)) == 7
+        assert (
+            len(optimize.parameter_combinations(ExtremeRSI, space, max_tries=0.5)) == 50
+        )
+
+    def test_random(self):
+        space = {"rsi_thresh": scipy.stats.randint(5, 30), "risk_to_reward": [2, 3]}
+        combinations = optimize.parameter_combinations(
+            ExtremeRSI, space, method="random", max_tries=10, random_state=0
+        )
+        assert len({tuple(params.values()) for params in combinations}) == 10
+        assert all(5 <= params["rsi_thresh"] < 30 for params in combinations)
+        assert combinations == optimize.parameter_combinations(
+            ExtremeRSI, space, method="random", max_tries=10, random_state=0
+        )
+        # fewer combinations than asked for
+        space = {"wait": [1, 2]}
+        assert (
+            len(optimize.parameter_combinations(ExtremeRSI, space, method="random"))
+            == 2
+        )
+
+    def test_errors(self):
+        with pytest.raises(AttributeError):
+            optimize.parameter_combinations(ExtremeRSI, {"n": [1, 2]})
+        with pytest.raises(ValueError):
+            optimize.parameter_combinations(ExtremeRSI, {"wait": []})
+        with pytest.raises(ValueError):
+            optimize.parameter_combinations(
+                ExtremeRSI, {"wait": [1]}, constraint=lambda p: 0
+            )
+
+
+def test_optimize(stock):
+    bt = Backtest(cash=20_000)
+    ranked, heatmap = bt.optimize(
+        stock,
+        ExtremeRSI,
+        rsi_thresh=[5, 10, 20],
+        risk_to_reward=[2, 3],
+        return_heatmap=True,
+    )
+    assert len(ranked) == len(heatmap) == 6
+    assert ranked.SQN.is_monotonic_decreasing
+    assert heatmap.index.names == ["rsi_thresh", "risk_to_reward"]
+
+    best = ranked.iloc[0]
+    stats = bt.run(
+        stock,
+        ExtremeRSI,
+        rsi_thresh=best.rsi_thresh,
+        risk_to_reward=best.risk_to_reward,
+    )
+    assert stats.SQN == best.SQN == heatmap.max()
+    assert stats["# Trades"] == best["# Trades"]
+
+
+def test_optimize_parallel(stock):
+    def n_trades(stats):
+        return stats["# Trades"]
+
+    space = dict(rsi_thresh=[5, 10, 20], wait=[1, 2])
+    bt = Backtest(cash=20_000)
+    expected = bt.optimize(stock, ExtremeRSI, maximize=n_trades, **space)
+    results = bt.optimize(stock, ExtremeRSI, maximize=n_trades, workers=2, **space)
+    pd.testing.assert_frame_equal(expected, results)
+    assert list(results.columns[:3]) == ["rsi_thresh", "wait", "n_trades"]
+
+
+class TestHalving:
+    def test_rungs(self):
+        assert optimize.halving_rungs(100, 81) == [2, 4, 12, 34, 100]
+        assert optimize.halving_rungs(100, 9) == [12, 34, 100]
+        assert optimize.halving_rungs(100, 81, min_units=10) == [12, 34, 100]
+        assert optimize.halving_rungs(100, 1) == [100]
+        assert optimize.halving_rungs(2, 100) == [1, 2]
+
+    def test_promoted(self):
+        assert optimize.promoted([1, np.nan, 3, 2, 0], eta=2) == [0, 2, 3]
+        assert optimize.promoted([np.nan, np.nan], eta=3) == [0]
+
+    def test_propose(self):
+        combinations = [
+            dict(a=a, b=b) for a in range(5) for b in ["x", "y", "z"] for _ in range(2)
+        ]
+        # the best scores are those of a == 4
+        scores = {i: params["a"] for i, params in enumerate(combinations[::3])}
+        scores = {3 * i: score for i, score in scores.items()}
+        proposed = optimize.propose(combinations, scores, 4, random_state=0)
+        assert len(proposed) == 4 and not set(proposed) & set(scores)
+        assert all(combinations[i]["a"] == 4 for i in proposed)
+        assert optimize.propose(
+            combinations, {}, 3, random_state=0
+        ) == optimize.propose(combinations, {}, 3, random_state=0)
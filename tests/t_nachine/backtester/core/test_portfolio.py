@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.backtester.core.portfolio import Portfolio
+from t_nachine.backtester.core.strategy import Strategy
+from t_nachine.strategies import Bouncing, ExtremeRSI
+
+
+class Periodic(Strategy):
+    """buys most of the equity every <period> bars, sells it <period> bars later"""
+
+    period = 20
+    size = 0.9
+
+    def init(self):
+        pass
+
+    def next(self):
+        if len(self.data) % self.period == 0:
+            if self.position:
+                self.position.close()
+            else:
+                self.buy(size=self.size)
+
+
+@pytest.mark.parametrize("strategy", [Bouncing, ExtremeRSI])
+def test_single_symbol_matches_backtest(stock, strategy):
+    expected = Backtest(cash=20_000).run(stock, strategy)
+    results = Portfolio(cash=20_000).run({"a": stock}, strategy)
+
+    trades = expected._trades.sort_values(["EntryBar", "ExitBar"], kind="mergesort")
+    assert len(trades)
+    pd.testing.assert_frame_equal(
+        results._trades.drop(columns="Symbol"), trades.reset_index(drop=True)
+    )
+    equity = pd.Series(expected._strategy._broker._equity).ffill().fillna(20_000)
+    np.testing.assert_array_equal(results._equity_curve.Equity, equity)
+
+
+def test_shared_cash(stock):
+    data = {"a": stock.iloc[:1000], "b": stock.iloc[:1000]}
+    trades = Portfolio().run(data, Periodic)._trades
+    a, b = (trades[trades.Symbol == symbol].set_index("EntryBar") for symbol in "ab")
+    # both enter on the same bars, the first symbol gets most of the cash
+    assert len(a) == len(b) and (a.Size > 5 * b.Size).all()
+
+    trades = Portfolio().run(data, Periodic, rank=lambda s: sorted(s)[::-1])._trades
+    a, b = (trades[trades.Symbol == symbol].set_index("EntryBar") for symbol in "ab")
+    assert len(a) == len(b) and (b.Size > 5 * a.Size).all()
+
+
+def test_rank_cancels_entries(stock):
+    data = {"a": stock.iloc[:1000], "b": stock.iloc[:1000]}
+    calls = []
+
+    def rank(strategies):
+        calls.append(sorted(strategies))
+        return ["b"]
+
+    trades = Portfolio().run(data, Periodic, rank=rank)._trades
+    assert calls and all(call == ["a", "b"] for call in calls)
+    # "a" only enters on the bars "b" doesn't compete on
+    a, b = (set(trades[trades.Symbol == symbol].EntryBar) for symbol in "ab")
+    assert a and b and not a & b
+
+    with pytest.raises(ValueError):
+        Portfolio().run(data, Periodic, rank=lambda strategies: ["c"])
+
+
+def test_union_calendar(stock):
+    data = {"early": stock.iloc[:1000], "late": stock.iloc[800:2000]}
+    results = Portfolio().run(data, Periodic)
+    assert len(results._equity_curve) == 2000
+
+    trades = results._trades
+    for symbol, frame in data.items():
+        symbol_trades = trades[trades.Symbol == symbol]
+        assert len(symbol_trades)
+        assert symbol_trades.EntryTime.min() >= frame.index[0]
+        # the trades open at the end of a symbol are closed on its last bar
+        assert symbol_trades.ExitTime.max() == frame.index[-1]
+    np.testing.assert_array_equal(
+        stock.index[trades.EntryBar], pd.DatetimeIndex(trades.EntryTime)
+    )
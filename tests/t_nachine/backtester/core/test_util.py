@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core._util import _Data
+
+
+@pytest.fixture
+def data():
+    values = np.arange(10.0)
+    return _Data(
+        pd.DataFrame(
+            {"Open": values, "High": values, "Low": values, "Close": values},
+            index=pd.date_range("2020-01-01", periods=10),
+        )
+    )
+
+
+class TestArrayView:
+    def test_follows_length(self, data):
+        close = data.Close
+        data._set_length(4)
+        assert close is data.Close
+        assert len(close) == 4
+        assert close[-1] == 3 and close[0] == 0
+        np.testing.assert_array_equal(close[-2:], [2, 3])
+        assert data.index[-1] == pd.Timestamp("2020-01-04")
+
+        data._set_length(7)
+        assert close[-1] == 6
+        assert float(close) == 6
+        np.testing.assert_array_equal(close + 1, np.arange(1.0, 8.0))
+        assert len(close.s) == 7
+
+    def test_out_of_bounds(self, data):
+        data._set_length(2)
+        with pytest.raises(IndexError):
+            data.Close[-3]
+        with pytest.raises(IndexError):
+            data.Close[2]
@@ -0,0 +1,134 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.backtester.core.lib import BracketStrategy
+from t_nachine.backtester.core.vectorized import SignalBacktest
+from t_nachine.strategies import ExtremeRSI, ExtremeRSISignal
+
+
+class Brackets(BracketStrategy):
+    def init(self):
+        super().init()
+        close = np.asarray(self.data.Close)
+        entry = np.zeros(len(close))
+        entry[5::7] = 1
+        entry[9::11] = -1
+        self.set_orders(
+            entry,
+            size=10,
+            stop=close * (1 + 0.01 * np.sign(entry)),
+            sl=close * (1 - 0.05 * np.sign(entry)),
+            tp=close * (1 + 0.08 * np.sign(entry)),
+            wait=3,
+        )
+
+
+class RandomBrackets(BracketStrategy):
+    """random entry, stop, limit, SL/TP, size and wait orders, drawn from <seed>"""
+
+    seed = 0
+
+    def init(self):
+        super().init()
+        random = np.random.RandomState(self.seed)
+        close = np.asarray(self.data.Close)
+        n = len(close)
+        short = random.rand() < 0.3
+        entry = (random.rand(n) < random.choice([0.02, 0.1, 0.3])) * np.where(
+            random.rand(n) < (0.5 if short else 0), -1, 1
+        )
+        sign = np.sign(entry)
+        distance = close * random.uniform(0.005, 0.06, n)
+        # market, stop, limit and stop-limit orders
+        kind = random.randint(0, 4, n)
+        stop = np.where(kind % 2 == 1, close + sign * distance, np.nan)
+        limit = np.where(
+            kind == 2,
+            close - sign * distance,
+            np.where(kind == 3, stop + random.uniform(-1, 1, n) * distance, np.nan),
+        )
+        price = np.where(np.isnan(limit), np.where(np.isnan(stop), close, stop), limit)
+        risk = 0.02 if random.rand() < 0.4 else None
+        sl = np.where(
+            (random.rand(n) < 0.8) | bool(risk), price - sign * 2 * distance, np.nan
+        )
+        tp = np.where(random.rand(n) < 0.7, price + sign * 3 * distance, np.nan)
+        # SL/TP of market orders clear of the commission adjusted close
+        invalid = (kind == 0) & (
+            (sign * (sl - close) > -0.05 * close) | (sign * (tp - close) < 0.05 * close)
+        )
+        size = np.where(
+            random.rand(n) < 0.5,
+            random.choice([0.1, 0.3, 0.9], n),
+            random.randint(1, 30, n).astype(float),
+        )
+        self.set_orders(
+            np.where(invalid, 0, entry),
+            size=size,
+            stop=stop,
+            limit=limit,
+            sl=sl,
+            tp=tp,
+            risk=risk,
+            wait=[None, 1, 2, 5][random.randint(4)],
+        )
+
+
+def test_matches_extreme_rsi(each_stock):
+    expected = Backtest(cash=20_000).run(each_stock, ExtremeRSI)
+    results = SignalBacktest(cash=20_000).run(each_stock, ExtremeRSISignal)
+
+    assert len(results._trades)
+    pd.testing.assert_frame_equal(expected._trades, results._trades)
+    pd.testing.assert_series_equal(
+        expected.drop(["_strategy", "_trades", "_equity_curve"]),
+        results.drop(["_strategy", "_trades", "_equity_curve"]),
+    )
+
+
+@pytest.mark.parametrize("hedging", [False, True])
+def test_matches_event_engine(stock, hedging):
+    data = stock.iloc[:1000]
+    expected = Backtest(cash=20_000, hedging=hedging).run(data, Brackets)
+    results = SignalBacktest(cash=20_000, hedging=hedging).run(data, Brackets)
+
+    assert len(results._trades)
+    pd.testing.assert_frame_equal(expected._trades, results._trades)
+    assert expected["Equity Final [$]"] == results["Equity Final [$]"]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_event_engine_randomly(stock, seed):
+    data = stock.iloc[:1200]
+    for hedging, trade_on_close, exclusive_orders in itertools.product(
+        [False, True], repeat=3
+    ):
+        kwargs = dict(
+            cash=100_000,
+            commission=[0, 0.002][seed % 2],
+            margin=[1, 0.5][seed % 3 == 0],
+            hedging=hedging,
+            trade_on_close=trade_on_close,
+            exclusive_orders=exclusive_orders,
+        )
+        try:
+            expected = Backtest(**kwargs).run(data, RandomBrackets, seed=seed)
+        except (ValueError, AssertionError) as error:
+            with pytest.raises(type(error)):
+                SignalBacktest(**kwargs).run(data, RandomBrackets, seed=seed)
+            continue
+        results = SignalBacktest(**kwargs).run(data, RandomBrackets, seed=seed)
+
+        pd.testing.assert_frame_equal(
+            expected._trades, results._trades, check_exact=True, obj=str(kwargs)
+        )
+        assert expected["Equity Final [$]"] == results["Equity Final [$]"]
+
+
+def test_requires_bracket_strategy(read_stock):
+    with pytest.raises(TypeError):
+        SignalBacktest().run(read_stock("anh_b.us.txt"), ExtremeRSI)
@@ -1,9 +1,14 @@
+import io
 import os
 
+import pandas as pd
 import pytest
 
 from t_nachine.backtester import Backtest
-from t_nachine.strategies import Bouncing
+from t_nachine.backtester.core.strategy import Strategy
+from t_nachine.backtester.wrapper.sinks import CsvSink
+from t_nachine.strategies import Bouncing, ExtremeRSI
+from tests.conftest import STOCKS
 
 
 @pytest.fixture
@@ -21,3 +26,89 @@ class TestBacktestWrapper:
         backtest_wrapper.log_results(
             backtest_results=backtest_results, backtest_name=BACKTEST_NAME
         )
+
+
+def test_run_parallel_matches_serial():
+    serial_results = Backtest().run(strategy=Bouncing, stock_path=STOCKS)
+    parallel_results = Backtest().run(strategy=Bouncing, stock_path=STOCKS, workers=2)
+    pd.testing.assert_frame_equal(serial_results, parallel_results)
+
+
+class TwinTrades(Strategy):
+    """opens two identical trades every 20 bars, duplicated rows of the results"""
+
+    def init(self):
+        pass
+
+    def next(self):
+        if len(self.data) % 20 == 0:
+            if self.position:
+                self.position.close()
+            else:
+                self.buy(size=1)
+                self.buy(size=1)
+
+
+def test_run_csv_sink_matches_memory(tmp_path):
+    results = Backtest().run(strategy=TwinTrades, stock_path=STOCKS)
+    assert len(results) and not results.duplicated().any()
+    path = Backtest().run(
+        strategy=TwinTrades,
+        stock_path=STOCKS,
+        sink=CsvSink(str(tmp_path / "results.csv")),
+    )
+    expected = pd.read_csv(io.StringIO(results.to_csv(index=False)))
+    pd.testing.assert_frame_equal(pd.read_csv(path), expected)
+
+
+def test_optimize():
+    space = dict(rsi_thresh=[5, 20], risk_to_reward=[2, 3])
+    ranked = Backtest().optimize(ExtremeRSI, STOCKS, **space)
+    parallel = Backtest().optimize(ExtremeRSI, STOCKS, workers=2, **space)
+    pd.testing.assert_frame_equal(ranked, parallel)
+    assert len(ranked) == 4 and ranked.SQN.is_monotonic_decreasing
+
+    best = ranked.iloc[0]
+    trades = Backtest().run(
+        strategy=type(
+            "Best",
+            (ExtremeRSI,),
+            dict(rsi_thresh=best.rsi_thresh, risk_to_reward=best.risk_to_reward),
+        ),
+        stock_path=STOCKS,
+    )
+    assert len(trades) == best["# Trades"]
+
+
+def test_optimize_halving(tmp_path):
+    space = dict(rsi_thresh=[5, 10, 20, 30], risk_to_reward=[2, 3])
+    journal = str(tmp_path / "journal")
+    ranked, report = Backtest().optimize_halving(
+        ExtremeRSI, STOCKS, random_state=0, journal=journal, **space
+    )
+    # 8 combinations on 1 stock, then the best 3 on the other one
+    assert (report.evaluations, report.saved) == (11, 5)
+    assert list(ranked["# Stocks"]) == [2] * 3 + [1] * 5
+
+    grid = Backtest().optimize(ExtremeRSI, STOCKS, **space)
+    promoted = ranked[ranked["# Stocks"] == 2].drop(columns="# Stocks")
+    expected = grid.merge(promoted[list(space)])
+    pd.testing.assert_frame_equal(promoted, expected[promoted.columns])
+
+    resumed, report = Backtest().optimize_halving(
+        ExtremeRSI, STOCKS, random_state=0, journal=journal, **space
+    )
+    assert (report.evaluations, report.resumed) == (0, 11)
+    pd.testing.assert_frame_equal(ranked, resumed)
+
+    ranked, report = Backtest().optimize_halving(
+        ExtremeRSI, STOCKS, random_state=0, candidates=4, **space
+    )
+    assert len(ranked) == 4 and report.evaluations == 4 + 2
+
+
+def test_run_portfolio():
+    results = Backtest().run_portfolio(ExtremeRSI, STOCKS)
+    assert len(results._trades) == results["# Trades"] > 0
+    assert set(results._trades.Symbol) <= {"a", "anh_b"}
+    assert set(results._strategies) == {"a", "anh_b"}
@@ -0,0 +1,42 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.wrapper.cache import StockCache
+from t_nachine.backtester.wrapper.utils import pre_process_stock
+
+STOCK_PATH = os.path.join(os.path.dirname(__file__), "stocks", "a.us.txt")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StockCache(str(tmp_path / "cache"))
+
+
+class TestStockCache:
+    def test_load(self, cache):
+        expected = pre_process_stock(pd.read_csv(STOCK_PATH))
+        pd.testing.assert_frame_equal(expected, cache.load(STOCK_PATH))
+        pd.testing.assert_frame_equal(expected, cache.load(STOCK_PATH))
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_modified_file_is_reloaded(self, cache, tmp_path):
+        stock_path = str(tmp_path / "a.us.txt")
+        shutil.copy(STOCK_PATH, stock_path)
+        cache.load(stock_path)
+
+        stock = pd.read_csv(stock_path).iloc[:-1]
+        stock.to_csv(stock_path, index=False)
+        assert len(cache.load(stock_path)) == len(stock)
+        assert cache.misses == 2
+
+    def test_mmap(self, tmp_path):
+        cache = StockCache(str(tmp_path / "cache"), mmap=True)
+        expected = pre_process_stock(pd.read_csv(STOCK_PATH))
+        for _ in range(2):
+            stock = cache.load(STOCK_PATH)
+            pd.testing.assert_frame_equal(expected, stock)
+            assert isinstance(stock["Close"].values.base, np.memmap)
@@ -0,0 +1,53 @@
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.wrapper.sinks import CsvSink, MemorySink, ParquetSink
+
+
+@pytest.fixture
+def batches():
+    return [
+        pd.DataFrame({"PnL": [1.0, -2.0], "Symbol": ["a", "a"]}),
+        pd.DataFrame({"PnL": [3.0], "Symbol": ["b"]}),
+        pd.DataFrame({"PnL": [4.0, 5.0, -1.0], "Symbol": ["c", "c", "c"]}),
+    ]
+
+
+def _fill(sink, batches):
+    for batch in batches:
+        sink.add(batch)
+    return sink.finalize()
+
+
+class TestSinks:
+    def test_memory_sink(self, batches):
+        expected = pd.concat(batches)
+        pd.testing.assert_frame_equal(expected, _fill(MemorySink(), batches))
+        assert MemorySink().finalize().empty
+
+    def test_csv_sink(self, batches, tmp_path):
+        path = _fill(CsvSink(str(tmp_path / "results.csv"), chunk_size=2), batches)
+        expected = pd.concat(batches).reset_index(drop=True)
+        pd.testing.assert_frame_equal(expected, pd.read_csv(path))
+
+    def test_parquet_sink(self, batches, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = _fill(
+            ParquetSink(str(tmp_path / "results.parquet"), chunk_size=2), batches
+        )
+        expected = pd.concat(batches).reset_index(drop=True)
+        pd.testing.assert_frame_equal(expected, pd.read_parquet(path))
+
+    def test_file_sink_override(self, tmp_path):
+        path = tmp_path / "results.csv"
+        path.write_text("")
+        with pytest.raises(ValueError):
+            CsvSink(str(path))
+
+    def test_file_sink_no_results(self, batches, tmp_path):
+        path = tmp_path / "results.csv"
+        _fill(CsvSink(str(path)), batches)
+        # a run without trades doesn't leave the previous results behind
+        results = _fill(CsvSink(str(path), override=True), [])
+        assert isinstance(results, pd.DataFrame) and results.empty
+        assert not path.exists()
@@ -1,2 +1,72 @@
+import numpy as np
+import pytest
+
+from t_nachine.backtester.core._util import _Data
+from t_nachine.candlesticks import Candle, CandleArray
+
+
 def test_candle():
     pass
+
+
+def test_candle_validation():
+    with pytest.raises(ValueError):
+        Candle(10, 5, 1, 3)
+
+    candle = Candle(10, 5, 1, 3, validate=False)
+    assert candle.high == 5
+    assert not hasattr(candle, "__dict__")
+
+
+class TestCandleArray:
+    def test_matches_candles(self, stock):
+        candles = CandleArray(stock.Open, stock.High, stock.Low, stock.Close)
+        support = stock["Close"].ewm(span=50, adjust=False).mean().values
+        methods = {
+            "bull": candles.bull(),
+            "bear": candles.bear(),
+            "bull_pin": candles.bull_pin(),
+            "bear_pin": candles.bear_pin(ratio=0.5),
+        }
+        valid = candles.is_valid()
+
+        for i, row in enumerate(
+            stock[["Open", "High", "Low", "Close"]].itertuples(index=False)
+        ):
+            try:
+                candle = Candle(*row)
+            except ValueError:
+                assert not valid[i]
+                with pytest.raises(ValueError):
+                    candles[i]
+                continue
+            assert valid[i]
+            view = candles[i]
+            assert (view.open, view.high, view.low, view.close) == tuple(row)
+            assert candles.length()[i] == candle.__len__() == view.__len__()
+            assert candles.above_support(support)[i] == candle.above_support(support[i])
+            for name, mask in methods.items():
+                kwargs = {"ratio": 0.5} if name == "bear_pin" else {}
+                expected = getattr(candle, name)(**kwargs)
+                assert mask[i] == expected == getattr(view, name)(**kwargs)
+
+    def test_ago_follows_data(self, stock):
+        data = _Data(stock)
+        candles = CandleArray.from_data(data, validate=False)
+        data._set_length(10)
+        assert candles.ago(0).close == stock["Close"].iloc[9]
+        assert candles.ago(9).open == stock["Open"].iloc[0]
+        with pytest.raises(IndexError):
+            candles.ago(10)
+
+    def test_views(self):
+        close = np.array([1.5, 2.5, 0.5])
+        candles = CandleArray([1.0, 2.0, 1.0], [2.0, 3.0, 1.0], [0.5, 1.5, 1.0], close)
+        assert candles.close is close
+        assert candles.is_valid().tolist() == [True, True, False]
+
+        with pytest.raises(AttributeError):
+            candles[1].close = 2.0
+        with pytest.raises(ValueError):
+            candles.ago(0)
+        assert candles.ago(1).bull()
@@ -0,0 +1,128 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from t_nachine.backtester import Backtest
+from t_nachine.indicators import ENRICHED_FEATURES, FeatureStore, enrich, enrich_stocks
+from t_nachine.strategies import ExtremeRSI
+from tests.conftest import STOCKS
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(str(tmp_path / "features"))
+
+
+def pandas_features(stock):
+    """the features as the enrich_stocks notebook computed them with finta"""
+    high, low, close, volume = stock.High, stock.Low, stock.Close, stock.Volume
+    features = pd.DataFrame(index=stock.index)
+    typical_price = (high + low + close) / 3
+    features["VWAP"] = (volume * typical_price).cumsum() / volume.cumsum()
+
+    middle = close.rolling(20).mean()
+    std = close.rolling(20).std()
+    features["BB_UPPER"] = middle + 2 * std
+    features["BB_MIDDLE"] = middle
+    features["BB_LOWER"] = middle - 2 * std
+
+    previous = stock.shift()
+    pivot = (previous.High + previous.Low + previous.Close) / 3
+    features["pivot"] = pivot
+    for i, ratio in enumerate([0.382, 0.618, 1, 1.382], 1):
+        features[f"r{i}"] = pivot + (previous.High - previous.Low) * ratio
+        features[f"s{i}"] = pivot - (previous.High - previous.Low) * ratio
+
+    true_range = pd.concat(
+        [high - low, (high - close.shift()).abs(), (close.shift() - low).abs()],
+        axis=1,
+    ).max(axis=1)
+    features["ATR"] = true_range.rolling(14).mean()
+
+    delta = close.diff()
+    up, down = delta.copy(), delta.copy()
+    up[up < 0] = 0
+    down[down > 0] = 0
+    gain = up.ewm(alpha=1 / 14).mean()
+    loss = down.abs().ewm(alpha=1 / 14).mean()
+    features["RSI"] = (100 - 100 / (1 + gain / loss)) / 100
+
+    up_move, down_move = high.diff(), -low.diff()
+    plus_dm = up_move.where((up_move > down_move) & (up_move > 0), 0)
+    minus_dm = down_move.where((down_move > up_move) & (down_move > 0), 0)
+    atr = true_range.rolling(84).mean()
+    di_plus = 100 * (plus_dm / atr).ewm(span=14).mean()
+    di_minus = 100 * (minus_dm / atr).ewm(span=14).mean()
+    dx = (di_plus - di_minus).abs() / (di_plus + di_minus)
+    features["ADX"] = dx.ewm(alpha=1 / 14).mean()
+
+    highest, lowest = high.rolling(14).max(), low.rolling(14).min()
+    features["WILLIAMS"] = -(highest - close) / (highest - lowest)
+
+    for level in ["VWAP", "BB_LOWER", "BB_MIDDLE", "BB_UPPER", "pivot"] + [
+        f"{level}{i}" for level in "sr" for i in range(1, 5)
+    ]:
+        features[level] /= high
+    return features[ENRICHED_FEATURES]
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+class TestEnrich:
+    def test_matches_pandas(self, each_stock):
+        features, _ = enrich(each_stock)
+        pd.testing.assert_frame_equal(features, pandas_features(each_stock))
+
+    @pytest.mark.parametrize("split", [1, 50, 1000])
+    def test_incremental(self, each_stock, split):
+        expected, _ = enrich(each_stock)
+        head, state = enrich(each_stock.iloc[:split])
+        tail, _ = enrich(each_stock.iloc[split:], state)
+        pd.testing.assert_frame_equal(pd.concat([head, tail]), expected)
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+class TestFeatureStore:
+    def test_update(self, store, each_stock):
+        assert store.load("a") is None
+        assert store.update("a", each_stock.iloc[:-10]) == len(each_stock) - 10
+        assert store.update("a", each_stock) == 10
+        assert store.update("a", each_stock) == 0
+        assert store.symbols() == ["a"]
+
+        expected, _ = enrich(each_stock)
+        pd.testing.assert_frame_equal(store.load("a", fill=False), expected)
+        filled = store.load("a")
+        assert not filled.isna().any().any()
+        pd.testing.assert_frame_equal(filled.iloc[100:], expected.iloc[100:])
+
+    def test_edited_stock(self, store, each_stock):
+        store.update("a", each_stock.iloc[:-10])
+        edited = each_stock.copy()
+        edited.iloc[-20, edited.columns.get_loc("Close")] += 1
+        assert store.update("a", edited) == len(edited)
+        pd.testing.assert_frame_equal(store.load("a", fill=False), enrich(edited)[0])
+
+    def test_join(self, store, each_stock):
+        store.update("a", each_stock)
+        joined = store.join("a", each_stock)
+        assert list(joined.columns) == list(each_stock.columns) + ENRICHED_FEATURES
+        assert store.join("b", each_stock) is each_stock
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_enrich_stocks(self, store, tmp_path, workers):
+        stocks = tmp_path / "stocks"
+        shutil.copytree(STOCKS, stocks)
+        counts = enrich_stocks(str(stocks), store, workers=workers)
+        assert set(counts) == {"a", "anh_b"} and all(counts.values())
+        assert enrich_stocks(str(stocks), store, workers=workers) == {
+            "a": 0,
+            "anh_b": 0,
+        }
+
+    def test_backtest(self, store, tmp_path):
+        enrich_stocks(STOCKS, store)
+        trades = Backtest(log_folder=str(tmp_path), feature_store=store).run(
+            ExtremeRSI, STOCKS
+        )
+        assert len(trades) and not trades[ENRICHED_FEATURES].isna().any().any()
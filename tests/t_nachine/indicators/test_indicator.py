@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core._util import _Data
+from t_nachine.indicators import (
+    breakout,
+    donchian,
+    ema,
+    ewm_mean,
+    rolling_max,
+    rolling_mean,
+    rolling_min,
+    rsi,
+    stochastics,
+    williams_r,
+)
+
+
+def pandas_ema(values, span):
+    return pd.Series(values).ewm(span=span, adjust=False).mean().values
+
+
+class TestEma:
+    @pytest.mark.parametrize("span", [1, 2, 18, 50, 200])
+    def test_matches_pandas(self, each_stock, span):
+        expected = pandas_ema(each_stock["Close"].values, span)
+        np.testing.assert_array_equal(ema(each_stock, span), expected)
+        np.testing.assert_array_equal(ema(_Data(each_stock), span), expected)
+        np.testing.assert_array_equal(ema(each_stock["Close"], span), expected)
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            np.repeat([10.0, 10.5, 10.5, 11.0], 50),
+            np.r_[np.nan, np.nan, 1.0, 2.0, np.nan, 3.0, 3.0, np.nan, 2.0],
+            np.full(5, np.nan),
+            np.array([]),
+        ],
+        ids=["flat", "missing", "all-missing", "empty"],
+    )
+    def test_edge_cases(self, values):
+        np.testing.assert_array_equal(ewm_mean(values, 9), pandas_ema(values, 9))
+
+    def test_batches(self, each_stock):
+        close = each_stock["Close"].values
+        spans = [18, 50, 100]
+        np.testing.assert_array_equal(
+            ema(close, spans), [pandas_ema(close, span) for span in spans]
+        )
+
+        symbols = np.stack([close, close[::-1], np.round(close)])
+        np.testing.assert_array_equal(
+            ema(symbols, 50), [pandas_ema(values, 50) for values in symbols]
+        )
+        np.testing.assert_array_equal(
+            ema(symbols, spans),
+            [pandas_ema(values, span) for values, span in zip(symbols, spans)],
+        )
+
+    def test_span(self):
+        with pytest.raises(ValueError):
+            ewm_mean(np.ones(3), 0.5)
+
+
+def loop_rsi(prices, n):
+    """rsi one price at a time"""
+    deltas = np.diff(prices)
+    seed = deltas[: n + 1]
+    up = seed[seed >= 0].sum() / n
+    down = -seed[seed < 0].sum() / n
+    rs = up / down
+    rsi_values = np.zeros_like(prices)
+    rsi_values[:n] = 100.0 - 100.0 / (1.0 + rs)
+    for i in range(n, len(prices)):
+        delta = deltas[i - 1]
+        if delta > 0:
+            upval = delta
+            downval = 0.0
+        else:
+            upval = 0.0
+            downval = -delta
+        up = (up * (n - 1) + upval) / n
+        down = (down * (n - 1) + downval) / n
+        rs = up / down
+        rsi_values[i] = 100.0 - 100.0 / (1.0 + rs)
+    return rsi_values
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+class TestRsi:
+    @pytest.mark.parametrize("n", [1, 2, 14])
+    def test_matches_loop(self, each_stock, n):
+        expected = loop_rsi(each_stock["Close"].values, n)
+        np.testing.assert_array_equal(rsi(each_stock, n), expected)
+        np.testing.assert_array_equal(rsi(_Data(each_stock), n=n), expected)
+
+    @pytest.mark.parametrize(
+        "prices",
+        [
+            np.repeat([10.0, 10.5, 10.5, 11.0], 5),
+            np.arange(1.0, 30.0),
+            np.r_[1.0, 2.0, np.nan, 3.0, 2.0, 1.0, 4.0],
+            np.array([1.0, 2.0]),
+        ],
+        ids=["flat", "no-down-moves", "missing", "short"],
+    )
+    def test_edge_cases(self, prices):
+        np.testing.assert_array_equal(rsi(prices, 3), loop_rsi(prices, 3))
+
+    @pytest.mark.parametrize("symbols", [3, 20])
+    def test_batches(self, each_stock, symbols):
+        close = each_stock["Close"].values
+        prices = np.stack([close * (1 + 0.01 * i) for i in range(symbols)])
+        prices[1, 100] = np.nan
+        periods = np.arange(symbols) % 5 + 1
+
+        np.testing.assert_array_equal(
+            rsi(prices, 14), [loop_rsi(values, 14) for values in prices]
+        )
+        np.testing.assert_array_equal(
+            rsi(prices, periods),
+            [loop_rsi(values, n) for values, n in zip(prices, periods)],
+        )
+        np.testing.assert_array_equal(
+            rsi(close, [2, 14]), [loop_rsi(close, 2), loop_rsi(close, 14)]
+        )
+
+
+class TestRolling:
+    @pytest.mark.parametrize("window", [1, 2, 5, 14, 50])
+    def test_matches_pandas(self, each_stock, window):
+        low = each_stock["Low"].values
+        rolling = pd.Series(low).rolling(window)
+        np.testing.assert_array_equal(rolling_min(low, window), rolling.min())
+        np.testing.assert_array_equal(rolling_max(low, window), rolling.max())
+        np.testing.assert_allclose(rolling_mean(low, window), rolling.mean())
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            np.r_[3.0, 1.0, np.nan, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0, 5.0, 3.0],
+            np.array([2.0, 1.0]),
+            np.array([]),
+        ],
+        ids=["missing", "short", "empty"],
+    )
+    def test_edge_cases(self, values):
+        rolling = pd.Series(values, dtype=float).rolling(3)
+        np.testing.assert_array_equal(rolling_min(values, 3), rolling.min())
+        np.testing.assert_array_equal(rolling_max(values, 3), rolling.max())
+        np.testing.assert_array_equal(rolling_mean(values, 3), rolling.mean())
+
+    def test_batches(self, each_stock):
+        high = each_stock["High"].values
+        symbols = np.stack([high, high[::-1], np.round(high)])
+        np.testing.assert_array_equal(
+            rolling_max(symbols, 20),
+            [pd.Series(values).rolling(20).max() for values in symbols],
+        )
+
+    def test_window(self):
+        with pytest.raises(ValueError):
+            rolling_max(np.ones(3), 0)
+
+
+def pandas_stochastics(stock, period, k):
+    l_period = stock.Low.rolling(window=period).min()
+    h_period = stock.High.rolling(window=period).max()
+    per_k = 100 * (stock.Close - l_period) / (h_period - l_period)
+    return per_k.rolling(window=k).mean().values
+
+
+class TestChannels:
+    @pytest.mark.parametrize("period, k", [(5, 3), (14, 3), (14, 1)])
+    def test_stochastics_matches_pandas(self, each_stock, period, k):
+        expected = pandas_stochastics(each_stock, period, k)
+        np.testing.assert_allclose(stochastics(each_stock, period, k), expected)
+        np.testing.assert_allclose(stochastics(_Data(each_stock), period, k), expected)
+
+    def test_batches(self, each_stock):
+        prices = {
+            column: np.stack([each_stock[column].values, each_stock[column].values * 2])
+            for column in ["High", "Low", "Close"]
+        }
+        expected = stochastics(each_stock, 5, 3)
+        np.testing.assert_allclose(stochastics(prices, 5, 3), [expected, expected])
+        np.testing.assert_array_equal(
+            breakout(prices, 20), [breakout(each_stock, 20)] * 2
+        )
+
+    def test_donchian_and_williams_r(self, each_stock):
+        upper, middle, lower = donchian(each_stock, 14)
+        np.testing.assert_array_equal(
+            upper, each_stock["High"].rolling(14).max().values
+        )
+        np.testing.assert_array_equal(lower, each_stock["Low"].rolling(14).min().values)
+        np.testing.assert_array_equal(middle, (upper + lower) / 2)
+
+        np.testing.assert_allclose(
+            williams_r(each_stock, 14),
+            100 * (each_stock["Close"].values - upper) / (upper - lower),
+        )
+
+    def test_breakout(self):
+        stock = {
+            "High": np.array([2.0, 3.0, 2.0, 2.5, 4.0, 1.0]),
+            "Low": np.array([1.0, 1.5, 1.2, 1.4, 2.0, 0.5]),
+            "Close": np.array([1.5, 2.5, 3.5, 1.3, 3.0, 0.8]),
+        }
+        np.testing.assert_array_equal(breakout(stock, 2), [0, 0, 1, 0, 1, -1])
@@ -0,0 +1,100 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from t_nachine.indicators import (
+    StreamingEma,
+    StreamingMacd,
+    StreamingRsi,
+    StreamingStochastics,
+    ema,
+    macd,
+    rsi,
+    stochastics,
+)
+
+
+def stream(indicator, *prices):
+    return np.array([indicator.update(*bar) for bar in zip(*prices)])
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+class TestStreaming:
+    def test_ema(self, each_stock):
+        close = each_stock["Close"].values
+        np.testing.assert_array_equal(stream(StreamingEma(50), close), ema(close, 50))
+
+        prices = np.r_[np.nan, 1.0, 2.0, np.nan, np.nan, 3.0, 3.0, np.nan, 2.0]
+        np.testing.assert_array_equal(stream(StreamingEma(3), prices), ema(prices, 3))
+
+    def test_macd(self, each_stock):
+        close = each_stock["Close"].values
+        np.testing.assert_array_equal(
+            stream(StreamingMacd(12, 26), close), macd(each_stock, 12, 26)
+        )
+
+    @pytest.mark.parametrize("n", [1, 2, 14])
+    def test_rsi(self, each_stock, n):
+        close = each_stock["Close"].values
+        expected = rsi(close, n)
+        expected[: n + 1] = np.nan
+        np.testing.assert_array_equal(stream(StreamingRsi(n), close), expected)
+
+    def test_stochastics(self, each_stock):
+        prices = [each_stock[column].values for column in ["High", "Low", "Close"]]
+        np.testing.assert_array_equal(
+            stream(StreamingStochastics(14, 3), *prices), stochastics(each_stock, 14, 3)
+        )
+
+    @pytest.mark.parametrize("split", [1, 10, 500])
+    def test_warm_start(self, each_stock, split):
+        close = each_stock["Close"].values
+        history, bars = close[:split], close[split:]
+
+        np.testing.assert_array_equal(
+            stream(StreamingEma.from_history(history, 18), bars), ema(close, 18)[split:]
+        )
+        np.testing.assert_array_equal(
+            stream(StreamingEma(18, ema(history, 18)[-1]), bars),
+            ema(close, 18)[split:],
+        )
+        np.testing.assert_array_equal(
+            stream(StreamingMacd.from_history(history), bars), macd(each_stock)[split:]
+        )
+        expected = rsi(close, 2)
+        expected[:3] = np.nan
+        np.testing.assert_array_equal(
+            stream(StreamingRsi.from_history(history, 2), bars), expected[split:]
+        )
+        prices = {
+            column: each_stock[column].values for column in ["High", "Low", "Close"]
+        }
+        np.testing.assert_array_equal(
+            stream(
+                StreamingStochastics.from_history(
+                    {column: values[:split] for column, values in prices.items()},
+                    5,
+                    3,
+                ),
+                *(prices[column][split:] for column in ["High", "Low", "Close"]),
+            ),
+            stochastics(each_stock, 5, 3)[split:],
+        )
+
+    @pytest.mark.parametrize("symbols", [3, 20])
+    def test_batches(self, each_stock, symbols):
+        close = each_stock["Close"].values
+        prices = np.stack([close * (1 + 0.01 * i) for i in range(symbols)])
+        prices[1, 100] = np.nan
+        split = 300
+
+        indicator = StreamingEma.from_history(prices[:, :split], 50)
+        np.testing.assert_array_equal(
+            stream(indicator, prices[:, split:].T).T, ema(prices, 50)[:, split:]
+        )
+        indicator = pickle.loads(pickle.dumps(StreamingRsi.from_history(prices, 14)))
+        indicator.update(prices[:, -1])
+        np.testing.assert_array_equal(
+            indicator.value, rsi(np.c_[prices, prices[:, -1]], 14)[:, -1]
+        )
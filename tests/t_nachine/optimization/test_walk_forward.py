@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.strategies import Bouncing
+
+pytest.importorskip("lightgbm")  # imported by t_nachine.optimization
+
+from t_nachine.optimization import WalkForward, Window, rolling_windows  # noqa: E402
+
+SPACE = dict(up_days=[10, 20, 30], risk_to_reward=[2, 3])
+
+
+def test_rolling_windows():
+    assert rolling_windows(10, 4, 3) == [Window(0, 4, 7), Window(3, 7, 10)]
+    assert rolling_windows(11, 4, 3, anchored=True) == [
+        Window(0, 4, 7),
+        Window(0, 7, 10),
+    ]
+    assert rolling_windows(5, 4, 3) == []
+
+
+def test_walk_forward(stock):
+    windows = rolling_windows(len(stock), 1000, 500)
+    walk_forward = WalkForward(cash=20_000)
+    stats = walk_forward.run(stock, Bouncing, windows, **SPACE)
+
+    assert len(stats._windows) == len(windows)
+    assert len(stats._equity_curve) == windows[-1].test_stop - windows[0].test_start
+
+    # each window is traded with its in-sample best parameters
+    bt = Backtest(cash=20_000)
+    trades = []
+    for window, (_, best) in zip(windows, stats._windows.iterrows()):
+        ranked = bt.optimize(stock, Bouncing, bars=window.train, **SPACE)
+        params = dict(up_days=best.up_days, risk_to_reward=best.risk_to_reward)
+        assert params == ranked.iloc[0][list(SPACE)].to_dict()
+        trades.append(bt.run_window(stock, Bouncing, window.test, **params)._trades)
+    trades = pd.concat(trades, ignore_index=True)
+    pd.testing.assert_series_equal(stats._trades.PnL, trades.PnL)
+    assert stats["Equity Final [$]"] == pytest.approx(20_000 + trades.PnL.sum())
+
+
+def test_parallel(stock):
+    windows = rolling_windows(len(stock), 1000, 1000)
+    expected = WalkForward(cash=20_000).run(stock, Bouncing, windows, **SPACE)
+    results = WalkForward(cash=20_000).run(stock, Bouncing, windows, workers=2, **SPACE)
+    pd.testing.assert_frame_equal(expected._trades, results._trades)
+    pd.testing.assert_frame_equal(expected._windows, results._windows)
@@ -1,5 +1,20 @@
+import pytest
+
 from t_nachine.candlesticks import Candle
-from t_nachine.patterns import OrgReversalPattern
+from t_nachine.patterns import (
+    AnyReversalPattern,
+    BullBearPattern,
+    InsideBarReversalPattern,
+    OrgReversalPattern,
+    PinReversalPattern,
+    TradeThroughReversalPattern,
+    any_reversal_pattern,
+    bull_bear_pattern,
+    inside_bar_reversal_pattern,
+    org_reversal_pattern,
+    pin_reversal_pattern,
+    trade_through_reversal_pattern,
+)
 
 
 class TestReversalPatterns:
@@ -17,3 +32,76 @@ class TestReversalPatterns:
         support = [8, 10]
         org_reversal = OrgReversalPattern(candle, pre_candle, support)
         assert org_reversal == True
+
+
+class TestArrayPatterns:
+    @staticmethod
+    def candles(stock):
+        """the candles of the stock, None where the prices are invalid"""
+        candles = []
+        for row in stock[["Open", "High", "Low", "Close"]].itertuples(index=False):
+            try:
+                candles.append(Candle(*row))
+            except ValueError:
+                candles.append(None)
+        return candles
+
+    @pytest.mark.parametrize(
+        "pattern, array_pattern",
+        [
+            (OrgReversalPattern, org_reversal_pattern),
+            (InsideBarReversalPattern, inside_bar_reversal_pattern),
+            (TradeThroughReversalPattern, trade_through_reversal_pattern),
+            (AnyReversalPattern, any_reversal_pattern),
+        ],
+    )
+    @pytest.mark.parametrize("span", [18, 50, 200])
+    def test_reversal_patterns(self, each_stock, pattern, array_pattern, span):
+        support = each_stock["Close"].ewm(span=span, adjust=False).mean().values
+        mask = array_pattern(
+            each_stock.Open,
+            each_stock.High,
+            each_stock.Low,
+            each_stock.Close,
+            support=support,
+        )
+        candles = self.candles(each_stock)
+
+        checked = 0
+        for i in range(1, len(each_stock)):
+            if candles[i] is not None and candles[i - 1] is not None:
+                expected = pattern(
+                    candle=candles[i],
+                    pre_candle=candles[i - 1],
+                    support=[support[i], support[i - 1]],
+                )
+                assert mask[i] == bool(expected), i
+                checked += 1
+        assert not mask[0]
+        assert checked > 0.9 * len(each_stock)
+
+    @pytest.mark.parametrize("span", [18, 50, 200])
+    def test_pin_reversal_pattern(self, each_stock, span):
+        support = each_stock["Close"].ewm(span=span, adjust=False).mean().values
+        mask = pin_reversal_pattern(
+            each_stock.Open,
+            each_stock.High,
+            each_stock.Low,
+            each_stock.Close,
+            support=support,
+        )
+        for i, candle in enumerate(self.candles(each_stock)):
+            if candle is not None:
+                expected = PinReversalPattern(candle=candle, support=[support[i]])
+                assert mask[i] == bool(expected), i
+
+    def test_bull_bear_pattern(self, each_stock):
+        mask = bull_bear_pattern(
+            each_stock.Open, each_stock.High, each_stock.Low, each_stock.Close
+        )
+        candles = self.candles(each_stock)
+        for i in range(1, len(each_stock)):
+            if candles[i] is not None and candles[i - 1] is not None:
+                expected = BullBearPattern(candle=candles[i], pre_candle=candles[i - 1])
+                assert mask[i] == bool(expected), i
+        assert mask.any() and not mask[0]
@@ -1,2 +1,48 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from t_nachine.backtester.core.backtest import Backtest
+from t_nachine.strategies import Bouncing
+
+
 def test_placeholder():
     pass
+
+
+def uptrend(ema18, ema50, ema100, ema200, up_days):
+    """per-bar uptrend check, on the last <up_days> values"""
+    ema50_above_ema100_above_ema200 = all(
+        [ema50[i] >= ema100[i] >= ema200[i] for i in range(-up_days, -1)]
+    )
+    ema18_above_ema50 = np.mean(
+        [ema18[i] >= ema50[i] for i in range(-int(up_days / 2), -3)]
+    ) >= 0.9 and all([ema18[i] > ema50[i] for i in range(-3, 0)])
+    return ema18_above_ema50 and ema50_above_ema100_above_ema200
+
+
+@pytest.mark.parametrize("up_days", [Bouncing.up_days, 4, 5])
+def test_bouncing_uptrend_mask(each_stock, up_days):
+    strategy = (
+        Backtest(cash=20_000).run(each_stock, Bouncing, up_days=up_days)._strategy
+    )
+    emas = [
+        np.asarray(indicator)
+        for indicator in (
+            strategy.ema18,
+            strategy.ema50,
+            strategy.ema100,
+            strategy.ema200,
+        )
+    ]
+
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        # the mean of no bars is nan when up_days is small
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = [False] * (up_days - 1) + [
+            uptrend(*(ema[i + 1 - up_days : i + 1] for ema in emas), up_days)
+            for i in range(up_days - 1, len(each_stock))
+        ]
+    assert any(expected) == (up_days == Bouncing.up_days)
+    np.testing.assert_array_equal(strategy.uptrend_mask(), expected)